@@ -4,18 +4,30 @@ byceps.services.whereabouts.announcing
 
 Announce whereabouts events.
 
+An event is usually announced to several webhooks at once, many of
+which share a locale. Announcements are therefore cached per event and
+locale, and rendered only once for all of them.
+
 :Copyright: 2022-2025 Jochen Kupperschmidt
 :License: Revised BSD (see `LICENSE` file for details)
 """
 
 from __future__ import annotations
 
-from flask_babel import gettext
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import wraps
+import threading
+from typing import TypeVar
+
+from flask_babel import get_locale, gettext
 
 from byceps.announce.helpers import (
     get_screen_name_or_fallback,
     with_locale,
 )
+from byceps.services.core.events import BaseEvent
 from byceps.services.webhooks.models import Announcement, OutgoingWebhook
 
 from .events import (
@@ -29,10 +41,113 @@ from .events import (
 )
 
 
+E = TypeVar('E', bound=BaseEvent)
+
+AnnouncementHandler = Callable[[str, E, OutgoingWebhook], Announcement | None]
+
+
+ANNOUNCEMENT_CACHE_MAX_SIZE = 1_000
+
+
+class _AnnouncementCache:
+    """Keep announcements rendered for recent events, by handler, event,
+    and locale, least recently used first.
+
+    Events are identified by object identity. As each entry references
+    its event, the identity cannot be reused by another object while the
+    entry exists.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._entries: OrderedDict[
+            tuple[str, int, str], tuple[BaseEvent, Announcement | None]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self.enabled = True
+
+    def get_or_render(
+        self,
+        handler_name: str,
+        event: BaseEvent,
+        locale: str,
+        render: Callable[[], Announcement | None],
+    ) -> Announcement | None:
+        if not self.enabled:
+            return render()
+
+        key = (handler_name, id(event), locale)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry is not None) and (entry[0] is event):
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        announcement = render()
+
+        with self._lock:
+            self._entries[key] = (event, announcement)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+        return announcement
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_announcement_cache = _AnnouncementCache(ANNOUNCEMENT_CACHE_MAX_SIZE)
+
+
+def cache_per_locale(
+    handler: AnnouncementHandler[E],
+) -> AnnouncementHandler[E]:
+    """Render the announcement of an event only once per locale.
+
+    Must be applied below `with_locale` so the webhook's locale is in
+    effect. The handler must not depend on the webhook otherwise.
+    """
+
+    @wraps(handler)
+    def wrapper(
+        event_name: str, event: E, webhook: OutgoingWebhook
+    ) -> Announcement | None:
+        return _announcement_cache.get_or_render(
+            handler.__qualname__,
+            event,
+            str(get_locale()),
+            lambda: handler(event_name, event, webhook),
+        )
+
+    return wrapper
+
+
+def clear_announcement_cache() -> None:
+    """Forget all cached announcements."""
+    _announcement_cache.clear()
+
+
+@contextmanager
+def announcement_caching(enabled: bool) -> Iterator[None]:
+    """Enable or disable caching of announcements within the block
+    (e.g. to measure its effect).
+    """
+    previously_enabled = _announcement_cache.enabled
+    _announcement_cache.enabled = enabled
+    try:
+        yield
+    finally:
+        _announcement_cache.enabled = previously_enabled
+
+
 # client
 
 
 @with_locale
+@cache_per_locale
 def announce_whereabouts_client_registered(
     event_name: str,
     event: WhereaboutsClientRegisteredEvent,
@@ -51,6 +166,7 @@ def announce_whereabouts_client_registered(
 
 
 @with_locale
+@cache_per_locale
 def announce_whereabouts_client_approved(
     event_name: str,
     event: WhereaboutsClientApprovedEvent,
@@ -69,6 +185,7 @@ def announce_whereabouts_client_approved(
 
 
 @with_locale
+@cache_per_locale
 def announce_whereabouts_client_deleted(
     event_name: str,
     event: WhereaboutsClientDeletedEvent,
@@ -87,6 +204,7 @@ def announce_whereabouts_client_deleted(
 
 
 @with_locale
+@cache_per_locale
 def announce_whereabouts_client_signed_on(
     event_name: str,
     event: WhereaboutsClientSignedOnEvent,
@@ -102,6 +220,7 @@ def announce_whereabouts_client_signed_on(
 
 
 @with_locale
+@cache_per_locale
 def announce_whereabouts_client_signed_off(
     event_name: str,
     event: WhereaboutsClientSignedOffEvent,
@@ -120,6 +239,7 @@ def announce_whereabouts_client_signed_off(
 
 
 @with_locale
+@cache_per_locale
 def announce_whereabouts_unknown_tag_detected(
     event_name: str,
     event: WhereaboutsUnknownTagDetectedEvent,
@@ -141,6 +261,7 @@ def announce_whereabouts_unknown_tag_detected(
 
 
 @with_locale
+@cache_per_locale
 def announce_whereabouts_status_updated(
     event_name: str,
     event: WhereaboutsStatusUpdatedEvent,
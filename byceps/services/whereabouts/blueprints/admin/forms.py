@@ -6,8 +6,8 @@ byceps.services.whereabouts.blueprints.admin.forms
 :License: Revised BSD (see `LICENSE` file for details)
 """
 
-from flask_babel import lazy_gettext, lazy_pgettext
-from wtforms import BooleanField, StringField
+from flask_babel import gettext, lazy_gettext, lazy_pgettext
+from wtforms import BooleanField, DateTimeLocalField, SelectField, StringField
 from wtforms.validators import InputRequired, Optional, ValidationError
 
 from byceps.services.user import user_service
@@ -59,3 +59,37 @@ class UserSoundCreateForm(LocalizedForm):
             )
 
         field.data = user
+
+
+class UpdateExportForm(LocalizedForm):
+    since = DateTimeLocalField(lazy_gettext('From'), [Optional()])
+    until = DateTimeLocalField(lazy_gettext('To'), [Optional()])
+    whereabouts_id = SelectField(lazy_gettext('Whereabouts'), [Optional()])
+    user = StringField(lazy_gettext('Username'), [Optional()])
+    export_format = SelectField(
+        lazy_gettext('Format'),
+        choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')],
+        default='csv',
+    )
+
+    def set_whereabouts_choices(self, whereabouts_list) -> None:
+        choices = [
+            (str(whereabouts.id), whereabouts.description)
+            for whereabouts in whereabouts_list
+        ]
+        choices.insert(0, ('', '<' + gettext('any') + '>'))
+        self.whereabouts_id.choices = choices
+
+    @staticmethod
+    def validate_user(form, field):
+        screen_name = (field.data or '').strip()
+        if not screen_name:
+            field.data = None
+            return
+
+        user = user_service.find_user_by_screen_name(screen_name)
+
+        if user is None:
+            raise ValidationError(lazy_gettext('Unknown username'))
+
+        field.data = user
@@ -8,25 +8,31 @@ byceps.services.whereabouts.blueprints.admin.views
 
 from collections import defaultdict
 from datetime import datetime, timedelta
+from uuid import UUID
 
-from flask import abort, g, request
-from flask_babel import gettext
+from flask import abort, g, request, Response, stream_with_context
+from flask_babel import gettext, ngettext
 
 from byceps.services.party import party_service
 from byceps.services.party.models import Party
+from byceps.services.user import user_service
 from byceps.services.whereabouts import (
     signals as whereabouts_signals,
+    whereabouts_analytics_service,
     whereabouts_client_service,
+    whereabouts_export_service,
     whereabouts_service,
     whereabouts_sound_service,
+    whereabouts_status_queue_service,
 )
 from byceps.services.whereabouts.models import (
     WhereaboutsClient,
     WhereaboutsClientCandidate,
     WhereaboutsStatus,
 )
+from byceps.util.datetime.timezone import to_utc
 from byceps.util.framework.blueprint import create_blueprint
-from byceps.util.framework.flash import flash_success
+from byceps.util.framework.flash import flash_error, flash_success
 from byceps.util.framework.templating import templated
 from byceps.util.iterables import partition
 from byceps.util.views import (
@@ -35,7 +41,12 @@ from byceps.util.views import (
     respond_no_content,
 )
 
-from .forms import ClientUpdateForm, UserSoundCreateForm, WhereaboutsCreateForm
+from .forms import (
+    ClientUpdateForm,
+    UpdateExportForm,
+    UserSoundCreateForm,
+    WhereaboutsCreateForm,
+)
 
 
 blueprint = create_blueprint('whereabouts_admin', __name__)
@@ -43,19 +54,35 @@ blueprint = create_blueprint('whereabouts_admin', __name__)
 
 STALE_THRESHOLD = timedelta(hours=12)
 
+CLIENT_UPDATE_COUNTS_PERIOD = timedelta(hours=1)
+CLIENT_LATEST_UPDATES_LIMIT = 20
+
+USER_UPDATES_PAGE_LIMIT = 50
+
 
 @blueprint.get('/for_party/<party_id>')
 @permission_required('whereabouts.view')
 @templated
 def index(party_id):
-    """Show orga whereabouts for party."""
+    """Show orga whereabouts for party.
+
+    If a point in time is given (as `at`, in local time), show the
+    whereabouts as they were back then.
+    """
     party = _get_party_or_404(party_id)
 
-    whereabouts_list = whereabouts_service.get_whereabouts_list(party)
+    at = _get_point_in_time_arg()
 
-    statuses = whereabouts_service.get_statuses(party)
+    whereabouts_list = whereabouts_service.get_whereabouts_list(party)
 
-    now = datetime.utcnow()
+    if at is not None:
+        statuses = whereabouts_service.get_statuses_as_of(party, at)
+        now = at
+        status_queue_lag = None
+    else:
+        statuses = whereabouts_service.get_statuses(party)
+        now = datetime.utcnow()
+        status_queue_lag = whereabouts_status_queue_service.get_lag()
 
     def _is_status_stale(status: WhereaboutsStatus) -> bool:
         return (now - STALE_THRESHOLD) > status.set_at
@@ -71,8 +98,132 @@ def index(party_id):
         'whereabouts_list': whereabouts_list,
         'recent_statuses_by_whereabouts': recent_statuses_by_whereabouts,
         'stale_statuses': stale_statuses,
+        'at': at,
+        'status_queue_lag': status_queue_lag,
+    }
+
+
+@blueprint.get('/for_party/<party_id>/users/<uuid:user_id>/updates')
+@permission_required('whereabouts.view')
+@templated
+def user_updates(party_id, user_id):
+    """Show a user's whereabouts updates for the party, newest first."""
+    party = _get_party_or_404(party_id)
+
+    user = user_service.find_user(user_id, include_avatar=True)
+    if user is None:
+        abort(404)
+
+    try:
+        after = UUID(request.args['after']) if 'after' in request.args else None
+    except ValueError:
+        abort(400)
+
+    page = whereabouts_service.get_updates_for_user_page(
+        user, party, USER_UPDATES_PAGE_LIMIT, after=after
+    )
+
+    whereabouts_by_id = {
+        whereabouts.id: whereabouts
+        for whereabouts in whereabouts_service.get_whereabouts_list(party)
+    }
+
+    return {
+        'party': party,
+        'user': user,
+        'updates': page.updates,
+        'next_cursor': page.next_cursor,
+        'whereabouts_by_id': whereabouts_by_id,
+    }
+
+
+@blueprint.get('/for_party/<party_id>/dwell_times')
+@permission_required('whereabouts.view')
+@templated
+def dwell_times(party_id):
+    """Show how long users stay at the party's whereabouts."""
+    party = _get_party_or_404(party_id)
+
+    if not whereabouts_analytics_service.is_available():
+        return {
+            'party': party,
+            'available': False,
+        }
+
+    whereabouts_stats, user_party_times = (
+        whereabouts_analytics_service.get_dwell_time_stats(party)
+    )
+
+    return {
+        'party': party,
+        'available': True,
+        'whereabouts_stats': whereabouts_stats,
+        'user_party_times': user_party_times,
+    }
+
+
+@blueprint.get('/for_party/<party_id>/updates/export')
+@permission_required('whereabouts.view')
+@templated
+def updates_export_form(party_id, erroneous_form=None):
+    """Show form to export the party's whereabouts updates."""
+    party = _get_party_or_404(party_id)
+
+    form = erroneous_form if erroneous_form else UpdateExportForm()
+    form.set_whereabouts_choices(
+        whereabouts_service.get_whereabouts_list(party)
+    )
+
+    return {
+        'party': party,
+        'form': form,
+    }
+
+
+@blueprint.get('/for_party/<party_id>/updates/export/download')
+@permission_required('whereabouts.view')
+def updates_export(party_id):
+    """Stream the party's whereabouts updates as CSV or NDJSON."""
+    party = _get_party_or_404(party_id)
+
+    form = UpdateExportForm(request.args)
+    form.set_whereabouts_choices(
+        whereabouts_service.get_whereabouts_list(party)
+    )
+    if not form.validate():
+        return updates_export_form(party_id, form)
+
+    filters = {
+        'since': form.since.data,
+        'until': form.until.data,
+        'whereabouts_id': (
+            UUID(form.whereabouts_id.data) if form.whereabouts_id.data else None
+        ),
+        'user_id': form.user.data.id if form.user.data else None,
     }
 
+    match form.export_format.data:
+        case 'ndjson':
+            chunks = whereabouts_export_service.export_updates_as_ndjson(
+                party, **filters
+            )
+            mimetype = 'application/x-ndjson'
+        case _:
+            chunks = whereabouts_export_service.export_updates_as_csv(
+                party, **filters
+            )
+            mimetype = 'text/csv'
+
+    filename = f'whereabouts-updates-{party.id}.{form.export_format.data}'
+
+    # Keep the request context (and with it the database session that
+    # holds the server-side cursor) alive while streaming.
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
 
 # -------------------------------------------------------------------- #
 # whereabouts
@@ -164,8 +315,29 @@ def client_view(client_id):
     """Show single client."""
     client = _get_client_or_404(client_id)
 
+    update_counts_per_minute = (
+        whereabouts_service.get_update_counts_per_minute_for_client(
+            client, CLIENT_UPDATE_COUNTS_PERIOD
+        )
+    )
+    max_update_count_per_minute = max(
+        (count for _, count in update_counts_per_minute), default=0
+    )
+
+    latest_updates = whereabouts_service.get_latest_updates_for_client(
+        client, CLIENT_LATEST_UPDATES_LIMIT
+    )
+
+    whereabouts_by_id = whereabouts_service.get_whereabouts_indexed_by_id(
+        {update.whereabouts_id for update in latest_updates}
+    )
+
     return {
         'client': client,
+        'update_counts_per_minute': update_counts_per_minute,
+        'max_update_count_per_minute': max_update_count_per_minute,
+        'latest_updates': latest_updates,
+        'whereabouts_by_id': whereabouts_by_id,
     }
 
 
@@ -193,7 +365,13 @@ def client_candidate_approve(candidate_id):
     candidate = _get_client_candidate_or_404(candidate_id)
     initiator = g.user
 
-    _, event = whereabouts_client_service.approve_client(candidate, initiator)
+    try:
+        _, event = whereabouts_client_service.approve_client(
+            candidate, initiator
+        )
+    except ValueError:
+        flash_error(gettext('Client candidate is not pending anymore.'))
+        return
 
     flash_success(gettext('Client candidate has been approved.'))
 
@@ -213,6 +391,56 @@ def client_candidate_delete(candidate_id):
     flash_success(gettext('Client candidate has been deleted.'))
 
 
+@blueprint.post('/client_candidates/approve')
+@permission_required('whereabouts.administrate')
+def client_candidates_approve():
+    """Approve selected (or all) client candidates at once."""
+    candidates = _get_selected_client_candidates()
+    initiator = g.user
+
+    approvals = whereabouts_client_service.approve_client_candidates(
+        candidates, initiator
+    )
+
+    flash_success(
+        ngettext(
+            '%(num)s client candidate has been approved.',
+            '%(num)s client candidates have been approved.',
+            len(approvals),
+        )
+    )
+
+    for _, event in approvals:
+        whereabouts_signals.whereabouts_client_approved.send(None, event=event)
+
+    return redirect_to('.client_index')
+
+
+@blueprint.post('/client_candidates/delete')
+@permission_required('whereabouts.administrate')
+def client_candidates_delete():
+    """Delete selected (or all) client candidates at once."""
+    candidates = _get_selected_client_candidates()
+    initiator = g.user
+
+    events = whereabouts_client_service.delete_client_candidates(
+        candidates, initiator
+    )
+
+    flash_success(
+        ngettext(
+            '%(num)s client candidate has been deleted.',
+            '%(num)s client candidates have been deleted.',
+            len(events),
+        )
+    )
+
+    for event in events:
+        whereabouts_signals.whereabouts_client_deleted.send(None, event=event)
+
+    return redirect_to('.client_index')
+
+
 @blueprint.get('/client/<uuid:client_id>/update')
 @permission_required('whereabouts.administrate')
 @templated
@@ -325,6 +553,19 @@ def _get_party_or_404(party_id) -> Party:
     return party
 
 
+def _get_point_in_time_arg() -> datetime | None:
+    value = request.args.get('at')
+    if not value:
+        return None
+
+    try:
+        local_dt = datetime.fromisoformat(value)
+    except ValueError:
+        abort(400)
+
+    return to_utc(local_dt)
+
+
 def _get_client_candidate_or_404(client_id) -> WhereaboutsClientCandidate:
     client_candidate = whereabouts_client_service.find_client_candidate(
         client_id
@@ -336,6 +577,21 @@ def _get_client_candidate_or_404(client_id) -> WhereaboutsClientCandidate:
     return client_candidate
 
 
+def _get_selected_client_candidates() -> list[WhereaboutsClientCandidate]:
+    candidates = whereabouts_client_service.get_client_candidates()
+
+    if request.form.get('all'):
+        return candidates
+
+    selected_ids = set(request.form.getlist('candidate_id'))
+
+    return [
+        candidate
+        for candidate in candidates
+        if str(candidate.id) in selected_ids
+    ]
+
+
 def _get_client_or_404(client_id) -> WhereaboutsClient:
     client = whereabouts_client_service.find_client(client_id)
 
@@ -11,7 +11,10 @@ from functools import wraps
 from flask import abort, g, request
 from werkzeug.datastructures import WWWAuthenticate
 
-from byceps.services.whereabouts import whereabouts_client_service
+from byceps.services.whereabouts import (
+    whereabouts_client_service,
+    whereabouts_outage_journal_service,
+)
 from byceps.services.whereabouts.models import WhereaboutsClient
 
 
@@ -46,7 +49,10 @@ def _find_client() -> WhereaboutsClient | None:
     if client_token is None:
         return None
 
-    return whereabouts_client_service.find_client_by_token(client_token)
+    return whereabouts_outage_journal_service.look_up(
+        ('client_token', client_token),
+        lambda: whereabouts_client_service.find_client_by_token(client_token),
+    )
 
 
 def _get_bearer_token() -> str | None:
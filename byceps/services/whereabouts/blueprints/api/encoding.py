@@ -0,0 +1,151 @@
+"""
+byceps.services.whereabouts.blueprints.api.encoding
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Negotiate encodings of request and response bodies.
+
+JSON is always available. MessagePack and CBOR are offered if the
+optional libraries `msgpack` and `cbor2`, respectively, are installed.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections.abc import Callable
+from datetime import datetime
+import json
+from typing import Any
+from uuid import UUID
+
+from flask import jsonify, Request, request, Response
+from werkzeug.datastructures import MIMEAccept
+
+
+MEDIA_TYPE_JSON = 'application/json'
+MEDIA_TYPE_MSGPACK = 'application/msgpack'
+MEDIA_TYPE_MSGPACK_LEGACY = 'application/x-msgpack'
+MEDIA_TYPE_CBOR = 'application/cbor'
+
+
+_decoders: dict[str, Callable[[bytes], Any]] = {}
+_encoders: dict[str, Callable[[Any], bytes]] = {}
+
+
+try:
+    import msgpack
+except ImportError:
+    pass
+else:
+    _decoders[MEDIA_TYPE_MSGPACK] = msgpack.unpackb
+    _decoders[MEDIA_TYPE_MSGPACK_LEGACY] = msgpack.unpackb
+    _encoders[MEDIA_TYPE_MSGPACK] = msgpack.packb
+
+
+try:
+    import cbor2
+except ImportError:
+    pass
+else:
+    _decoders[MEDIA_TYPE_CBOR] = cbor2.loads
+    _encoders[MEDIA_TYPE_CBOR] = cbor2.dumps
+
+
+class RequestDecodingError(Exception):
+    pass
+
+
+def has_supported_content_type(request: Request) -> bool:
+    """Return `True` if the request body can be decoded."""
+    return request.is_json or (request.mimetype in _decoders)
+
+
+def get_request_data(request: Request) -> Any:
+    """Decode the request body according to its content type."""
+    if request.is_json:
+        data = request.get_json(silent=True)
+        if data is None:
+            raise RequestDecodingError('Invalid JSON')
+        return data
+
+    return decode_data(request.mimetype, request.get_data())
+
+
+def create_response(data: Any, status: int = 200) -> Response:
+    """Encode the data in the media type preferred by the client."""
+    media_type = select_response_media_type(request.accept_mimetypes)
+
+    if media_type == MEDIA_TYPE_JSON:
+        response = jsonify(data)
+    else:
+        body = encode_data(media_type, data)
+        response = Response(body, mimetype=media_type)
+
+    response.status_code = status
+    response.vary.add('Accept')
+    return response
+
+
+def create_empty_response(status: int) -> Response:
+    """Return an empty object in the media type preferred by the
+    client.
+    """
+    return create_response({}, status)
+
+
+def is_supported_media_type(media_type: str) -> bool:
+    """Return `True` if request bodies of that media type can be
+    decoded.
+    """
+    return (media_type == MEDIA_TYPE_JSON) or (media_type in _decoders)
+
+
+def decode_data(media_type: str, body: bytes) -> Any:
+    """Decode a request body of the given media type."""
+    if media_type == MEDIA_TYPE_JSON:
+        decode = json.loads
+    else:
+        decode = _decoders.get(media_type)
+        if decode is None:
+            raise RequestDecodingError(
+                f'Unsupported content type: {media_type}'
+            )
+
+    try:
+        return decode(body)
+    except Exception as e:
+        raise RequestDecodingError(str(e)) from e
+
+
+def encode_data(media_type: str, data: Any) -> bytes:
+    """Encode the data in the given media type."""
+    if media_type == MEDIA_TYPE_JSON:
+        return json.dumps(_to_primitive(data)).encode('utf-8')
+
+    encode = _encoders[media_type]
+    return encode(_to_primitive(data))
+
+
+def select_response_media_type(accept: MIMEAccept) -> str:
+    """Return the supported media type the client prefers."""
+    return accept.best_match(
+        [MEDIA_TYPE_JSON, *_encoders.keys()], default=MEDIA_TYPE_JSON
+    )
+
+
+def _to_primitive(value: Any) -> Any:
+    """Convert values the binary encoders do not handle the way JSON
+    clients expect them (namely as strings).
+    """
+    if isinstance(value, dict):
+        return {key: _to_primitive(item) for key, item in value.items()}
+
+    if isinstance(value, list | tuple):
+        return [_to_primitive(item) for item in value]
+
+    if isinstance(value, UUID):
+        return str(value)
+
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    return value
@@ -6,9 +6,14 @@ byceps.services.whereabouts.blueprints.api.models
 :License: Revised BSD (see `LICENSE` file for details)
 """
 
+from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+
+class AssignClientConfigRequestModel(BaseModel):
+    client_ids: list[UUID] = Field(min_length=1, max_length=1000)
 
 
 class RegisterClientRequestModel(BaseModel):
@@ -20,3 +25,25 @@ class SetStatusRequestModel(BaseModel):
     user_id: UUID
     party_id: str
     whereabouts_name: str
+    update_id: UUID | None = None  # UUIDv7 chosen by the client
+
+
+class StatusSnapshotRequestModel(BaseModel):
+    since: datetime | None = None
+    after: str | None = None
+    limit: int = Field(default=500, ge=1, le=1000)
+
+
+class OccupancyHistoryRequestModel(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class UserUpdatesRequestModel(BaseModel):
+    after: UUID | None = None
+    limit: int = Field(default=100, ge=1, le=1000)
+
+
+class StaysRequestModel(BaseModel):
+    start: datetime
+    end: datetime
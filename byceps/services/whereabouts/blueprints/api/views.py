@@ -6,12 +6,24 @@ byceps.services.whereabouts.blueprints.api.views
 :License: Revised BSD (see `LICENSE` file for details)
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from ipaddress import ip_address
+from typing import TypeVar
+from uuid import UUID
+
+from flask import (
+    abort,
+    g,
+    jsonify,
+    request,
+    Request,
+    Response,
+    stream_with_context,
+    url_for,
+)
+from pydantic import BaseModel, ValidationError
 
-from flask import abort, g, jsonify, request, Request, url_for
-from pydantic import ValidationError
-
+from byceps.blueprints.api.decorators import api_token_required
 from byceps.services.authn.identity_tag import authn_identity_tag_service
 from byceps.services.party import party_service
 from byceps.services.party.models import PartyID
@@ -19,50 +31,111 @@ from byceps.services.user import user_service
 from byceps.services.user.models.user import UserID
 from byceps.services.whereabouts import (
     signals as whereabouts_signals,
+    whereabouts_client_notification_service,
+    whereabouts_client_registration_throttling,
     whereabouts_client_service,
+    whereabouts_idempotency_service,
+    whereabouts_occupancy_service,
+    whereabouts_outage_journal_service,
+    whereabouts_rollup_service,
     whereabouts_service,
     whereabouts_sound_service,
+    whereabouts_status_queue_service,
+    whereabouts_stay_service,
 )
 from byceps.services.whereabouts.events import (
     WhereaboutsUnknownTagDetectedEvent,
 )
-from byceps.services.whereabouts.models import IPAddress
+from byceps.services.whereabouts.models import (
+    IPAddress,
+    WhereaboutsClientConfigID,
+    WhereaboutsClientID,
+    WhereaboutsStatusSnapshotCursor,
+    WhereaboutsStatusSnapshotPage,
+)
+from byceps.services.whereabouts.whereabouts_client_service import (
+    ClientCandidateLimitReachedError,
+)
+from byceps.services.whereabouts.whereabouts_idempotency_service import (
+    DuplicateUpdateError,
+)
 from byceps.util.framework.blueprint import create_blueprint
-from byceps.util.views import create_empty_json_response, respond_no_content
+from byceps.util.views import respond_no_content
 
 from .decorators import client_token_required
-from .models import RegisterClientRequestModel, SetStatusRequestModel
+from .encoding import (
+    create_empty_response,
+    create_response,
+    get_request_data,
+    has_supported_content_type,
+    RequestDecodingError,
+)
+from .models import (
+    AssignClientConfigRequestModel,
+    OccupancyHistoryRequestModel,
+    RegisterClientRequestModel,
+    SetStatusRequestModel,
+    StatusSnapshotRequestModel,
+    StaysRequestModel,
+    UserUpdatesRequestModel,
+)
 
 
 blueprint = create_blueprint('whereabouts_api', __name__)
 
 
+T = TypeVar('T', bound=BaseModel)
+
+
+# Maximum time span of occupancy history per request
+OCCUPANCY_HISTORY_MAX_PERIOD = timedelta(days=7)
+
+
+# Suggested delay before registering again if too many client
+# candidates are pending.
+CLIENT_CANDIDATE_LIMIT_RETRY_AFTER = 300  # seconds
+
+
 @blueprint.post('/client/register')
 def register_client():
     """Register a client."""
-    if not request.is_json:
-        abort(415)
-
-    try:
-        req = RegisterClientRequestModel.model_validate(request.get_json())
-    except ValidationError as e:
-        abort(400, e.json())
-
     if not whereabouts_client_service.is_registration_open():
         abort(403, 'Client registration is closed.')
 
     source_address = _get_source_ip_address(request)
 
-    candidate, event = whereabouts_client_service.register_client(
-        req.button_count, req.audio_output, source_address=source_address
+    throttling_decision = (
+        whereabouts_client_registration_throttling.check_registration(
+            source_address
+        )
     )
+    if not throttling_decision.allowed:
+        abort(
+            429,
+            'Too many registration attempts.',
+            retry_after=throttling_decision.retry_after,
+        )
+
+    req = _parse_request(RegisterClientRequestModel)
+
+    try:
+        candidate, event = whereabouts_client_service.register_client(
+            req.button_count, req.audio_output, source_address=source_address
+        )
+    except ClientCandidateLimitReachedError:
+        abort(
+            429,
+            'Too many clients are pending approval.',
+            retry_after=CLIENT_CANDIDATE_LIMIT_RETRY_AFTER,
+        )
 
     whereabouts_signals.whereabouts_client_registered.send(None, event=event)
 
     url = url_for('.get_client_registration_status', client_id=candidate.id)
 
-    response = jsonify({'client_id': candidate.id, 'token': candidate.token})
-    response.status_code = 201
+    response = create_response(
+        {'client_id': candidate.id, 'token': candidate.token}, 201
+    )
     response.headers['Location'] = url
     return response
 
@@ -81,7 +154,7 @@ def get_client_registration_status(client_id):
     else:
         response_data = {'status': 'rejected'}
 
-    return jsonify(response_data)
+    return create_response(response_data)
 
 
 @blueprint.post('/client/sign_on')
@@ -112,6 +185,64 @@ def sign_off_client():
     whereabouts_signals.whereabouts_client_signed_off.send(None, event=event)
 
 
+@blueprint.get('/client/config')
+@client_token_required
+def get_client_config():
+    """Get the configuration assigned to the client.
+
+    The configuration's stored content hash serves as strong entity
+    tag, so a polling client (sending `If-None-Match`) gets `304 Not
+    Modified` without the content being loaded.
+    """
+    config_id = g.client.config_id
+    if config_id is None:
+        return create_empty_response(404)
+
+    content_hash = whereabouts_client_service.find_client_config_content_hash(
+        config_id
+    )
+    if content_hash is None:
+        return create_empty_response(404)
+
+    if content_hash in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(content_hash)
+        return response
+
+    config = whereabouts_client_service.find_client_config(config_id)
+    if config is None:
+        return create_empty_response(404)
+
+    response = Response(config.content, mimetype='text/plain')
+    response.set_etag(config.content_hash)
+    response.cache_control.no_cache = True
+    return response
+
+
+@blueprint.get('/client/events')
+@client_token_required
+def stream_client_events():
+    """Stream notifications to the client as server-sent events.
+
+    The client should refetch its configuration, user sounds, or
+    whereabouts when notified of changes to them.
+    """
+    if not whereabouts_client_notification_service.is_enabled():
+        abort(404)
+
+    events = whereabouts_client_notification_service.stream_notifications(
+        g.client.id
+    )
+
+    response = Response(
+        stream_with_context(events), mimetype='text/event-stream'
+    )
+    response.cache_control.no_cache = True
+    # Keep reverse proxies (nginx) from buffering the stream.
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @blueprint.get('/tags/<identifier>')
 @client_token_required
 def get_tag(identifier):
@@ -129,13 +260,13 @@ def get_tag(identifier):
             None, event=event
         )
 
-        return create_empty_json_response(404)
+        return create_empty_response(404)
 
     user_sound = whereabouts_sound_service.find_sound_for_user(
         identity_tag.user.id
     )
 
-    return jsonify(
+    return create_response(
         {
             'identifier': identity_tag.identifier,
             'user': {
@@ -162,13 +293,13 @@ def get_status(user_id, party_id):
 
     status = whereabouts_service.find_status(user, party)
     if status is None:
-        return create_empty_json_response(404)
+        return create_empty_response(404)
 
     whereabouts = whereabouts_service.find_whereabouts(status.whereabouts_id)
     if whereabouts is None:
         abort(500, 'Unknown whereabouts ID')  # not a client error
 
-    return jsonify(
+    return create_response(
         {
             'user': {
                 'id': user.id,
@@ -187,29 +318,75 @@ def get_status(user_id, party_id):
 
 @blueprint.post('/statuses')
 @client_token_required
-@respond_no_content
 def set_status():
-    """Set user's status."""
-    if not request.is_json:
-        abort(415)
+    """Set user's status.
+
+    If the client prefers so (via `Prefer: respond-async`) and a status
+    queue is available, the update is queued and acknowledged with
+    `202 Accepted` before it is persisted.
+
+    A client can make retries recognizable by sending an
+    `Idempotency-Key` header or by choosing the update's ID (a UUIDv7).
+    A retry of an update that has been made already is acknowledged
+    without making it again, with `202 Accepted` if the update has been
+    (or would have been) queued, and `204 No Content` otherwise.
+    """
+    req = _parse_request(SetStatusRequestModel)
+
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if (idempotency_key is not None) and not (
+        0
+        < len(idempotency_key)
+        <= whereabouts_idempotency_service.IDEMPOTENCY_KEY_MAX_LENGTH
+    ):
+        abort(400, 'Invalid idempotency key')
+
+    if (req.update_id is not None) and (req.update_id.version != 7):
+        abort(400, 'Update ID must be a UUIDv7')
+
+    is_idempotent = (idempotency_key is not None) or (req.update_id is not None)
+
+    queued = (
+        _prefers_async_response(request)
+        and whereabouts_status_queue_service.is_enabled()
+    )
 
-    try:
-        req = SetStatusRequestModel.model_validate(request.get_json())
-    except ValidationError as e:
-        abort(400, e.json())
+    if is_idempotent:
+        previous_update = whereabouts_idempotency_service.find_previous_update(
+            g.client.id,
+            PartyID(req.party_id),
+            idempotency_key=idempotency_key,
+            update_id=req.update_id,
+        )
+        if previous_update is not None:
+            # A queued update may not have been persisted yet, so do
+            # not claim otherwise.
+            return _create_replayed_response(
+                accepted_async=previous_update.accepted_async or queued
+            )
+
+    # Lookups fall back to earlier results while the database is
+    # unavailable, so the update can be journaled.
 
     user_id = UserID(req.user_id)
-    user = user_service.find_user(user_id)
+    user = whereabouts_outage_journal_service.look_up(
+        ('user', user_id), lambda: user_service.find_user(user_id)
+    )
     if user is None:
         abort(400, 'Unknown user ID')
 
     party_id = PartyID(req.party_id)
-    party = party_service.find_party(party_id)
+    party = whereabouts_outage_journal_service.look_up(
+        ('party', party_id), lambda: party_service.find_party(party_id)
+    )
     if party is None:
         abort(400, 'Unknown party ID')
 
-    whereabouts = whereabouts_service.find_whereabouts_by_name(
-        party, req.whereabouts_name
+    whereabouts = whereabouts_outage_journal_service.look_up(
+        ('whereabouts', party.id, req.whereabouts_name),
+        lambda: whereabouts_service.find_whereabouts_by_name(
+            party, req.whereabouts_name
+        ),
     )
     if whereabouts is None:
         abort(400, 'Unknown whereabouts name for this party')
@@ -219,16 +396,361 @@ def set_status():
 
     source_address = _get_source_ip_address(request)
 
-    _, _, event = whereabouts_service.set_status(
-        g.client, user, whereabouts, source_address=source_address
-    )
+    if queued:
+        _, update, event = whereabouts_status_queue_service.enqueue_status(
+            g.client,
+            user,
+            whereabouts,
+            source_address=source_address,
+            update_id=req.update_id,
+            idempotency_key=idempotency_key,
+        )
+    else:
+        try:
+            _, update, event = whereabouts_service.set_status(
+                g.client,
+                user,
+                whereabouts,
+                source_address=source_address,
+                update_id=req.update_id,
+                idempotency_key=idempotency_key,
+            )
+        except DuplicateUpdateError:
+            return _create_replayed_response(accepted_async=False)
+
+    if is_idempotent:
+        whereabouts_idempotency_service.remember_update(
+            g.client.id,
+            update.id,
+            idempotency_key=idempotency_key,
+            accepted_async=queued,
+        )
 
     whereabouts_signals.whereabouts_status_updated.send(None, event=event)
 
+    if queued:
+        return _create_accepted_response()
+
+    return Response(status=204)
+
+
+@blueprint.post('/client_configs/<uuid:config_id>/clients')
+@api_token_required
+def assign_client_config(config_id):
+    """Assign the configuration to multiple clients at once.
+
+    Client candidates and deleted clients are skipped.
+    """
+    req = _parse_request(AssignClientConfigRequestModel)
+
+    config = whereabouts_client_service.find_client_config(
+        WhereaboutsClientConfigID(config_id)
+    )
+    if config is None:
+        abort(404, 'Unknown client config ID')
+
+    client_ids = [
+        WhereaboutsClientID(client_id) for client_id in req.client_ids
+    ]
+
+    assigned_count = whereabouts_client_service.assign_client_config(
+        client_ids, config
+    )
+
+    return jsonify({'assigned_count': assigned_count})
+
+
+@blueprint.get('/parties/<party_id>/statuses')
+@api_token_required
+def get_status_snapshot(party_id):
+    """Get a page of all user statuses at party, in compact form."""
+    party = party_service.find_party(party_id)
+    if party is None:
+        abort(404, 'Unknown party ID')
+
+    try:
+        req = StatusSnapshotRequestModel.model_validate(request.args.to_dict())
+    except ValidationError as e:
+        abort(400, e.json())
+
+    after = None
+    if req.after is not None:
+        after = _parse_status_snapshot_cursor(req.after)
+        if after is None:
+            abort(400, 'Invalid cursor')
+
+    page = whereabouts_service.get_status_snapshot_page(
+        party, req.limit, since=req.since, after=after
+    )
+
+    response = jsonify(_serialize_status_snapshot_page(page))
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@blueprint.get('/parties/<party_id>/users/<uuid:user_id>/updates')
+@api_token_required
+def get_updates_for_user(party_id, user_id):
+    """Get a page of the user's whereabouts updates at the party,
+    newest first.
+    """
+    party = party_service.find_party(party_id)
+    if party is None:
+        abort(404, 'Unknown party ID')
+
+    user = user_service.find_user(user_id)
+    if user is None:
+        abort(404, 'Unknown user ID')
+
+    try:
+        req = UserUpdatesRequestModel.model_validate(request.args.to_dict())
+    except ValidationError as e:
+        abort(400, e.json())
+
+    page = whereabouts_service.get_updates_for_user_page(
+        user, party, req.limit, after=req.after
+    )
+
+    whereabouts_by_id = {
+        whereabouts.id: whereabouts
+        for whereabouts in whereabouts_service.get_whereabouts_list(party)
+    }
+
+    return jsonify(
+        {
+            'updates': [
+                {
+                    'id': update.id,
+                    'whereabouts': {
+                        'id': update.whereabouts_id,
+                        'name': whereabouts_by_id[update.whereabouts_id].name,
+                    },
+                    'created_at': update.created_at.isoformat(),
+                    'client_id': update.client_id,
+                }
+                for update in page.updates
+            ],
+            'next_cursor': page.next_cursor,
+        }
+    )
+
+
+@blueprint.get('/parties/<party_id>/occupancies')
+@api_token_required
+def get_occupancies(party_id):
+    """Get the number of users at each of the party's whereabouts."""
+    party = party_service.find_party(party_id)
+    if party is None:
+        abort(404, 'Unknown party ID')
+
+    occupancies = whereabouts_occupancy_service.get_occupancies(party)
+
+    response = jsonify(
+        {
+            'whereabouts': [
+                {
+                    'id': occupancy.whereabouts_id,
+                    'name': occupancy.whereabouts_name,
+                    'count': occupancy.count,
+                }
+                for occupancy in occupancies
+            ],
+        }
+    )
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@blueprint.get('/parties/<party_id>/occupancies/history')
+@api_token_required
+def get_occupancy_history(party_id):
+    """Get the number of users at each of the party's whereabouts,
+    minute by minute, as rolled up from updates.
+    """
+    party = party_service.find_party(party_id)
+    if party is None:
+        abort(404, 'Unknown party ID')
+
+    try:
+        req = OccupancyHistoryRequestModel.model_validate(
+            request.args.to_dict()
+        )
+    except ValidationError as e:
+        abort(400, e.json())
+
+    if req.end < req.start:
+        abort(400, 'End must not be before start')
+
+    if (req.end - req.start) > OCCUPANCY_HISTORY_MAX_PERIOD:
+        abort(400, 'Period is too long')
+
+    histories = whereabouts_rollup_service.get_occupancy_history(
+        party, req.start, req.end
+    )
+
+    return jsonify(
+        {
+            'whereabouts': [
+                {
+                    'id': history.whereabouts.id,
+                    'name': history.whereabouts.name,
+                    'minutes': [
+                        [
+                            minute.minute.isoformat(),
+                            minute.occupancy,
+                            minute.arrivals,
+                            minute.departures,
+                        ]
+                        for minute in history.minutes
+                    ],
+                }
+                for history in histories
+            ],
+        }
+    )
+
+
+@blueprint.get('/parties/<party_id>/whereabouts/<whereabouts_name>/stays')
+@api_token_required
+def get_stays(party_id, whereabouts_name):
+    """Get the users who were at the whereabouts at any moment within a
+    time window, with the times they entered and left.
+    """
+    party = party_service.find_party(party_id)
+    if party is None:
+        abort(404, 'Unknown party ID')
+
+    whereabouts = whereabouts_service.find_whereabouts_by_name(
+        party, whereabouts_name
+    )
+    if whereabouts is None:
+        abort(404, 'Unknown whereabouts name')
+
+    try:
+        req = StaysRequestModel.model_validate(request.args.to_dict())
+    except ValidationError as e:
+        abort(400, e.json())
+
+    if req.end < req.start:
+        abort(400, 'End must not be before start')
+
+    stays = whereabouts_stay_service.get_stays(whereabouts, req.start, req.end)
+
+    return jsonify(
+        {
+            'stays': [
+                {
+                    'user': {
+                        'id': stay.user.id,
+                        'screen_name': stay.user.screen_name,
+                    },
+                    'entered_at': stay.entered_at.isoformat(),
+                    'left_at': (
+                        stay.left_at.isoformat() if stay.left_at else None
+                    ),
+                }
+                for stay in stays
+            ],
+        }
+    )
+
+
+def _serialize_status_snapshot_page(
+    page: WhereaboutsStatusSnapshotPage,
+) -> dict:
+    next_cursor = (
+        _format_status_snapshot_cursor(page.next_cursor)
+        if page.next_cursor
+        else None
+    )
+
+    return {
+        'users': [
+            {
+                'id': user.id,
+                'screen_name': user.screen_name,
+            }
+            for user in page.users
+        ],
+        'whereabouts': [
+            {
+                'id': whereabouts.id,
+                'name': whereabouts.name,
+                'description': whereabouts.description,
+            }
+            for whereabouts in page.whereabouts_list
+        ],
+        'statuses': [
+            [user_index, whereabouts_index, set_at.isoformat()]
+            for user_index, whereabouts_index, set_at in page.statuses
+        ],
+        'next_cursor': next_cursor,
+    }
+
+
+def _format_status_snapshot_cursor(
+    cursor: WhereaboutsStatusSnapshotCursor,
+) -> str:
+    return f'{cursor.set_at.isoformat()}_{cursor.user_id.hex}'
+
+
+def _parse_status_snapshot_cursor(
+    value: str,
+) -> WhereaboutsStatusSnapshotCursor | None:
+    set_at_str, _, user_id_str = value.partition('_')
+
+    try:
+        set_at = datetime.fromisoformat(set_at_str)
+        user_id = UserID(UUID(user_id_str))
+    except ValueError:
+        return None
+
+    return WhereaboutsStatusSnapshotCursor(set_at=set_at, user_id=user_id)
+
 
 # helpers
 
 
+def _parse_request(model_class: type[T]) -> T:
+    if not has_supported_content_type(request):
+        abort(415)
+
+    try:
+        data = get_request_data(request)
+    except RequestDecodingError as e:
+        abort(400, str(e))
+
+    try:
+        return model_class.model_validate(data)
+    except ValidationError as e:
+        abort(400, e.json())
+
+
+def _create_accepted_response() -> Response:
+    return Response(status=202, headers={'Preference-Applied': 'respond-async'})
+
+
+def _create_replayed_response(*, accepted_async: bool) -> Response:
+    if accepted_async:
+        response = _create_accepted_response()
+    else:
+        response = Response(status=204)
+
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _prefers_async_response(request: Request) -> bool:
+    """Return `True` if the client asked for an asynchronous response
+    (see RFC 7240).
+    """
+    return any(
+        token.split(';')[0].strip().lower() == 'respond-async'
+        for preference in request.headers.getlist('Prefer')
+        for token in preference.split(',')
+    )
+
+
 def _get_source_ip_address(request: Request) -> IPAddress | None:
     remote_addr = request.remote_addr
     return ip_address(remote_addr) if remote_addr else None
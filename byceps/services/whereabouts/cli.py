@@ -0,0 +1,462 @@
+"""
+byceps.services.whereabouts.cli
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Command line interface for maintenance tasks
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime, timedelta
+import time
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy.exc import OperationalError
+
+from byceps.services.party import party_service
+from byceps.services.party.models import Party
+
+from . import (
+    whereabouts_analytics_service,
+    whereabouts_archive_service,
+    whereabouts_benchmark_service,
+    whereabouts_client_service,
+    whereabouts_idempotency_service,
+    whereabouts_occupancy_service,
+    whereabouts_outage_journal_service,
+    whereabouts_rollup_service,
+    whereabouts_service,
+    whereabouts_status_queue_service,
+    whereabouts_stay_service,
+)
+
+
+whereabouts_cli = AppGroup('whereabouts', help='Maintain whereabouts data.')
+
+
+@whereabouts_cli.command('purge-client-candidates')
+@click.option(
+    '--max-age-hours',
+    type=click.IntRange(min=1),
+    default=24,
+    show_default=True,
+    help='Delete candidates pending for longer than this.',
+)
+def purge_client_candidates(max_age_hours: int) -> None:
+    """Delete client candidates that have not been approved in time."""
+    max_age = timedelta(hours=max_age_hours)
+
+    deleted_count = whereabouts_client_service.purge_stale_client_candidates(
+        max_age
+    )
+
+    click.secho(f'Deleted {deleted_count} client candidate(s).', fg='green')
+
+
+@whereabouts_cli.command('purge-idempotency-keys')
+@click.option(
+    '--max-age-hours',
+    type=click.IntRange(min=1),
+    default=24,
+    show_default=True,
+    help='Delete keys recorded longer ago than this.',
+)
+def purge_idempotency_keys(max_age_hours: int) -> None:
+    """Delete idempotency keys of status updates that are too old to be
+    retried.
+    """
+    max_age = timedelta(hours=max_age_hours)
+
+    deleted_count = whereabouts_idempotency_service.purge_idempotency_keys(
+        max_age
+    )
+
+    click.secho(f'Deleted {deleted_count} idempotency key(s).', fg='green')
+
+
+@whereabouts_cli.command('backfill-client-config-hashes')
+def backfill_client_config_hashes() -> None:
+    """Compute the missing or outdated content hashes of client
+    configurations.
+    """
+    count = whereabouts_client_service.backfill_client_config_content_hashes()
+
+    click.secho(f'Updated {count} client configuration(s).', fg='green')
+
+
+@whereabouts_cli.command('rebuild-occupancies')
+@click.argument('party_id')
+def rebuild_occupancies(party_id: str) -> None:
+    """Recompute the party's occupancy counts from the users' statuses."""
+    party = _get_party(party_id)
+
+    whereabouts_occupancy_service.rebuild_occupancies(party)
+
+    click.secho('Done.', fg='green')
+
+
+@whereabouts_cli.command('rebuild-statuses')
+@click.argument('party_id')
+@click.option(
+    '--dry-run',
+    is_flag=True,
+    help='Only report differences, do not change anything.',
+)
+def rebuild_statuses(party_id: str, dry_run: bool) -> None:
+    """Recompute the current statuses of the party's users from the
+    updates, then recompute the occupancy counts.
+    """
+    party = _get_party(party_id)
+
+    diff = whereabouts_service.rebuild_statuses(party, dry_run=dry_run)
+
+    for label, rows in [('added', diff.added), ('changed', diff.changed)]:
+        for user_id, whereabouts_id, set_at in rows:
+            click.echo(
+                f'{label}\t{user_id}\t{whereabouts_id}\t{set_at.isoformat()}'
+            )
+    for user_id in diff.removed:
+        click.echo(f'removed\t{user_id}')
+
+    click.echo(
+        f'{len(diff.added)} added, {len(diff.changed)} changed, '
+        f'{len(diff.removed)} removed, {diff.unchanged_count} unchanged.'
+    )
+
+    if dry_run:
+        click.secho('Dry run, nothing has been changed.', fg='yellow')
+    else:
+        click.secho('Done.', fg='green')
+
+
+@whereabouts_cli.command('rebuild-stays')
+@click.argument('party_id')
+def rebuild_stays(party_id: str) -> None:
+    """Recompute the party's stays from the updates."""
+    party = _get_party(party_id)
+
+    try:
+        count = whereabouts_stay_service.rebuild_stays(party)
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+
+    click.secho(f'Done. {count} stay(s).', fg='green')
+
+
+@whereabouts_cli.command('update-rollups')
+@click.argument('party_ids', nargs=-1)
+def update_rollups(party_ids: tuple[str, ...]) -> None:
+    """Roll up new updates (of the given or all parties)."""
+    if not party_ids:
+        party_ids = tuple(sorted(whereabouts_rollup_service.get_party_ids()))
+
+    for party_id in party_ids:
+        party = _get_party(party_id)
+        count = whereabouts_rollup_service.update_rollups(party.id)
+        click.echo(f'{party.id}: rolled up {count} update(s).')
+
+
+@whereabouts_cli.command('backfill-rollups')
+@click.argument('party_id')
+def backfill_rollups(party_id: str) -> None:
+    """Roll up all of the party's updates anew."""
+    party = _get_party(party_id)
+
+    try:
+        count = whereabouts_rollup_service.backfill_rollups(party.id)
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+
+    click.secho(f'Rolled up {count} update(s).', fg='green')
+
+
+@whereabouts_cli.command('dwell-times')
+@click.argument('party_id')
+def dwell_times(party_id: str) -> None:
+    """Show how long users stay at the party's whereabouts."""
+    party = _get_party(party_id)
+
+    if not whereabouts_analytics_service.is_available():
+        raise click.ClickException('NumPy is not installed.')
+
+    whereabouts_stats, user_party_times = (
+        whereabouts_analytics_service.get_dwell_time_stats(party)
+    )
+
+    click.echo('whereabouts\tstays\tmedian\tp90')
+    for stats in whereabouts_stats:
+        click.echo(
+            f'{stats.whereabouts.name}\t{stats.stay_count}\t'
+            f'{_format_seconds(stats.median_seconds)}\t'
+            f'{_format_seconds(stats.p90_seconds)}'
+        )
+
+    click.echo()
+
+    click.echo('user\ttime at party')
+    for user_party_time in user_party_times:
+        click.echo(
+            f'{user_party_time.user.screen_name}\t'
+            f'{_format_seconds(user_party_time.seconds)}'
+        )
+
+
+@whereabouts_cli.command('anonymize-source-addresses')
+@click.argument('party_ids', nargs=-1)
+@click.option(
+    '--retention-days',
+    type=int,
+    default=30,
+    show_default=True,
+    help='Keep addresses this long after a party has ended.',
+)
+@click.option(
+    '--truncate',
+    is_flag=True,
+    help='Truncate addresses to /24 (IPv4) or /48 (IPv6) instead of '
+    'removing them.',
+)
+def anonymize_source_addresses(
+    party_ids: tuple[str, ...], retention_days: int, truncate: bool
+) -> None:
+    """Remove the source addresses of updates of the given (or all)
+    parties that have ended longer ago than the retention period.
+    """
+    if not party_ids:
+        party_ids = tuple(sorted(whereabouts_rollup_service.get_party_ids()))
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+
+    for party_id in party_ids:
+        party = _get_party(party_id)
+
+        if party.ends_at > cutoff:
+            continue
+
+        count = whereabouts_service.anonymize_source_addresses(
+            party, truncate=truncate
+        )
+        click.echo(f'{party.id}: anonymized {count} update(s).')
+
+
+@whereabouts_cli.command('archive-updates')
+@click.argument('party_id')
+@click.option(
+    '--drop-source-addresses',
+    is_flag=True,
+    help='Do not keep the source IP addresses of updates.',
+)
+@click.option('--batch-size', type=int, default=10_000, show_default=True)
+def archive_updates(
+    party_id: str, drop_source_addresses: bool, batch_size: int
+) -> None:
+    """Move the finished party's updates into a compressed archive
+    file.
+    """
+    party = _get_party(party_id)
+
+    if not whereabouts_archive_service.is_configured():
+        raise click.ClickException('No archive path configured.')
+
+    if party.ends_at > datetime.utcnow():
+        raise click.ClickException('Party has not finished yet.')
+
+    # Rollups are only computed from archived updates when they are
+    # rebuilt, so include all updates before archiving them.
+    whereabouts_rollup_service.update_rollups(party.id)
+
+    count = whereabouts_archive_service.archive_updates(
+        party,
+        drop_source_addresses=drop_source_addresses,
+        batch_size=batch_size,
+    )
+
+    click.secho(f'Done. Archived {count} update(s).', fg='green')
+
+
+@whereabouts_cli.command('restore-archived-updates')
+@click.argument('party_id')
+def restore_archived_updates(party_id: str) -> None:
+    """Move the party's archived updates back into the database."""
+    party = _get_party(party_id)
+
+    if not whereabouts_archive_service.is_configured():
+        raise click.ClickException('No archive path configured.')
+
+    count = whereabouts_archive_service.restore_updates(party)
+
+    click.secho(f'Done. Restored {count} update(s).', fg='green')
+
+
+@whereabouts_cli.command('benchmark-update-inserts')
+@click.argument('party_id')
+@click.option('--count', type=int, default=10_000, show_default=True)
+def benchmark_update_inserts(party_id: str, count: int) -> None:
+    """Compare inserting updates one by one with streaming them via
+    `COPY`. Nothing is persisted.
+    """
+    party = _get_party(party_id)
+
+    try:
+        seconds_by_method = (
+            whereabouts_benchmark_service.benchmark_update_inserts(party, count)
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+
+    for method, seconds in seconds_by_method.items():
+        click.echo(
+            f'{method:>4}: {seconds:8.3f} s, {count / seconds:10,.0f} updates/s'
+        )
+
+
+@whereabouts_cli.command('benchmark-status-announcements')
+@click.argument('party_id')
+@click.option('--count', type=int, default=1_000, show_default=True)
+def benchmark_status_announcements(party_id: str, count: int) -> None:
+    """Measure how fast a burst of status updates is announced to the
+    enabled webhooks, with and without sharing announcements across
+    webhooks. Nothing is sent.
+    """
+    party = _get_party(party_id)
+
+    try:
+        seconds_by_mode = (
+            whereabouts_benchmark_service.benchmark_status_announcements(
+                party, count
+            )
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+
+    for mode, seconds in seconds_by_mode.items():
+        click.echo(
+            f'{mode:>8}: {seconds:8.3f} s, {count / seconds:10,.0f} events/s'
+        )
+
+
+@whereabouts_cli.command('create-update-partitions')
+@click.argument('party_ids', nargs=-1)
+def create_update_partitions(party_ids: tuple[str, ...]) -> None:
+    """Create partitions for the updates of the given (or all) parties,
+    moving their updates out of the default partition.
+    """
+    if not party_ids:
+        party_ids = tuple(sorted(whereabouts_rollup_service.get_party_ids()))
+
+    for party_id in party_ids:
+        party = _get_party(party_id)
+        whereabouts_service.create_update_partition(party)
+        click.echo(f'{party.id}: partition ready.')
+
+
+@whereabouts_cli.command('drop-updates')
+@click.argument('party_id')
+@click.confirmation_option(
+    prompt="This deletes all of the party's updates. Continue?"
+)
+def drop_updates(party_id: str) -> None:
+    """Delete the party's updates by dropping its partition."""
+    party = _get_party(party_id)
+
+    if not whereabouts_service.drop_updates(party):
+        raise click.ClickException('Party has no partition of its own.')
+
+    click.secho('Done.', fg='green')
+
+
+@whereabouts_cli.command('drain-status-queue')
+@click.option(
+    '--batch-size',
+    type=int,
+    default=whereabouts_status_queue_service.DRAIN_BATCH_SIZE,
+    show_default=True,
+)
+@click.option(
+    '--interval',
+    type=float,
+    default=1.0,
+    show_default=True,
+    help='Seconds to wait between drain runs.',
+)
+@click.option('--once', is_flag=True, help='Drain once, then exit.')
+def drain_status_queue(batch_size: int, interval: float, once: bool) -> None:
+    """Persist queued status updates, continuously (unless `--once` is
+    given).
+    """
+    if not whereabouts_status_queue_service.is_enabled():
+        raise click.ClickException('No status queue path configured.')
+
+    while True:
+        try:
+            count = whereabouts_status_queue_service.drain(
+                batch_size=batch_size
+            )
+        except OperationalError as e:
+            click.echo(f'Database unavailable: {e.orig}', err=True)
+            count = 0
+
+        if count is None:
+            click.echo('Queue is being drained by another process.', err=True)
+        elif count or once:
+            click.echo(f'Persisted {count} update(s).')
+
+        if once:
+            break
+
+        time.sleep(interval)
+
+
+@whereabouts_cli.command('replay-outage-journal')
+@click.option('--batch-size', type=int, default=500, show_default=True)
+@click.option(
+    '--interval',
+    type=float,
+    default=5.0,
+    show_default=True,
+    help='Seconds to wait before retrying while the database is down.',
+)
+def replay_outage_journal(batch_size: int, interval: float) -> None:
+    """Persist status updates that were journaled while the database was
+    unavailable, retrying until it is available again.
+    """
+    if not whereabouts_outage_journal_service.is_enabled():
+        raise click.ClickException('No outage journal path configured.')
+
+    while True:
+        try:
+            count = whereabouts_service.replay_outage_journal(
+                batch_size=batch_size
+            )
+        except OperationalError as e:
+            click.echo(f'Database unavailable: {e.orig}', err=True)
+            time.sleep(interval)
+            continue
+
+        if count is None:
+            raise click.ClickException(
+                'Journal is being replayed by another process.'
+            )
+
+        click.secho(f'Done. Persisted {count} update(s).', fg='green')
+        break
+
+
+def _format_seconds(seconds: int | None) -> str:
+    if seconds is None:
+        return '-'
+
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}'
+
+
+def _get_party(party_id: str) -> Party:
+    party = party_service.find_party(party_id)
+
+    if party is None:
+        raise click.BadParameter(f'Unknown party ID "{party_id}"')
+
+    return party
@@ -18,6 +18,7 @@ if TYPE_CHECKING:
 else:
     from sqlalchemy.ext.hybrid import hybrid_property
 
+from sqlalchemy import DDL, event
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -45,6 +46,7 @@ class DbWhereaboutsClientConfig(db.Model):
     title: Mapped[str] = mapped_column(db.UnicodeText)
     description: Mapped[str | None] = mapped_column(db.UnicodeText)
     content: Mapped[str] = mapped_column(db.UnicodeText)
+    content_hash: Mapped[str] = mapped_column(db.UnicodeText)
 
     def __init__(
         self,
@@ -52,11 +54,13 @@ class DbWhereaboutsClientConfig(db.Model):
         title: str,
         description: str | None,
         content: str,
+        content_hash: str,
     ) -> None:
         self.id = config_id
         self.title = title
         self.description = description
         self.content = content
+        self.content_hash = content_hash
 
 
 class DbWhereaboutsClient(db.Model):
@@ -178,6 +182,9 @@ class DbWhereaboutsStatus(db.Model):
     """A user's most recent whereabouts."""
 
     __tablename__ = 'whereabouts_statuses'
+    __table_args__ = (
+        db.Index('ix_whereabouts_statuses_set_at_user_id', 'set_at', 'user_id'),
+    )
 
     user_id: Mapped[UserID] = mapped_column(
         db.Uuid, db.ForeignKey('users.id'), primary_key=True, index=True
@@ -196,34 +203,63 @@ class DbWhereaboutsStatus(db.Model):
 
 
 class DbWhereaboutsUpdate(db.Model):
-    """An update on a user's whereabouts."""
+    """An update on a user's whereabouts.
+
+    The table is list-partitioned by party. Updates of parties without a
+    partition of their own end up in the default partition.
+    """
 
     __tablename__ = 'whereabouts_updates'
+    __table_args__ = (
+        db.Index(
+            'ix_whereabouts_updates_user_id_created_at',
+            'user_id',
+            'created_at',
+        ),
+        # Serves the per-client activity charts and update lists, which
+        # filter by client and order (or bucket) by time.
+        db.Index(
+            'ix_whereabouts_updates_client_id_created_at',
+            'client_id',
+            'created_at',
+        ),
+        {'postgresql_partition_by': 'LIST (party_id)'},
+    )
 
     id: Mapped[UUID] = mapped_column(db.Uuid, primary_key=True)
-    user_id: Mapped[UserID] = mapped_column(
-        db.Uuid, db.ForeignKey('users.id'), index=True
+    party_id: Mapped[PartyID] = mapped_column(
+        db.UnicodeText, db.ForeignKey('parties.id'), primary_key=True
     )
+    user_id: Mapped[UserID] = mapped_column(db.Uuid, db.ForeignKey('users.id'))
     whereabouts_id: Mapped[WhereaboutsID] = mapped_column(
         db.Uuid, db.ForeignKey('whereabouts.id')
     )
     created_at: Mapped[datetime]
+    client_id: Mapped[WhereaboutsClientID | None] = mapped_column(
+        db.Uuid, db.ForeignKey('whereabouts_clients.id')
+    )
+    # Deferred, as most read paths do not need it. Undefer explicitly
+    # where it is needed.
     _source_address: Mapped[str | None] = mapped_column(  # noqa: UP007
-        'source_address', postgresql.INET
+        'source_address', postgresql.INET, deferred=True
     )
 
     def __init__(
         self,
         update_id: UUID,
+        party_id: PartyID,
         user_id: UserID,
         whereabouts_id: WhereaboutsID,
         created_at: datetime,
+        client_id: WhereaboutsClientID | None,
         source_address: IPAddress | None,
     ) -> None:
         self.id = update_id
+        self.party_id = party_id
         self.user_id = user_id
         self.whereabouts_id = whereabouts_id
         self.created_at = created_at
+        self.client_id = client_id
         self.source_address = source_address
 
     @hybrid_property
@@ -236,3 +272,128 @@ class DbWhereaboutsUpdate(db.Model):
     @source_address.setter
     def source_address(self, source_address: IPAddress | None) -> None:
         self._source_address = str(source_address) if source_address else None
+
+
+event.listen(
+    DbWhereaboutsUpdate.__table__,
+    'after_create',
+    DDL(
+        'CREATE TABLE whereabouts_updates_default '
+        'PARTITION OF whereabouts_updates DEFAULT'
+    ),
+)
+
+
+class DbWhereaboutsIdempotencyKey(db.Model):
+    """An idempotency key a client has sent along with a status update,
+    to recognize retries of the same request.
+    """
+
+    __tablename__ = 'whereabouts_idempotency_keys'
+
+    client_id: Mapped[WhereaboutsClientID] = mapped_column(
+        db.Uuid, db.ForeignKey('whereabouts_clients.id'), primary_key=True
+    )
+    key: Mapped[str] = mapped_column(db.UnicodeText, primary_key=True)
+    update_id: Mapped[UUID] = mapped_column(db.Uuid)
+    created_at: Mapped[datetime] = mapped_column(index=True)
+
+
+class DbWhereaboutsOccupancy(db.Model):
+    """The number of users whose current status is at whereabouts."""
+
+    __tablename__ = 'whereabouts_occupancies'
+
+    whereabouts_id: Mapped[WhereaboutsID] = mapped_column(
+        db.Uuid, db.ForeignKey('whereabouts.id'), primary_key=True
+    )
+    party_id: Mapped[PartyID] = mapped_column(
+        db.UnicodeText, db.ForeignKey('parties.id'), index=True
+    )
+    count: Mapped[int]
+
+    def __init__(
+        self, whereabouts_id: WhereaboutsID, party_id: PartyID, count: int
+    ) -> None:
+        self.whereabouts_id = whereabouts_id
+        self.party_id = party_id
+        self.count = count
+
+
+class DbWhereaboutsTransitionRollup(db.Model):
+    """The number of users arriving at and departing from whereabouts
+    within a minute.
+    """
+
+    __tablename__ = 'whereabouts_transition_rollups'
+
+    whereabouts_id: Mapped[WhereaboutsID] = mapped_column(
+        db.Uuid, db.ForeignKey('whereabouts.id'), primary_key=True
+    )
+    minute: Mapped[datetime] = mapped_column(primary_key=True)
+    party_id: Mapped[PartyID] = mapped_column(
+        db.UnicodeText, db.ForeignKey('parties.id'), index=True
+    )
+    arrivals: Mapped[int]
+    departures: Mapped[int]
+
+
+class DbWhereaboutsRollupCursor(db.Model):
+    """The most recent update included in a party's rollups."""
+
+    __tablename__ = 'whereabouts_rollup_cursors'
+
+    party_id: Mapped[PartyID] = mapped_column(
+        db.UnicodeText, db.ForeignKey('parties.id'), primary_key=True
+    )
+    last_update_id: Mapped[UUID] = mapped_column(db.Uuid)
+
+
+class DbWhereaboutsStay(db.Model):
+    """A user's continuous stay at whereabouts, derived from
+    consecutive updates.
+
+    A stay begins with the update that moved the user there, and ends
+    (`left_at`) with the update that moved them elsewhere. The stay is
+    open (without end) as long as the user is still there.
+    """
+
+    __tablename__ = 'whereabouts_stays'
+    __table_args__ = (
+        db.Index(
+            'ix_whereabouts_stays_whereabouts_id_entered_at',
+            'whereabouts_id',
+            'entered_at',
+        ),
+        db.Index(
+            'ix_whereabouts_stays_user_id_open',
+            'user_id',
+            unique=True,
+            postgresql_where=db.text('left_at IS NULL'),
+        ),
+    )
+
+    id: Mapped[UUID] = mapped_column(db.Uuid, primary_key=True)
+    party_id: Mapped[PartyID] = mapped_column(
+        db.UnicodeText, db.ForeignKey('parties.id'), index=True
+    )
+    whereabouts_id: Mapped[WhereaboutsID] = mapped_column(
+        db.Uuid, db.ForeignKey('whereabouts.id')
+    )
+    user_id: Mapped[UserID] = mapped_column(db.Uuid, db.ForeignKey('users.id'))
+    entered_at: Mapped[datetime]
+    left_at: Mapped[datetime | None]
+
+    def __init__(
+        self,
+        stay_id: UUID,
+        party_id: PartyID,
+        whereabouts_id: WhereaboutsID,
+        user_id: UserID,
+        entered_at: datetime,
+    ) -> None:
+        self.id = stay_id
+        self.party_id = party_id
+        self.whereabouts_id = whereabouts_id
+        self.user_id = user_id
+        self.entered_at = entered_at
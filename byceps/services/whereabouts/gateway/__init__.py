@@ -0,0 +1,9 @@
+"""
+byceps.services.whereabouts.gateway
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Optional asynchronous (ASGI) gateway for the client API.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
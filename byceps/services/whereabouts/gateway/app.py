@@ -0,0 +1,562 @@
+"""
+byceps.services.whereabouts.gateway.app
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+ASGI application that serves the client API's frequently called
+endpoints natively on an asynchronous database connection pool, and
+passes all other requests on to the wrapped (WSGI) BYCEPS application.
+
+Clients keep their connections open between requests. Handling them on
+an event loop instead of in WSGI worker threads lets a single process
+hold thousands of mostly idle connections while using only a few
+database connections.
+
+Status updates are passed on as well: the wrapped application's
+endpoint handles idempotency keys, client-chosen update IDs, the status
+queue, and the outage journal.
+
+Client event streams are served natively, too, fed by a single Redis
+subscription per process, so that open streams occupy neither threads
+nor Redis connections.
+
+Domain logic is shared with the synchronous API. Calls into BYCEPS
+services outside of this extension (users, parties, identity tags,
+signal handlers) are run in a thread pool, within an application
+context of the wrapped application.
+
+Requires `starlette` and `asyncpg`.
+
+Requests passed on to the wrapped application and service calls run
+in the same thread pool. Its size is set via
+`WHEREABOUTS_GATEWAY_THREAD_LIMIT`.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Mapping
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime
+from ipaddress import ip_address
+import time
+from typing import Any
+
+import anyio
+from flask import Flask
+from redis.asyncio import Redis
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    async_sessionmaker,
+    AsyncEngine,
+    create_async_engine,
+)
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+import structlog
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from byceps.services.authn.identity_tag import authn_identity_tag_service
+from byceps.services.authn.identity_tag.models import UserIdentityTag
+from byceps.services.party import party_service
+from byceps.services.party.models import Party, PartyID
+from byceps.services.user import user_service
+from byceps.services.user.models.user import User, UserID
+
+from .. import (
+    signals as whereabouts_signals,
+    whereabouts_client_domain_service,
+    whereabouts_sound_service,
+)
+from ..blueprints.api import encoding
+from ..dbmodels import DbWhereaboutsClient
+from ..events import WhereaboutsUnknownTagDetectedEvent
+from ..models import (
+    IPAddress,
+    WhereaboutsClient,
+    WhereaboutsClientID,
+    WhereaboutsUserSound,
+)
+from ..whereabouts_client_notification_service import (
+    EVENT_CLIENT_DELETED,
+    format_server_sent_event,
+    HEARTBEAT_INTERVAL,
+    RECONNECTION_DELAY,
+)
+from . import repository as gateway_repository
+from .notifications import NotificationDispatcher
+
+
+log = structlog.get_logger()
+
+
+# Path of the client API in the wrapped application
+URL_PREFIX = '/v1/whereabouts'
+
+
+DEFAULT_DB_POOL_SIZE = 10
+DEFAULT_DB_MAX_OVERFLOW = 10
+
+
+# AnyIO's default for its (default) thread pool
+DEFAULT_THREAD_LIMIT = 40
+
+
+def create_gateway(flask_app: Flask) -> Starlette:
+    """Create the gateway in front of the BYCEPS (API) application."""
+    engine = _create_db_engine(flask_app.config)
+
+    if flask_app.config.get('WHEREABOUTS_CLIENT_NOTIFICATIONS_ENABLED'):
+        redis_client = Redis.from_url(flask_app.config['REDIS_URL'])
+        notification_dispatcher = NotificationDispatcher(redis_client)
+    else:
+        redis_client = None
+        notification_dispatcher = None
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        thread_limiter = anyio.to_thread.current_default_thread_limiter()
+        thread_limiter.total_tokens = flask_app.config.get(
+            'WHEREABOUTS_GATEWAY_THREAD_LIMIT', DEFAULT_THREAD_LIMIT
+        )
+
+        dispatcher_task = (
+            asyncio.create_task(notification_dispatcher.run())
+            if (notification_dispatcher is not None)
+            else None
+        )
+
+        yield
+
+        if dispatcher_task is not None:
+            dispatcher_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await dispatcher_task
+
+        if redis_client is not None:
+            await redis_client.aclose()
+
+        await engine.dispose()
+
+    routes = [
+        Route(
+            f'{URL_PREFIX}/client/registration_status/{{client_id:uuid}}',
+            get_client_registration_status,
+            methods=['GET'],
+        ),
+        Route(f'{URL_PREFIX}/client/sign_on', sign_on_client, methods=['POST']),
+        Route(
+            f'{URL_PREFIX}/client/sign_off', sign_off_client, methods=['POST']
+        ),
+        Route(
+            f'{URL_PREFIX}/client/events',
+            stream_client_events,
+            methods=['GET'],
+        ),
+        Route(f'{URL_PREFIX}/tags/{{identifier}}', get_tag, methods=['GET']),
+        Route(
+            f'{URL_PREFIX}/statuses/{{user_id:uuid}}/{{party_id}}',
+            get_status,
+            methods=['GET'],
+        ),
+        # everything else, including client registration and status
+        # updates
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ]
+
+    app = Starlette(routes=routes, lifespan=lifespan)
+    app.state.flask_app = flask_app
+    app.state.session_factory = async_sessionmaker(
+        engine, expire_on_commit=False
+    )
+    app.state.notification_dispatcher = notification_dispatcher
+
+    return app
+
+
+def _create_db_engine(config: Mapping[str, Any]) -> AsyncEngine:
+    url = make_url(config['SQLALCHEMY_DATABASE_URI']).set(
+        drivername='postgresql+asyncpg'
+    )
+
+    return create_async_engine(
+        url,
+        pool_size=config.get(
+            'WHEREABOUTS_GATEWAY_DB_POOL_SIZE', DEFAULT_DB_POOL_SIZE
+        ),
+        max_overflow=config.get(
+            'WHEREABOUTS_GATEWAY_DB_MAX_OVERFLOW', DEFAULT_DB_MAX_OVERFLOW
+        ),
+        pool_pre_ping=True,
+    )
+
+
+# -------------------------------------------------------------------- #
+# endpoints
+
+
+async def get_client_registration_status(request: Request) -> Response:
+    """Get a client's registration status."""
+    client_id = request.path_params['client_id']
+
+    async with request.app.state.session_factory() as session:
+        db_client = await gateway_repository.find_client(session, client_id)
+
+    if db_client is None:
+        raise HTTPException(404)
+
+    client = _db_entity_to_client(db_client)
+
+    if client.pending:
+        response_data = {'status': 'pending'}
+    elif client.approved:
+        response_data = {'status': 'approved'}
+    else:
+        response_data = {'status': 'rejected'}
+
+    return _create_response(request, response_data)
+
+
+async def sign_on_client(request: Request) -> Response:
+    """Sign on a client."""
+    client = await _authenticate_client(request)
+
+    event = whereabouts_client_domain_service.sign_on_client(client)
+
+    async with request.app.state.session_factory() as session:
+        await gateway_repository.update_liveliness_status(
+            session, client.id, True, event.occurred_at
+        )
+
+    log.info(
+        'Whereabouts client signed on',
+        id=str(client.id),
+        source_address=str(_get_source_ip_address(request)),
+    )
+
+    await _call_in_app_context(
+        request,
+        whereabouts_signals.whereabouts_client_signed_on.send,
+        None,
+        event=event,
+    )
+
+    return Response(status_code=204)
+
+
+async def sign_off_client(request: Request) -> Response:
+    """Sign off a client."""
+    client = await _authenticate_client(request)
+
+    event = whereabouts_client_domain_service.sign_off_client(client)
+
+    async with request.app.state.session_factory() as session:
+        await gateway_repository.update_liveliness_status(
+            session, client.id, False, event.occurred_at
+        )
+
+    log.info(
+        'Whereabouts client signed off',
+        id=str(client.id),
+        source_address=str(_get_source_ip_address(request)),
+    )
+
+    await _call_in_app_context(
+        request,
+        whereabouts_signals.whereabouts_client_signed_off.send,
+        None,
+        event=event,
+    )
+
+    return Response(status_code=204)
+
+
+async def stream_client_events(request: Request) -> Response:
+    """Stream notifications to the client as server-sent events."""
+    client = await _authenticate_client(request)
+
+    notification_dispatcher = request.app.state.notification_dispatcher
+    if notification_dispatcher is None:
+        raise HTTPException(404)
+
+    events = _stream_notifications(request, notification_dispatcher, client.id)
+
+    return StreamingResponse(
+        events,
+        media_type='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Keep reverse proxies (nginx) from buffering the stream.
+            'X-Accel-Buffering': 'no',
+        },
+    )
+
+
+async def _stream_notifications(
+    request: Request,
+    notification_dispatcher: NotificationDispatcher,
+    client_id: WhereaboutsClientID,
+) -> AsyncIterator[str]:
+    """Yield the notifications concerning the client as server-sent
+    events, interspersed with heartbeats, until the client disconnects
+    or has been deleted.
+
+    Mirrors `whereabouts_client_notification_service.stream_notifications`.
+    """
+    with notification_dispatcher.subscribe(client_id) as queue:
+        await _keep_client_alive(request, client_id)
+        yield f'retry: {RECONNECTION_DELAY}\n\n'
+
+        last_heartbeat_at = time.monotonic()
+
+        while True:
+            timeout = max(
+                HEARTBEAT_INTERVAL - (time.monotonic() - last_heartbeat_at),
+                0,
+            )
+            try:
+                notification = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                notification = None
+
+            if notification is not None:
+                yield format_server_sent_event(
+                    notification.event, notification.data
+                )
+
+                if notification.event == EVENT_CLIENT_DELETED:
+                    return
+
+            if time.monotonic() - last_heartbeat_at >= HEARTBEAT_INTERVAL:
+                await _keep_client_alive(request, client_id)
+                yield ': heartbeat\n\n'
+                last_heartbeat_at = time.monotonic()
+
+
+async def _keep_client_alive(
+    request: Request, client_id: WhereaboutsClientID
+) -> None:
+    async with request.app.state.session_factory() as session:
+        await gateway_repository.update_liveliness_status(
+            session, client_id, True, datetime.utcnow()
+        )
+
+
+async def get_tag(request: Request) -> Response:
+    """Get details for tag."""
+    client = await _authenticate_client(request)
+
+    identifier = request.path_params['identifier']
+
+    identity_tag, user_sound = await _call_in_app_context(
+        request, _find_tag_and_sound, identifier
+    )
+    if identity_tag is None:
+        event = WhereaboutsUnknownTagDetectedEvent(
+            occurred_at=datetime.utcnow(),
+            initiator=None,
+            client_id=client.id,
+            client_location=client.location,
+            tag_identifier=identifier,
+        )
+        await _call_in_app_context(
+            request,
+            whereabouts_signals.whereabouts_unknown_tag_detected.send,
+            None,
+            event=event,
+        )
+
+        return _create_response(request, {}, 404)
+
+    return _create_response(
+        request,
+        {
+            'identifier': identity_tag.identifier,
+            'user': {
+                'id': identity_tag.user.id,
+                'screen_name': identity_tag.user.screen_name,
+                'avatar_url': identity_tag.user.avatar_url,
+            },
+            'sound_name': user_sound.name if user_sound else None,
+        },
+    )
+
+
+async def get_status(request: Request) -> Response:
+    """Get user's status at party."""
+    await _authenticate_client(request)
+
+    user_id = UserID(request.path_params['user_id'])
+    party_id = PartyID(request.path_params['party_id'])
+
+    user, party = await _call_in_app_context(
+        request, _find_user_and_party, user_id, party_id
+    )
+    if user is None:
+        raise HTTPException(404, 'Unknown user ID')
+    if party is None:
+        raise HTTPException(404, 'Unknown party ID')
+
+    async with request.app.state.session_factory() as session:
+        row = await gateway_repository.find_status_with_whereabouts(
+            session, user.id, party.id
+        )
+
+    if row is None:
+        return _create_response(request, {}, 404)
+
+    db_status, db_whereabouts = row
+
+    return _create_response(
+        request,
+        {
+            'user': {
+                'id': user.id,
+                'screen_name': user.screen_name,
+                'avatar_url': user.avatar_url,
+            },
+            'whereabouts': {
+                'id': db_whereabouts.id,
+                'name': db_whereabouts.name,
+                'description': db_whereabouts.description,
+            },
+            'set_at': db_status.set_at.isoformat(),
+        },
+    )
+
+
+# -------------------------------------------------------------------- #
+# synchronous service calls
+
+
+async def _call_in_app_context(
+    request: Request, func: Callable[..., Any], *args: Any, **kwargs: Any
+) -> Any:
+    """Call the (blocking) function in a worker thread, within an
+    application context of the wrapped application.
+    """
+    flask_app = request.app.state.flask_app
+
+    def call() -> Any:
+        with flask_app.app_context():
+            return func(*args, **kwargs)
+
+    return await run_in_threadpool(call)
+
+
+def _find_tag_and_sound(
+    identifier: str,
+) -> tuple[UserIdentityTag | None, WhereaboutsUserSound | None]:
+    identity_tag = authn_identity_tag_service.find_tag_by_identifier(identifier)
+    if identity_tag is None:
+        return None, None
+
+    user_sound = whereabouts_sound_service.find_sound_for_user(
+        identity_tag.user.id
+    )
+
+    return identity_tag, user_sound
+
+
+def _find_user_and_party(
+    user_id: UserID, party_id: PartyID
+) -> tuple[User | None, Party | None]:
+    user = user_service.find_user(user_id)
+    party = party_service.find_party(party_id)
+    return user, party
+
+
+# -------------------------------------------------------------------- #
+# helpers
+
+
+async def _authenticate_client(request: Request) -> WhereaboutsClient:
+    """Return the approved client the request is authenticated as.
+
+    Mirrors the API blueprint's `client_token_required` decorator.
+    """
+    client_token = _get_bearer_token(request)
+
+    db_client = None
+    if client_token is not None:
+        async with request.app.state.session_factory() as session:
+            db_client = await gateway_repository.find_client_by_token(
+                session, client_token
+            )
+
+    if db_client is None:
+        raise HTTPException(401, headers={'WWW-Authenticate': 'Bearer'})
+
+    client = _db_entity_to_client(db_client)
+
+    if not client.approved:
+        raise HTTPException(
+            401,
+            headers={'WWW-Authenticate': 'Bearer error="invalid_client_token"'},
+        )
+
+    return client
+
+
+def _get_bearer_token(request: Request) -> str | None:
+    authorization = request.headers.get('authorization')
+    if not authorization:
+        return None
+
+    auth_type, _, token = authorization.partition(' ')
+    if auth_type.lower() != 'bearer':
+        return None
+
+    token = token.strip()
+    if not token:
+        return None
+
+    return token
+
+
+def _create_response(
+    request: Request, data: Any, status: int = 200
+) -> Response:
+    """Encode the data in the media type preferred by the client."""
+    accept = parse_accept_header(request.headers.get('accept'), MIMEAccept)
+    media_type = encoding.select_response_media_type(accept)
+
+    return Response(
+        encoding.encode_data(media_type, data),
+        status_code=status,
+        media_type=media_type,
+        headers={'Vary': 'Accept'},
+    )
+
+
+def _get_source_ip_address(request: Request) -> IPAddress | None:
+    if request.client is None:
+        return None
+
+    try:
+        return ip_address(request.client.host)
+    except ValueError:
+        return None
+
+
+def _db_entity_to_client(db_client: DbWhereaboutsClient) -> WhereaboutsClient:
+    return WhereaboutsClient(
+        id=db_client.id,
+        registered_at=db_client.registered_at,
+        button_count=db_client.button_count,
+        audio_output=db_client.audio_output,
+        authority_status=db_client.authority_status,
+        token=db_client.token,
+        name=db_client.name,
+        location=db_client.location,
+        description=db_client.description,
+        config_id=db_client.config_id,
+        signed_on=False,
+        latest_activity_at=db_client.registered_at,
+    )
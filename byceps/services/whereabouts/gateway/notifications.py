@@ -0,0 +1,85 @@
+"""
+byceps.services.whereabouts.gateway.notifications
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Receive client notifications over a single (asynchronous) Redis
+subscription per process, and hand them to the event streams of the
+clients they concern.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+import structlog
+
+from ..models import WhereaboutsClientID
+from ..whereabouts_client_notification_service import (
+    ClientNotification,
+    deserialize_notification,
+    RECONNECTION_DELAY,
+    REDIS_CHANNEL,
+)
+
+
+log = structlog.get_logger()
+
+
+class NotificationDispatcher:
+    def __init__(self, redis_client: Redis) -> None:
+        self._redis_client = redis_client
+        self._subscribers: dict[
+            asyncio.Queue[ClientNotification], WhereaboutsClientID
+        ] = {}
+
+    @contextmanager
+    def subscribe(
+        self, client_id: WhereaboutsClientID
+    ) -> Iterator[asyncio.Queue[ClientNotification]]:
+        """Return a queue that receives the notifications concerning the
+        client, until the context is left.
+        """
+        queue: asyncio.Queue[ClientNotification] = asyncio.Queue()
+        self._subscribers[queue] = client_id
+        try:
+            yield queue
+        finally:
+            del self._subscribers[queue]
+
+    async def run(self) -> None:
+        """Receive and dispatch notifications until cancelled.
+
+        Resubscribe after the connection to Redis has been lost.
+        Notifications published in the meantime are missed; clients
+        pick up those changes on their next regular fetch.
+        """
+        while True:
+            try:
+                await self._receive()
+            except RedisError as e:
+                log.warning(
+                    'Whereabouts client notification subscription lost',
+                    error=str(e),
+                )
+                await asyncio.sleep(RECONNECTION_DELAY / 1000)
+
+    async def _receive(self) -> None:
+        pubsub = self._redis_client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(REDIS_CHANNEL)
+
+        try:
+            async for message in pubsub.listen():
+                notification = deserialize_notification(message['data'])
+                self._dispatch(notification)
+        finally:
+            await pubsub.aclose()
+
+    def _dispatch(self, notification: ClientNotification) -> None:
+        for queue, client_id in self._subscribers.items():
+            if notification.concerns(client_id):
+                queue.put_nowait(notification)
@@ -0,0 +1,83 @@
+"""
+byceps.services.whereabouts.gateway.repository
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Asynchronous database access for the gateway.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from byceps.services.party.models import PartyID
+from byceps.services.user.models.user import UserID
+
+from ..dbmodels import (
+    DbWhereabouts,
+    DbWhereaboutsClient,
+    DbWhereaboutsClientLivelinessStatus,
+    DbWhereaboutsStatus,
+)
+from ..models import WhereaboutsClientID
+
+
+async def find_client(
+    session: AsyncSession, client_id: WhereaboutsClientID
+) -> DbWhereaboutsClient | None:
+    """Return client, if found."""
+    return await session.get(DbWhereaboutsClient, client_id)
+
+
+async def find_client_by_token(
+    session: AsyncSession, token: str
+) -> DbWhereaboutsClient | None:
+    """Return client with that token, if found."""
+    return (
+        await session.scalars(
+            select(DbWhereaboutsClient).filter_by(token=token)
+        )
+    ).one_or_none()
+
+
+async def update_liveliness_status(
+    session: AsyncSession,
+    client_id: WhereaboutsClientID,
+    signed_on: bool,
+    latest_activity_at: datetime,
+) -> None:
+    """Update liveliness status for a client."""
+    result = await session.execute(
+        update(DbWhereaboutsClientLivelinessStatus)
+        .filter_by(client_id=client_id)
+        .values(signed_on=signed_on, latest_activity_at=latest_activity_at)
+    )
+
+    if result.rowcount == 0:
+        raise ValueError(f'Unknown client ID: {client_id}')
+
+    await session.commit()
+
+
+async def find_status_with_whereabouts(
+    session: AsyncSession, user_id: UserID, party_id: PartyID
+) -> tuple[DbWhereaboutsStatus, DbWhereabouts] | None:
+    """Return user's status for the party, and its whereabouts, if
+    known.
+    """
+    row = (
+        await session.execute(
+            select(DbWhereaboutsStatus, DbWhereabouts)
+            .join(DbWhereabouts)
+            .filter(DbWhereaboutsStatus.user_id == user_id)
+            .filter(DbWhereabouts.party_id == party_id)
+        )
+    ).one_or_none()
+
+    if row is None:
+        return None
+
+    return row.tuple()
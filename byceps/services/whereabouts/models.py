@@ -15,8 +15,8 @@ from ipaddress import IPv4Address, IPv6Address
 from typing import NewType
 from uuid import UUID
 
-from byceps.services.party.models import Party
-from byceps.services.user.models.user import User
+from byceps.services.party.models import Party, PartyID
+from byceps.services.user.models.user import User, UserID
 
 
 WhereaboutsClientConfigID = NewType('WhereaboutsClientConfigID', UUID)
@@ -31,12 +31,18 @@ WhereaboutsID = NewType('WhereaboutsID', UUID)
 IPAddress = IPv4Address | IPv6Address
 
 
+# number of users to add to (or remove from) the occupancy of
+# whereabouts, by party and whereabouts ID
+OccupancyDeltas = dict[tuple[PartyID, WhereaboutsID], int]
+
+
 @dataclass(frozen=True, kw_only=True)
 class WhereaboutsClientConfig:
     id: WhereaboutsClientConfigID
     title: str
     description: str | None
     content: str
+    content_hash: str  # SHA-256, hex-encoded
 
 
 WhereaboutsClientAuthorityStatus = Enum(
@@ -109,4 +115,117 @@ class WhereaboutsUpdate:
     user: User
     whereabouts_id: WhereaboutsID
     created_at: datetime
+    client_id: WhereaboutsClientID | None
     source_address: IPAddress | None
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsUpdateRecord:
+    """An update that refers to user and party by ID only, as written to
+    (and read from) a journal.
+    """
+
+    id: UUID
+    party_id: PartyID
+    user_id: UserID
+    whereabouts_id: WhereaboutsID
+    created_at: datetime
+    client_id: WhereaboutsClientID | None
+    source_address: IPAddress | None
+    idempotency_key: str | None
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsStatusSnapshotCursor:
+    set_at: datetime
+    user_id: UserID
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsStatusSnapshotPage:
+    """A page of a party's statuses in a compact form.
+
+    Users and whereabouts are listed once each; statuses refer to them
+    by their index in the respective list.
+    """
+
+    users: list[User]
+    whereabouts_list: list[Whereabouts]
+    statuses: list[tuple[int, int, datetime]]
+    next_cursor: WhereaboutsStatusSnapshotCursor | None
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsOccupancy:
+    whereabouts_id: WhereaboutsID
+    whereabouts_name: str
+    count: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsOccupancyMinute:
+    minute: datetime
+    occupancy: int
+    arrivals: int
+    departures: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsOccupancyHistory:
+    whereabouts: Whereabouts
+    minutes: list[WhereaboutsOccupancyMinute]
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsDwellTimeStats:
+    whereabouts: Whereabouts
+    stay_count: int
+    median_seconds: int | None
+    p90_seconds: int | None
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsUserPartyTime:
+    user: User
+    seconds: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsUserUpdatesPage:
+    updates: list[WhereaboutsUpdate]
+    next_cursor: UUID | None
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsStay:
+    user: User
+    whereabouts_id: WhereaboutsID
+    entered_at: datetime
+    left_at: datetime | None
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsStatusDiff:
+    """Differences between stored statuses and those recomputed from
+    updates.
+    """
+
+    added: list[tuple[UserID, WhereaboutsID, datetime]]
+    changed: list[tuple[UserID, WhereaboutsID, datetime]]
+    removed: list[UserID]
+    unchanged_count: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class WhereaboutsUpdateBatchChanges:
+    """Changes to statuses, occupancies, stays, and client liveliness
+    caused by a batch of updates.
+    """
+
+    statuses: dict[UserID, tuple[WhereaboutsID, datetime]]
+    occupancy_deltas: OccupancyDeltas
+    # ends of stays that were open before the batch
+    stay_ends: dict[UserID, datetime]
+    # updates that start a stay, and when that stay ended (if it did)
+    stays: list[tuple[WhereaboutsUpdateRecord, datetime | None]]
+    client_activity: dict[WhereaboutsClientID, datetime]
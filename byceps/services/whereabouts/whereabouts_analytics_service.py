@@ -0,0 +1,269 @@
+"""
+byceps.services.whereabouts.whereabouts_analytics_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Compute how long users stay at whereabouts.
+
+Updates are loaded into columnar NumPy arrays (user index, whereabouts
+index, epoch seconds) and processed with vectorized operations.
+
+A stay begins with a user's first update and whenever the user's
+whereabouts changes, and it ends when the next stay of the same user
+begins. A user's last stay has no end (yet) and is not counted.
+
+Requires the optional dependency `numpy`.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from byceps.services.party.models import Party
+from byceps.services.user import user_service
+from byceps.services.user.models.user import UserID
+
+from . import (
+    whereabouts_archive_service,
+    whereabouts_repository,
+    whereabouts_service,
+)
+from .models import (
+    WhereaboutsDwellTimeStats,
+    WhereaboutsID,
+    WhereaboutsUserPartyTime,
+)
+
+
+BATCH_SIZE = 50_000
+
+
+def is_available() -> bool:
+    """Return `True` if NumPy is installed."""
+    return np is not None
+
+
+def get_dwell_time_stats(
+    party: Party,
+) -> tuple[list[WhereaboutsDwellTimeStats], list[WhereaboutsUserPartyTime]]:
+    """Return dwell time statistics per whereabouts, and the total time
+    spent at the party's whereabouts per user (longest first).
+    """
+    batches = _get_update_row_batches(party)
+    user_ids, whereabouts_ids, user_indexes, whereabouts_indexes, timestamps = (
+        load_update_columns(batches)
+    )
+
+    stay_user_indexes, stay_whereabouts_indexes, durations = compute_stays(
+        user_indexes, whereabouts_indexes, timestamps
+    )
+
+    stay_counts, medians, p90s = aggregate_durations_per_group(
+        stay_whereabouts_indexes, durations, len(whereabouts_ids)
+    )
+    whereabouts_indexes_by_id = {
+        whereabouts_id: index
+        for index, whereabouts_id in enumerate(whereabouts_ids)
+    }
+    whereabouts_stats = []
+    for whereabouts in whereabouts_service.get_whereabouts_list(party):
+        index = whereabouts_indexes_by_id.get(whereabouts.id)
+        if index is None:
+            stats = WhereaboutsDwellTimeStats(
+                whereabouts=whereabouts,
+                stay_count=0,
+                median_seconds=None,
+                p90_seconds=None,
+            )
+        else:
+            stats = WhereaboutsDwellTimeStats(
+                whereabouts=whereabouts,
+                stay_count=int(stay_counts[index]),
+                median_seconds=_to_optional_int(medians[index]),
+                p90_seconds=_to_optional_int(p90s[index]),
+            )
+        whereabouts_stats.append(stats)
+    whereabouts_stats.sort(key=lambda stats: stats.whereabouts.position)
+
+    party_seconds = np.bincount(
+        stay_user_indexes, weights=durations, minlength=len(user_ids)
+    )
+    users_by_id = user_service.get_users_indexed_by_id(
+        set(user_ids), include_avatars=False
+    )
+    user_party_times = [
+        WhereaboutsUserPartyTime(
+            user=users_by_id[user_ids[index]], seconds=int(party_seconds[index])
+        )
+        for index in np.argsort(-party_seconds, kind='stable')
+    ]
+
+    return whereabouts_stats, user_party_times
+
+
+def _get_update_row_batches(
+    party: Party,
+) -> Iterator[Sequence[tuple[UserID, WhereaboutsID, datetime]]]:
+    """Yield the party's updates in batches, archived ones first."""
+    archived_batches = (
+        whereabouts_archive_service.get_archived_update_rows_in_batches(
+            party.id, BATCH_SIZE
+        )
+    )
+    for rows in archived_batches:
+        yield [
+            (user_id, whereabouts_id, created_at)
+            for _, created_at, user_id, whereabouts_id, _, _ in rows
+        ]
+
+    yield from whereabouts_repository.get_update_rows_in_batches(
+        party.id, BATCH_SIZE
+    )
+
+
+def load_update_columns(
+    batches: Iterable[Sequence[tuple[UserID, WhereaboutsID, datetime]]],
+) -> tuple[
+    list[UserID], list[WhereaboutsID], np.ndarray, np.ndarray, np.ndarray
+]:
+    """Convert batches of update rows to columnar arrays.
+
+    User and whereabouts IDs are replaced by indexes into the returned
+    lists of distinct IDs. Timestamps are converted to epoch seconds.
+    """
+    user_ids: list[UserID] = []
+    user_indexes_by_id: dict[UserID, int] = {}
+    whereabouts_ids: list[WhereaboutsID] = []
+    whereabouts_indexes_by_id: dict[WhereaboutsID, int] = {}
+
+    def _get_user_index(user_id: UserID) -> int:
+        index = user_indexes_by_id.get(user_id)
+        if index is None:
+            index = user_indexes_by_id[user_id] = len(user_ids)
+            user_ids.append(user_id)
+        return index
+
+    def _get_whereabouts_index(whereabouts_id: WhereaboutsID) -> int:
+        index = whereabouts_indexes_by_id.get(whereabouts_id)
+        if index is None:
+            index = whereabouts_indexes_by_id[whereabouts_id] = len(
+                whereabouts_ids
+            )
+            whereabouts_ids.append(whereabouts_id)
+        return index
+
+    user_index_chunks = []
+    whereabouts_index_chunks = []
+    timestamp_chunks = []
+
+    for batch in batches:
+        count = len(batch)
+
+        user_index_chunks.append(
+            np.fromiter(
+                (_get_user_index(row[0]) for row in batch),
+                dtype=np.int64,
+                count=count,
+            )
+        )
+        whereabouts_index_chunks.append(
+            np.fromiter(
+                (_get_whereabouts_index(row[1]) for row in batch),
+                dtype=np.int64,
+                count=count,
+            )
+        )
+        timestamp_chunks.append(
+            np.array([row[2] for row in batch], dtype='datetime64[s]').astype(
+                np.int64
+            )
+        )
+
+    return (
+        user_ids,
+        whereabouts_ids,
+        _concatenate(user_index_chunks),
+        _concatenate(whereabouts_index_chunks),
+        _concatenate(timestamp_chunks),
+    )
+
+
+def _concatenate(chunks: list[np.ndarray]) -> np.ndarray:
+    if not chunks:
+        return np.empty(0, dtype=np.int64)
+
+    return np.concatenate(chunks)
+
+
+def compute_stays(
+    user_indexes: np.ndarray,
+    whereabouts_indexes: np.ndarray,
+    timestamps: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return user index, whereabouts index, and duration (in seconds)
+    of every completed stay.
+    """
+    order = np.lexsort((timestamps, user_indexes))
+    users = user_indexes[order]
+    whereabouts = whereabouts_indexes[order]
+    times = timestamps[order]
+
+    # A stay starts with a user's first update and whenever the user's
+    # whereabouts changes.
+    is_stay_start = np.ones(len(users), dtype=bool)
+    is_stay_start[1:] = (users[1:] != users[:-1]) | (
+        whereabouts[1:] != whereabouts[:-1]
+    )
+    stay_starts = np.flatnonzero(is_stay_start)
+
+    # A stay ends when the next one starts, if that belongs to the same
+    # user.
+    current_starts = stay_starts[:-1]
+    next_starts = stay_starts[1:]
+    is_completed = users[next_starts] == users[current_starts]
+    starts = current_starts[is_completed]
+    ends = next_starts[is_completed]
+
+    return users[starts], whereabouts[starts], times[ends] - times[starts]
+
+
+def aggregate_durations_per_group(
+    group_indexes: np.ndarray, durations: np.ndarray, group_count: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return count, median, and 90th percentile of durations per group.
+
+    Median and percentile are NaN for groups without durations.
+    """
+    order = np.lexsort((durations, group_indexes))
+    sorted_groups = group_indexes[order]
+    sorted_durations = durations[order]
+
+    bounds = np.searchsorted(sorted_groups, np.arange(group_count + 1))
+    counts = np.diff(bounds)
+
+    medians = np.full(group_count, np.nan)
+    p90s = np.full(group_count, np.nan)
+    for group_index in np.flatnonzero(counts):
+        group_durations = sorted_durations[
+            bounds[group_index] : bounds[group_index + 1]
+        ]
+        medians[group_index], p90s[group_index] = np.percentile(
+            group_durations, [50, 90]
+        )
+
+    return counts, medians, p90s
+
+
+def _to_optional_int(value: float) -> int | None:
+    if np.isnan(value):
+        return None
+
+    return int(round(value))
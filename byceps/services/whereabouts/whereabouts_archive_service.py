@@ -0,0 +1,328 @@
+"""
+byceps.services.whereabouts.whereabouts_archive_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Move updates of finished parties from the database into compressed,
+append-only archive files.
+
+There is one archive file per party, in the directory configured as
+`WHEREABOUTS_ARCHIVE_PATH`. It contains one JSON object per update and
+line, in order of update ID. Each batch is appended as a separate gzip
+member, so an archive can be extended without rewriting it.
+
+A batch is written to the archive (and synced to disk) before it is
+deleted from the database. If archival is interrupted in between, the
+batch is written again on the next run; readers skip those duplicates.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections import deque
+from collections.abc import Iterator, Sequence
+from datetime import datetime
+import gzip
+import ipaddress
+import json
+import os
+from pathlib import Path
+from uuid import UUID
+
+from flask import current_app
+
+from byceps.services.party.models import Party, PartyID
+from byceps.services.user.models.user import UserID
+
+from . import whereabouts_repository
+from .models import (
+    IPAddress,
+    WhereaboutsClientID,
+    WhereaboutsID,
+    WhereaboutsUpdateRecord,
+)
+
+
+ARCHIVE_BATCH_SIZE = 10_000
+
+
+UpdateRow = tuple[
+    UUID,
+    datetime,
+    UserID,
+    WhereaboutsID,
+    WhereaboutsClientID | None,
+    IPAddress | None,
+]
+
+
+def is_configured() -> bool:
+    """Return `True` if an archive directory is configured."""
+    return _get_archive_path() is not None
+
+
+def archive_updates(
+    party: Party,
+    *,
+    drop_source_addresses: bool = False,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+) -> int:
+    """Move the party's updates into its archive file, in batches.
+
+    Return the number of archived updates.
+    """
+    path = _get_archive_file_path(party.id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    total = 0
+
+    while True:
+        rows = whereabouts_repository.get_oldest_update_rows(
+            party.id, batch_size
+        )
+        if not rows:
+            break
+
+        _append_batch(path, rows, drop_source_addresses)
+
+        whereabouts_repository.delete_updates(
+            party.id, [row[0] for row in rows]
+        )
+
+        total += len(rows)
+
+    return total
+
+
+def restore_updates(party: Party) -> int:
+    """Move the party's archived updates back into the database, and
+    remove its archive file.
+
+    Updates are streamed into the database in bulk. Those that are in
+    the database already (due to interrupted archival) are skipped.
+
+    Return the number of restored updates.
+    """
+    if not has_archived_updates(party.id):
+        return 0
+
+    records = (
+        WhereaboutsUpdateRecord(
+            id=update_id,
+            party_id=party.id,
+            user_id=user_id,
+            whereabouts_id=whereabouts_id,
+            created_at=created_at,
+            client_id=client_id,
+            source_address=source_address,
+            idempotency_key=None,
+        )
+        for (
+            update_id,
+            created_at,
+            user_id,
+            whereabouts_id,
+            client_id,
+            source_address,
+        ) in iterate_archived_update_rows(party.id)
+    )
+
+    count = whereabouts_repository.copy_update_records(
+        records, skip_existing=True
+    )
+
+    _get_archive_file_path(party.id).unlink()
+
+    return count
+
+
+def _append_batch(
+    path: Path,
+    rows: Sequence[UpdateRow],
+    drop_source_addresses: bool,
+) -> None:
+    lines = [
+        json.dumps(
+            {
+                'id': str(update_id),
+                'created_at': created_at.isoformat(),
+                'user_id': str(user_id),
+                'whereabouts_id': str(whereabouts_id),
+                'client_id': str(client_id) if client_id else None,
+                'source_address': (
+                    str(source_address)
+                    if source_address and not drop_source_addresses
+                    else None
+                ),
+            }
+        )
+        + '\n'
+        for (
+            update_id,
+            created_at,
+            user_id,
+            whereabouts_id,
+            client_id,
+            source_address,
+        ) in rows
+    ]
+
+    data = gzip.compress(''.join(lines).encode('utf-8'))
+
+    with path.open('ab') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def has_archived_updates(party_id: PartyID) -> bool:
+    """Return `True` if updates of the party have been archived."""
+    if not is_configured():
+        return False
+
+    return _get_archive_file_path(party_id).exists()
+
+
+def iterate_archived_update_rows(
+    party_id: PartyID,
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    whereabouts_id: WhereaboutsID | None = None,
+    user_id: UserID | None = None,
+) -> Iterator[UpdateRow]:
+    """Yield the party's archived updates matching the filters, in
+    order of update ID (and thus creation time).
+
+    The archive is decompressed and parsed on the fly, so memory usage
+    does not depend on its size.
+    """
+    if not has_archived_updates(party_id):
+        return
+
+    path = _get_archive_file_path(party_id)
+
+    last_update_id = None
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            row = _parse_line(line)
+
+            # Skip batches that have been written more than once.
+            if (last_update_id is not None) and (row[0] <= last_update_id):
+                continue
+            last_update_id = row[0]
+
+            if not _matches(row, since, until, whereabouts_id, user_id):
+                continue
+
+            yield row
+
+
+def get_archived_update_rows_in_batches(
+    party_id: PartyID,
+    batch_size: int,
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    whereabouts_id: WhereaboutsID | None = None,
+    user_id: UserID | None = None,
+) -> Iterator[list[UpdateRow]]:
+    """Yield the party's archived updates matching the filters, in
+    batches.
+    """
+    rows = iterate_archived_update_rows(
+        party_id,
+        since=since,
+        until=until,
+        whereabouts_id=whereabouts_id,
+        user_id=user_id,
+    )
+
+    batch = []
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def get_latest_archived_update_rows_for_user(
+    party_id: PartyID,
+    user_id: UserID,
+    limit: int,
+    *,
+    before: UUID | None = None,
+) -> list[UpdateRow]:
+    """Return the user's latest archived updates for the party (before
+    the given update, if any), newest first.
+    """
+    latest_rows: deque[UpdateRow] = deque(maxlen=limit)
+
+    for row in iterate_archived_update_rows(party_id, user_id=user_id):
+        if (before is not None) and (row[0] >= before):
+            break
+
+        latest_rows.append(row)
+
+    return list(reversed(latest_rows))
+
+
+def _parse_line(line: str) -> UpdateRow:
+    data = json.loads(line)
+
+    client_id_str = data['client_id']
+    source_address_str = data['source_address']
+
+    return (
+        UUID(data['id']),
+        datetime.fromisoformat(data['created_at']),
+        UserID(UUID(data['user_id'])),
+        WhereaboutsID(UUID(data['whereabouts_id'])),
+        WhereaboutsClientID(UUID(client_id_str)) if client_id_str else None,
+        (
+            ipaddress.ip_address(source_address_str)
+            if source_address_str
+            else None
+        ),
+    )
+
+
+def _matches(
+    row: UpdateRow,
+    since: datetime | None,
+    until: datetime | None,
+    whereabouts_id: WhereaboutsID | None,
+    user_id: UserID | None,
+) -> bool:
+    _, created_at, row_user_id, row_whereabouts_id, _, _ = row
+
+    if (since is not None) and (created_at < since):
+        return False
+
+    if (until is not None) and (created_at >= until):
+        return False
+
+    if (whereabouts_id is not None) and (row_whereabouts_id != whereabouts_id):
+        return False
+
+    if (user_id is not None) and (row_user_id != user_id):
+        return False
+
+    return True
+
+
+def _get_archive_path() -> Path | None:
+    value = current_app.config.get('WHEREABOUTS_ARCHIVE_PATH')
+    return Path(value) if value else None
+
+
+def _get_archive_file_path(party_id: PartyID) -> Path:
+    archive_path = _get_archive_path()
+    if archive_path is None:
+        raise ValueError('No whereabouts archive path configured')
+
+    return archive_path / f'whereabouts-updates-{party_id}.ndjson.gz'
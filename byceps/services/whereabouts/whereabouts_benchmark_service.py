@@ -0,0 +1,174 @@
+"""
+byceps.services.whereabouts.whereabouts_benchmark_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Compare the ways updates can be written to the database, and measure
+how fast status updates are announced.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections.abc import Callable, Iterable
+from datetime import datetime, timedelta
+from ipaddress import IPv4Address
+import random
+import time
+
+from byceps.announce.announce import build_announcement_request
+from byceps.services.core.events import EventParty
+from byceps.services.party.models import Party
+from byceps.services.user import user_service
+from byceps.services.user.models.user import UserID
+from byceps.services.webhooks import webhook_service
+from byceps.util.uuid import generate_uuid7
+
+from . import announcing, whereabouts_repository
+from .events import WhereaboutsStatusUpdatedEvent
+from .models import WhereaboutsID, WhereaboutsUpdateRecord
+
+
+STATUS_UPDATED_EVENT_NAME = 'whereabouts-status-updated'
+
+
+def benchmark_update_inserts(party: Party, count: int) -> dict[str, float]:
+    """Insert generated updates for the party one by one (via the ORM)
+    as well as via `COPY`, and return the seconds each method took.
+
+    The updates are attributed to the party's whereabouts and to users
+    who have a status at the party. All changes are rolled back.
+    """
+    whereabouts_ids = [
+        db_whereabouts.id
+        for db_whereabouts in whereabouts_repository.get_whereabouts_list(
+            party.id
+        )
+    ]
+    user_ids = [
+        db_status.user_id
+        for db_status in whereabouts_repository.get_statuses(party.id)
+    ]
+    if not whereabouts_ids or not user_ids:
+        raise ValueError('Party has no whereabouts or no user statuses')
+
+    methods: dict[str, Callable[[list[WhereaboutsUpdateRecord]], object]] = {
+        'orm': whereabouts_repository.add_update_records_individually,
+        'copy': lambda records: whereabouts_repository.copy_update_records(
+            records, commit=False
+        ),
+    }
+
+    seconds_by_method = {}
+
+    for method, insert in methods.items():
+        records = list(
+            _generate_records(party, whereabouts_ids, user_ids, count)
+        )
+
+        start = time.perf_counter()
+        insert(records)
+        seconds_by_method[method] = time.perf_counter() - start
+
+        whereabouts_repository.rollback()
+
+    return seconds_by_method
+
+
+def _generate_records(
+    party: Party,
+    whereabouts_ids: list[WhereaboutsID],
+    user_ids: list[UserID],
+    count: int,
+) -> Iterable[WhereaboutsUpdateRecord]:
+    rng = random.Random(count)
+    started_at = datetime.utcnow()
+
+    for i in range(count):
+        yield WhereaboutsUpdateRecord(
+            id=generate_uuid7(),
+            party_id=party.id,
+            user_id=rng.choice(user_ids),
+            whereabouts_id=rng.choice(whereabouts_ids),
+            created_at=started_at + timedelta(milliseconds=i),
+            client_id=None,
+            source_address=IPv4Address(rng.getrandbits(32)),
+            idempotency_key=None,
+        )
+
+
+def benchmark_status_announcements(
+    party: Party, count: int
+) -> dict[str, float]:
+    """Announce a burst of generated status updates of the party to all
+    webhooks enabled for them, with and without sharing announcements
+    across webhooks of the same locale, and return the seconds each
+    took.
+
+    Announcements are only rendered, not sent.
+    """
+    webhooks = webhook_service.get_enabled_outgoing_webhooks(
+        STATUS_UPDATED_EVENT_NAME
+    )
+    if not webhooks:
+        raise ValueError('No webhooks are enabled for status updates')
+
+    events = _generate_status_updated_events(party, count)
+
+    seconds_by_mode = {}
+
+    for mode, caching in [('uncached', False), ('cached', True)]:
+        announcing.clear_announcement_cache()
+
+        with announcing.announcement_caching(caching):
+            start = time.perf_counter()
+            for event in events:
+                for webhook in webhooks:
+                    build_announcement_request(event, webhook)
+            seconds_by_mode[mode] = time.perf_counter() - start
+
+    announcing.clear_announcement_cache()
+
+    return seconds_by_mode
+
+
+def _generate_status_updated_events(
+    party: Party, count: int
+) -> list[WhereaboutsStatusUpdatedEvent]:
+    whereabouts_descriptions = [
+        db_whereabouts.description
+        for db_whereabouts in whereabouts_repository.get_whereabouts_list(
+            party.id
+        )
+    ]
+    user_ids = {
+        db_status.user_id
+        for db_status in whereabouts_repository.get_statuses(party.id)
+    }
+    if not whereabouts_descriptions or not user_ids:
+        raise ValueError('Party has no whereabouts or no user statuses')
+
+    users = list(
+        user_service.get_users_indexed_by_id(
+            user_ids, include_avatars=False
+        ).values()
+    )
+
+    rng = random.Random(count)
+    event_party = EventParty.from_party(party)
+    started_at = datetime.utcnow()
+
+    events = []
+
+    for i in range(count):
+        user = rng.choice(users)
+        events.append(
+            WhereaboutsStatusUpdatedEvent(
+                occurred_at=started_at + timedelta(milliseconds=i),
+                initiator=user,
+                party=event_party,
+                user=user,
+                whereabouts_description=rng.choice(whereabouts_descriptions),
+            )
+        )
+
+    return events
@@ -10,6 +10,7 @@ from __future__ import annotations
 
 import dataclasses
 from datetime import datetime
+import hashlib
 import secrets
 
 from byceps.services.user.models.user import User
@@ -87,6 +88,19 @@ def approve_client(
     return client, event
 
 
+def delete_client_candidate(
+    candidate: WhereaboutsClientCandidate, initiator: User
+) -> WhereaboutsClientDeletedEvent:
+    """Delete a client candidate."""
+    deleted_at = datetime.utcnow()
+
+    return WhereaboutsClientDeletedEvent(
+        occurred_at=deleted_at,
+        initiator=initiator,
+        client_id=candidate.id,
+    )
+
+
 def update_client(
     client: WhereaboutsClient,
     name: str | None,
@@ -155,10 +169,19 @@ def create_client_config(
 ) -> WhereaboutsClientConfig:
     """Create a client configuration."""
     config_id = WhereaboutsClientConfigID(generate_uuid7())
+    content_hash = compute_client_config_content_hash(content)
 
     return WhereaboutsClientConfig(
         id=config_id,
         title=title,
         description=description,
         content=content,
+        content_hash=content_hash,
     )
+
+
+def compute_client_config_content_hash(content: str) -> str:
+    """Return the SHA-256 hash of the configuration's content, as
+    hexadecimal string.
+    """
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
@@ -0,0 +1,233 @@
+"""
+byceps.services.whereabouts.whereabouts_client_notification_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Notify connected clients of changes relevant to them, so they only
+refetch data when something has changed.
+
+Notifications are published via Redis, so that every worker process
+can deliver them to the clients connected to it. Clients receive them
+as a stream of server-sent events. An open stream counts as the
+client's liveliness signal.
+
+Set `WHEREABOUTS_CLIENT_NOTIFICATIONS_ENABLED` to enable notifications.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+import json
+import time
+from typing import Any
+from uuid import UUID
+
+from flask import current_app
+from redis.exceptions import RedisError
+import structlog
+
+from byceps.services.party.models import PartyID
+from byceps.services.user.models.user import UserID
+
+from . import whereabouts_client_repository
+from .models import WhereaboutsClientConfigID, WhereaboutsClientID
+
+
+log = structlog.get_logger()
+
+
+REDIS_CHANNEL = 'whereabouts:client-notifications'
+
+
+# Interval in which comments are sent over an otherwise idle stream,
+# to keep intermediaries from closing it and to detect disconnected
+# clients. Each heartbeat also refreshes the client's liveliness.
+HEARTBEAT_INTERVAL = 15  # seconds
+
+
+# Delay after which a client should reconnect a dropped stream
+RECONNECTION_DELAY = 5000  # milliseconds
+
+
+EVENT_CLIENT_CONFIG_ASSIGNED = 'client-config-assigned'
+EVENT_CLIENT_DELETED = 'client-deleted'
+EVENT_USER_SOUND_CHANGED = 'user-sound-changed'
+EVENT_WHEREABOUTS_CHANGED = 'whereabouts-changed'
+
+
+@dataclass(frozen=True, kw_only=True)
+class ClientNotification:
+    event: str
+    data: dict[str, Any]
+    client_ids: frozenset[WhereaboutsClientID] | None  # `None`: all
+
+    def concerns(self, client_id: WhereaboutsClientID) -> bool:
+        return (self.client_ids is None) or (client_id in self.client_ids)
+
+
+def is_enabled() -> bool:
+    """Return `True` if client notifications are enabled."""
+    return current_app.config.get(
+        'WHEREABOUTS_CLIENT_NOTIFICATIONS_ENABLED', False
+    )
+
+
+# -------------------------------------------------------------------- #
+# publishing
+
+
+def notify_client_config_assigned(
+    client_ids: Iterable[WhereaboutsClientID],
+    config_id: WhereaboutsClientConfigID | None,
+) -> None:
+    """Tell the clients that they have been assigned a (different)
+    configuration.
+    """
+    _publish(
+        ClientNotification(
+            event=EVENT_CLIENT_CONFIG_ASSIGNED,
+            data={'config_id': str(config_id) if config_id else None},
+            client_ids=frozenset(client_ids),
+        )
+    )
+
+
+def notify_client_deleted(client_id: WhereaboutsClientID) -> None:
+    """Tell the client that it has been deleted."""
+    _publish(
+        ClientNotification(
+            event=EVENT_CLIENT_DELETED,
+            data={},
+            client_ids=frozenset([client_id]),
+        )
+    )
+
+
+def notify_user_sound_changed(user_id: UserID) -> None:
+    """Tell all clients that the user's sound has been set, changed, or
+    removed.
+    """
+    _publish(
+        ClientNotification(
+            event=EVENT_USER_SOUND_CHANGED,
+            data={'user_id': str(user_id)},
+            client_ids=None,
+        )
+    )
+
+
+def notify_whereabouts_changed(party_id: PartyID) -> None:
+    """Tell all clients that the party's whereabouts have been added or
+    changed.
+    """
+    _publish(
+        ClientNotification(
+            event=EVENT_WHEREABOUTS_CHANGED,
+            data={'party_id': party_id},
+            client_ids=None,
+        )
+    )
+
+
+def _publish(notification: ClientNotification) -> None:
+    if not is_enabled():
+        return
+
+    try:
+        current_app.redis_client.publish(
+            REDIS_CHANNEL, serialize_notification(notification)
+        )
+    except RedisError as e:
+        # Clients will pick up the change on their next regular fetch.
+        log.warning(
+            'Could not publish whereabouts client notification',
+            notification_event=notification.event,
+            error=str(e),
+        )
+
+
+def serialize_notification(notification: ClientNotification) -> str:
+    """Serialize the notification for publishing."""
+    return json.dumps(
+        {
+            'event': notification.event,
+            'data': notification.data,
+            'client_ids': (
+                [str(client_id) for client_id in notification.client_ids]
+                if (notification.client_ids is not None)
+                else None
+            ),
+        }
+    )
+
+
+def deserialize_notification(value: bytes | str) -> ClientNotification:
+    """Deserialize a published notification."""
+    obj = json.loads(value)
+
+    client_id_strs = obj['client_ids']
+
+    return ClientNotification(
+        event=obj['event'],
+        data=obj['data'],
+        client_ids=(
+            frozenset(
+                WhereaboutsClientID(UUID(client_id_str))
+                for client_id_str in client_id_strs
+            )
+            if (client_id_strs is not None)
+            else None
+        ),
+    )
+
+
+# -------------------------------------------------------------------- #
+# streaming
+
+
+def stream_notifications(client_id: WhereaboutsClientID) -> Iterator[str]:
+    """Yield the notifications concerning the client as server-sent
+    events, interspersed with heartbeats, until the client disconnects
+    or has been deleted.
+    """
+    pubsub = current_app.redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(REDIS_CHANNEL)
+
+    try:
+        _keep_client_alive(client_id)
+        yield f'retry: {RECONNECTION_DELAY}\n\n'
+
+        last_heartbeat_at = time.monotonic()
+
+        while True:
+            message = pubsub.get_message(timeout=HEARTBEAT_INTERVAL)
+
+            if message is not None:
+                notification = deserialize_notification(message['data'])
+                if notification.concerns(client_id):
+                    yield format_server_sent_event(
+                        notification.event, notification.data
+                    )
+
+                    if notification.event == EVENT_CLIENT_DELETED:
+                        return
+
+            if time.monotonic() - last_heartbeat_at >= HEARTBEAT_INTERVAL:
+                _keep_client_alive(client_id)
+                yield ': heartbeat\n\n'
+                last_heartbeat_at = time.monotonic()
+    finally:
+        pubsub.close()
+
+
+def format_server_sent_event(event: str, data: dict[str, Any]) -> str:
+    """Format a server-sent event."""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def _keep_client_alive(client_id: WhereaboutsClientID) -> None:
+    whereabouts_client_repository.update_liveliness_status(
+        client_id, True, datetime.utcnow()
+    )
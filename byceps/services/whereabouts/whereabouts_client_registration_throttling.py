@@ -0,0 +1,201 @@
+"""
+byceps.services.whereabouts.whereabouts_client_registration_throttling
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Throttle client registrations per source address (token bucket).
+
+Buckets are kept in memory by default. Set
+`WHEREABOUTS_CLIENT_REGISTRATION_THROTTLING_STORE` to `'redis'` to
+share them between multiple worker processes.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import math
+import threading
+import time
+
+from flask import current_app
+
+from .models import IPAddress
+
+
+@dataclass(frozen=True, kw_only=True)
+class TokenBucketPolicy:
+    capacity: int
+    refill_rate: float  # tokens per second
+
+
+@dataclass(frozen=True, kw_only=True)
+class ThrottlingDecision:
+    allowed: bool
+    retry_after: int  # seconds
+
+
+# Allow bursts of a few registrations (i.e. a handful of devices being
+# set up at once), then one registration per minute.
+REGISTRATION_POLICY = TokenBucketPolicy(capacity=5, refill_rate=1 / 60)
+
+
+def take_token(
+    tokens: float,
+    updated_at: float,
+    policy: TokenBucketPolicy,
+    now: float,
+) -> tuple[float, ThrottlingDecision]:
+    """Refill the bucket for the time passed, then try to take a token
+    from it.
+
+    Return the remaining tokens and the decision.
+    """
+    elapsed = max(0.0, now - updated_at)
+    tokens = min(float(policy.capacity), tokens + elapsed * policy.refill_rate)
+
+    if tokens >= 1:
+        return tokens - 1, ThrottlingDecision(allowed=True, retry_after=0)
+
+    retry_after = math.ceil((1 - tokens) / policy.refill_rate)
+    return tokens, ThrottlingDecision(allowed=False, retry_after=retry_after)
+
+
+class InMemoryTokenBucketStore:
+    """Keep token buckets in the memory of this process.
+
+    The least recently used buckets are evicted if the maximum number of
+    buckets is exceeded.
+    """
+
+    def __init__(self, max_buckets: int = 10_000) -> None:
+        self._max_buckets = max_buckets
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(
+        self, key: str, policy: TokenBucketPolicy, now: float
+    ) -> ThrottlingDecision:
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(
+                key, (float(policy.capacity), now)
+            )
+
+            tokens, decision = take_token(tokens, updated_at, policy, now)
+
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self._max_buckets:
+                self._buckets.popitem(last=False)
+
+        return decision
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+_REDIS_TAKE_TOKEN_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * refill_rate)
+
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill_rate) + 1)
+
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisTokenBucketStore:
+    """Keep token buckets in Redis, shared between processes.
+
+    Refilling and taking a token is done atomically in a Lua script. The
+    script is registered once and then invoked by its hash (`EVALSHA`),
+    so it is not sent to Redis on every call.
+    """
+
+    def __init__(self, redis_client, key_prefix: str) -> None:
+        self._redis_client = redis_client
+        self._key_prefix = key_prefix
+        self._take_token_script = redis_client.register_script(
+            _REDIS_TAKE_TOKEN_SCRIPT
+        )
+
+    @property
+    def redis_client(self):
+        return self._redis_client
+
+    def take(
+        self, key: str, policy: TokenBucketPolicy, now: float
+    ) -> ThrottlingDecision:
+        allowed, tokens_str = self._take_token_script(
+            keys=[self._key_prefix + key],
+            args=[policy.capacity, policy.refill_rate, now],
+        )
+
+        if allowed:
+            return ThrottlingDecision(allowed=True, retry_after=0)
+
+        tokens = float(tokens_str)
+        retry_after = math.ceil((1 - tokens) / policy.refill_rate)
+        return ThrottlingDecision(allowed=False, retry_after=retry_after)
+
+
+_in_memory_store = InMemoryTokenBucketStore()
+_redis_store: RedisTokenBucketStore | None = None
+
+
+def check_registration(source_address: IPAddress | None) -> ThrottlingDecision:
+    """Take a registration token for the source address, if available."""
+    key = str(source_address) if source_address else 'unknown'
+
+    store = _get_store()
+
+    return store.take(key, REGISTRATION_POLICY, time.time())
+
+
+def _get_store() -> InMemoryTokenBucketStore | RedisTokenBucketStore:
+    store_name = current_app.config.get(
+        'WHEREABOUTS_CLIENT_REGISTRATION_THROTTLING_STORE', 'memory'
+    )
+
+    if store_name == 'redis':
+        return _get_redis_store()
+
+    return _in_memory_store
+
+
+def _get_redis_store() -> RedisTokenBucketStore:
+    global _redis_store
+
+    redis_client = current_app.redis_client
+
+    # Reuse the store (and its registered script) as long as the
+    # application's Redis client stays the same.
+    if (_redis_store is None) or (
+        _redis_store.redis_client is not redis_client
+    ):
+        _redis_store = RedisTokenBucketStore(
+            redis_client, 'whereabouts:client-registration-throttling:'
+        )
+
+    return _redis_store
+
+
+def reset() -> None:
+    """Forget all in-memory buckets."""
+    _in_memory_store.clear()
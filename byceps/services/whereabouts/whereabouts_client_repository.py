@@ -6,10 +6,10 @@ byceps.services.whereabouts.whereabouts_client_repository
 :License: Revised BSD (see `LICENSE` file for details)
 """
 
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
 from datetime import datetime
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, select, update
 
 from byceps.database import db
 
@@ -23,6 +23,7 @@ from .models import (
     WhereaboutsClientAuthorityStatus,
     WhereaboutsClientCandidate,
     WhereaboutsClientConfig,
+    WhereaboutsClientConfigID,
     WhereaboutsClientID,
 )
 
@@ -31,8 +32,31 @@ from .models import (
 # client
 
 
-def persist_client_registration(candidate: WhereaboutsClientCandidate) -> None:
-    """Persist client registration."""
+# Advisory lock key (pair) to serialize client registrations. Two-part
+# keys occupy a key space of their own, separate from the (single
+# 64-bit) keys of the status locks.
+_REGISTRATION_LOCK_KEYS = (0x77686572, 1)
+
+
+def persist_client_registration(
+    candidate: WhereaboutsClientCandidate, max_candidates: int
+) -> bool:
+    """Persist client registration, unless the maximum number of client
+    candidates is pending approval already.
+
+    Registrations are serialized so that concurrent ones cannot exceed
+    the maximum.
+
+    Return `True` if the registration has been persisted.
+    """
+    db.session.execute(
+        select(func.pg_advisory_xact_lock(*_REGISTRATION_LOCK_KEYS))
+    )
+
+    if count_client_candidates() >= max_candidates:
+        db.session.rollback()
+        return False
+
     db_client = DbWhereaboutsClient(
         candidate.id,
         candidate.registered_at,
@@ -45,6 +69,8 @@ def persist_client_registration(candidate: WhereaboutsClientCandidate) -> None:
     db.session.add(db_client)
     db.session.commit()
 
+    return True
+
 
 def delete_client_candidate(candidate: WhereaboutsClientCandidate) -> None:
     """Delete a client candidate."""
@@ -54,6 +80,100 @@ def delete_client_candidate(candidate: WhereaboutsClientCandidate) -> None:
     db.session.commit()
 
 
+def delete_client_candidates(
+    client_ids: Iterable[WhereaboutsClientID],
+) -> set[WhereaboutsClientID]:
+    """Delete client candidates.
+
+    Clients that are not pending (anymore) are skipped.
+
+    Return the IDs of the deleted candidates.
+    """
+    deleted_client_ids = db.session.scalars(
+        delete(DbWhereaboutsClient)
+        .filter(DbWhereaboutsClient.id.in_(list(client_ids)))
+        .filter_by(
+            _authority_status=WhereaboutsClientAuthorityStatus.pending.name
+        )
+        .returning(DbWhereaboutsClient.id)
+    ).all()
+
+    db.session.commit()
+
+    return set(deleted_client_ids)
+
+
+def delete_client_candidates_registered_before(cutoff: datetime) -> int:
+    """Delete client candidates registered before the cutoff.
+
+    Return the number of deleted candidates.
+    """
+    result = db.session.execute(
+        delete(DbWhereaboutsClient)
+        .filter_by(
+            _authority_status=WhereaboutsClientAuthorityStatus.pending.name
+        )
+        .filter(DbWhereaboutsClient.registered_at < cutoff)
+    )
+
+    db.session.commit()
+
+    return result.rowcount
+
+
+def persist_client_approvals(
+    clients: Sequence[WhereaboutsClient],
+) -> set[WhereaboutsClientID]:
+    """Persist the approval of client candidates and initialize their
+    liveliness status, all in a single transaction.
+
+    Candidates that are not pending anymore (e.g. because they have been
+    approved or deleted concurrently) are skipped.
+
+    Return the IDs of the clients that have been approved.
+    """
+    if not clients:
+        return set()
+
+    approved_client_ids = set(
+        db.session.scalars(
+            update(DbWhereaboutsClient)
+            .filter(
+                DbWhereaboutsClient.id.in_([client.id for client in clients])
+            )
+            .filter_by(
+                _authority_status=WhereaboutsClientAuthorityStatus.pending.name
+            )
+            .values(
+                {
+                    DbWhereaboutsClient._authority_status: (
+                        WhereaboutsClientAuthorityStatus.approved.name
+                    )
+                }
+            )
+            .returning(DbWhereaboutsClient.id)
+        ).all()
+    )
+
+    if approved_client_ids:
+        db.session.execute(
+            insert(DbWhereaboutsClientLivelinessStatus),
+            [
+                {
+                    'client_id': client.id,
+                    'signed_on': False,
+                    'latest_activity_at': client.registered_at,
+                }
+                for client in clients
+                if client.id in approved_client_ids
+            ],
+        )
+
+    db.session.commit()
+
+    return approved_client_ids
+
+
 def persist_client_update(client: WhereaboutsClient) -> None:
     """Update a client."""
     db_client = get_client(client.id)
@@ -67,18 +187,6 @@ def persist_client_update(client: WhereaboutsClient) -> None:
     db.session.commit()
 
 
-def initialize_liveliness_status(client: WhereaboutsClient) -> None:
-    """Initialize liveliness status for a client."""
-    db_liveliness_status = DbWhereaboutsClientLivelinessStatus(
-        client_id=client.id,
-        signed_on=False,
-        latest_activity_at=client.registered_at,
-    )
-
-    db.session.add(db_liveliness_status)
-    db.session.commit()
-
-
 def update_liveliness_status(
     client_id: WhereaboutsClientID,
     signed_on: bool,
@@ -107,6 +215,15 @@ def get_client_candidates() -> Sequence[DbWhereaboutsClient]:
     ).all()
 
 
+def count_client_candidates() -> int:
+    """Return the number of client candidates."""
+    return db.session.scalar(
+        select(func.count(DbWhereaboutsClient.id)).filter_by(
+            _authority_status=WhereaboutsClientAuthorityStatus.pending.name
+        )
+    )
+
+
 def find_client(
     client_id: WhereaboutsClientID,
 ) -> DbWhereaboutsClient | None:
@@ -172,12 +289,92 @@ def persist_client_config(config: WhereaboutsClientConfig) -> None:
         config.title,
         config.description,
         config.content,
+        config.content_hash,
     )
 
     db.session.add(db_config)
     db.session.commit()
 
 
+def find_client_config(
+    config_id: WhereaboutsClientConfigID,
+) -> DbWhereaboutsClientConfig | None:
+    """Return client configuration, if found."""
+    return db.session.get(DbWhereaboutsClientConfig, config_id)
+
+
+def find_client_config_content_hash(
+    config_id: WhereaboutsClientConfigID,
+) -> str | None:
+    """Return the content hash of the client configuration, if found.
+
+    The content itself is not loaded.
+    """
+    return db.session.scalar(
+        select(DbWhereaboutsClientConfig.content_hash).filter_by(id=config_id)
+    )
+
+
+def assign_client_config(
+    client_ids: Iterable[WhereaboutsClientID],
+    config_id: WhereaboutsClientConfigID | None,
+) -> int:
+    """Assign the configuration to the (approved) clients, replacing
+    their current one.
+
+    Return the number of clients the configuration was assigned to.
+    """
+    result = db.session.execute(
+        update(DbWhereaboutsClient)
+        .filter(DbWhereaboutsClient.id.in_(list(client_ids)))
+        .filter_by(
+            _authority_status=WhereaboutsClientAuthorityStatus.approved.name
+        )
+        .values(config_id=config_id)
+    )
+
+    db.session.commit()
+
+    return result.rowcount
+
+
 def get_all_client_configs() -> Sequence[DbWhereaboutsClientConfig]:
     """Return all client configurations."""
     return db.session.scalars(select(DbWhereaboutsClientConfig)).all()
+
+
+def get_client_config_contents_with_hashes() -> Sequence[
+    tuple[WhereaboutsClientConfigID, str, str | None]
+]:
+    """Return ID, content, and content hash (which might be missing)
+    of all client configurations.
+    """
+    return (
+        db.session.execute(
+            select(
+                DbWhereaboutsClientConfig.id,
+                DbWhereaboutsClientConfig.content,
+                DbWhereaboutsClientConfig.content_hash,
+            )
+        )
+        .tuples()
+        .all()
+    )
+
+
+def update_client_config_content_hashes(
+    content_hashes: dict[WhereaboutsClientConfigID, str],
+) -> None:
+    """Update the content hashes of the client configurations."""
+    if not content_hashes:
+        return
+
+    db.session.execute(
+        update(DbWhereaboutsClientConfig),
+        [
+            {'id': config_id, 'content_hash': content_hash}
+            for config_id, content_hash in content_hashes.items()
+        ],
+    )
+
+    db.session.commit()
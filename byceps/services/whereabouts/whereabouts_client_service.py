@@ -6,12 +6,20 @@ byceps.services.whereabouts.whereabouts_client_service
 :License: Revised BSD (see `LICENSE` file for details)
 """
 
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+import time
+
 import structlog
 
 from byceps.services.global_setting import global_setting_service
 from byceps.services.user.models.user import User
 
-from . import whereabouts_client_domain_service, whereabouts_client_repository
+from . import (
+    whereabouts_client_domain_service,
+    whereabouts_client_notification_service,
+    whereabouts_client_repository,
+)
 from .dbmodels import (
     DbWhereaboutsClient,
     DbWhereaboutsClientConfig,
@@ -30,6 +38,7 @@ from .models import (
     WhereaboutsClientAuthorityStatus,
     WhereaboutsClientCandidate,
     WhereaboutsClientConfig,
+    WhereaboutsClientConfigID,
     WhereaboutsClientID,
 )
 
@@ -44,9 +53,28 @@ log = structlog.get_logger()
 GLOBAL_SETTINGS_KEY = 'whereabouts_client_registration_status'
 
 
+# Maximum number of client candidates waiting for approval. Further
+# registrations are refused until candidates are approved or deleted.
+MAX_CLIENT_CANDIDATES = 50
+
+
+class ClientCandidateLimitReachedError(Exception):
+    """Too many client candidates are pending approval."""
+
+
+# Time after which a cached registration status is fetched again. This
+# is relevant if it has been changed by another process.
+REGISTRATION_STATUS_CACHE_TTL = 10  # seconds
+
+
+# registration status, expiry as monotonic time
+_registration_status_cache: tuple[bool, float] | None = None
+
+
 def open_registration() -> None:
     """Open client registration."""
     global_setting_service.create_or_update_setting(GLOBAL_SETTINGS_KEY, 'open')
+    clear_registration_status_cache()
 
 
 def close_registration() -> None:
@@ -54,12 +82,35 @@ def close_registration() -> None:
     global_setting_service.create_or_update_setting(
         GLOBAL_SETTINGS_KEY, 'closed'
     )
+    clear_registration_status_cache()
 
 
 def is_registration_open() -> bool:
     """Return `True` if client registration is open/allowed."""
+    global _registration_status_cache
+
+    now = time.monotonic()
+
+    cached = _registration_status_cache
+    if (cached is not None) and (cached[1] > now):
+        return cached[0]
+
     value = global_setting_service.find_setting_value(GLOBAL_SETTINGS_KEY)
-    return value == 'open'
+    registration_open = value == 'open'
+
+    _registration_status_cache = (
+        registration_open,
+        now + REGISTRATION_STATUS_CACHE_TTL,
+    )
+
+    return registration_open
+
+
+def clear_registration_status_cache() -> None:
+    """Forget the cached registration status of this process."""
+    global _registration_status_cache
+
+    _registration_status_cache = None
 
 
 def register_client(
@@ -68,12 +119,20 @@ def register_client(
     *,
     source_address: IPAddress | None = None,
 ) -> tuple[WhereaboutsClientCandidate, WhereaboutsClientRegisteredEvent]:
-    """Register a client."""
+    """Register a client.
+
+    Raise `ClientCandidateLimitReachedError` if the maximum number of
+    client candidates is pending approval already.
+    """
     candidate, event = whereabouts_client_domain_service.register_client(
         button_count, audio_output
     )
 
-    whereabouts_client_repository.persist_client_registration(candidate)
+    persisted = whereabouts_client_repository.persist_client_registration(
+        candidate, MAX_CLIENT_CANDIDATES
+    )
+    if not persisted:
+        raise ClientCandidateLimitReachedError()
 
     log.info(
         'Whereabouts client registered',
@@ -89,22 +148,51 @@ def register_client(
 def approve_client(
     candidate: WhereaboutsClientCandidate, initiator: User
 ) -> tuple[WhereaboutsClient, WhereaboutsClientApprovedEvent]:
-    """Approve a client."""
-    client, event = whereabouts_client_domain_service.approve_client(
-        candidate, initiator
-    )
+    """Approve a client.
 
-    whereabouts_client_repository.persist_client_update(client)
+    Raise `ValueError` if the candidate is not pending anymore.
+    """
+    approvals = approve_client_candidates([candidate], initiator)
 
-    whereabouts_client_repository.initialize_liveliness_status(client)
+    if not approvals:
+        raise ValueError(f'Client candidate {candidate.id} is not pending')
 
-    log.info(
-        'Whereabouts client approved',
-        id=str(client.id),
-        approved_by=initiator.screen_name,
+    return approvals[0]
+
+
+def approve_client_candidates(
+    candidates: Sequence[WhereaboutsClientCandidate], initiator: User
+) -> list[tuple[WhereaboutsClient, WhereaboutsClientApprovedEvent]]:
+    """Approve multiple client candidates at once.
+
+    Candidates that are not pending anymore (e.g. because they have been
+    approved or deleted concurrently) are skipped.
+    """
+    approvals = [
+        whereabouts_client_domain_service.approve_client(candidate, initiator)
+        for candidate in candidates
+    ]
+
+    approved_client_ids = (
+        whereabouts_client_repository.persist_client_approvals(
+            [client for client, _ in approvals]
+        )
     )
 
-    return client, event
+    approvals = [
+        (client, event)
+        for client, event in approvals
+        if client.id in approved_client_ids
+    ]
+
+    for client, _ in approvals:
+        log.info(
+            'Whereabouts client approved',
+            id=str(client.id),
+            approved_by=initiator.screen_name,
+        )
+
+    return approvals
 
 
 def delete_client_candidate(
@@ -120,6 +208,59 @@ def delete_client_candidate(
     )
 
 
+def delete_client_candidates(
+    candidates: Sequence[WhereaboutsClientCandidate], initiator: User
+) -> list[WhereaboutsClientDeletedEvent]:
+    """Delete multiple client candidates at once.
+
+    Candidates that are not pending anymore (e.g. because they have been
+    approved or deleted concurrently) are skipped.
+
+    Return an event for each deleted candidate.
+    """
+    deleted_client_ids = whereabouts_client_repository.delete_client_candidates(
+        candidate.id for candidate in candidates
+    )
+
+    events = [
+        whereabouts_client_domain_service.delete_client_candidate(
+            candidate, initiator
+        )
+        for candidate in candidates
+        if candidate.id in deleted_client_ids
+    ]
+
+    for event in events:
+        log.info(
+            'Whereabouts client candidate deleted',
+            id=str(event.client_id),
+            deleted_by=initiator.screen_name,
+        )
+
+    return events
+
+
+def purge_stale_client_candidates(max_age: timedelta) -> int:
+    """Delete client candidates that have been pending for longer than
+    the maximum age.
+
+    Return the number of deleted candidates.
+    """
+    cutoff = datetime.utcnow() - max_age
+
+    deleted_count = whereabouts_client_repository.delete_client_candidates_registered_before(
+        cutoff
+    )
+
+    log.info(
+        'Stale whereabouts client candidates purged',
+        registered_before=cutoff.isoformat(),
+        count=deleted_count,
+    )
+
+    return deleted_count
+
+
 def update_client(
     client: WhereaboutsClient,
     name: str | None,
@@ -146,6 +287,8 @@ def delete_client(
 
     whereabouts_client_repository.persist_client_update(deleted_client)
 
+    whereabouts_client_notification_service.notify_client_deleted(client.id)
+
     log.info(
         'Whereabouts client deleted',
         id=str(client.id),
@@ -322,6 +465,57 @@ def create_client_config(
     return config
 
 
+def find_client_config(
+    config_id: WhereaboutsClientConfigID,
+) -> WhereaboutsClientConfig | None:
+    """Return client configuration, if found."""
+    db_config = whereabouts_client_repository.find_client_config(config_id)
+
+    if db_config is None:
+        return None
+
+    return _db_entity_to_client_config(db_config)
+
+
+def find_client_config_content_hash(
+    config_id: WhereaboutsClientConfigID,
+) -> str | None:
+    """Return the content hash of the client configuration, if found."""
+    return whereabouts_client_repository.find_client_config_content_hash(
+        config_id
+    )
+
+
+def assign_client_config(
+    client_ids: Sequence[WhereaboutsClientID],
+    config: WhereaboutsClientConfig | None,
+) -> int:
+    """Assign the configuration to multiple clients at once (or remove
+    their configuration if `None`).
+
+    Client candidates and deleted clients are skipped.
+
+    Return the number of clients the configuration was assigned to.
+    """
+    config_id = config.id if (config is not None) else None
+
+    assigned_count = whereabouts_client_repository.assign_client_config(
+        client_ids, config_id
+    )
+
+    whereabouts_client_notification_service.notify_client_config_assigned(
+        client_ids, config_id
+    )
+
+    log.info(
+        'Whereabouts client config assigned',
+        config_id=str(config_id) if (config_id is not None) else None,
+        client_ids=[str(client_id) for client_id in client_ids],
+    )
+
+    return assigned_count
+
+
 def get_all_client_configs() -> list[WhereaboutsClientConfig]:
     """Return all client configurations."""
     db_configs = whereabouts_client_repository.get_all_client_configs()
@@ -329,6 +523,32 @@ def get_all_client_configs() -> list[WhereaboutsClientConfig]:
     return [_db_entity_to_client_config(db_config) for db_config in db_configs]
 
 
+def backfill_client_config_content_hashes() -> int:
+    """Set the content hashes of client configurations that lack one
+    or whose hash does not match their content (e.g. after their
+    content has been changed in the database directly).
+
+    Return the number of updated configurations.
+    """
+    rows = (
+        whereabouts_client_repository.get_client_config_contents_with_hashes()
+    )
+
+    content_hashes = {}
+    for config_id, content, content_hash in rows:
+        expected_content_hash = whereabouts_client_domain_service.compute_client_config_content_hash(
+            content
+        )
+        if content_hash != expected_content_hash:
+            content_hashes[config_id] = expected_content_hash
+
+    whereabouts_client_repository.update_client_config_content_hashes(
+        content_hashes
+    )
+
+    return len(content_hashes)
+
+
 def _db_entity_to_client_config(
     db_config: DbWhereaboutsClientConfig,
 ) -> WhereaboutsClientConfig:
@@ -337,4 +557,5 @@ def _db_entity_to_client_config(
         title=db_config.title,
         description=db_config.description,
         content=db_config.content,
+        content_hash=db_config.content_hash,
     )
@@ -8,20 +8,28 @@ byceps.services.whereabouts.whereabouts_domain_service
 
 from __future__ import annotations
 
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from uuid import UUID
 
 from byceps.services.core.events import EventParty
-from byceps.services.party.models import Party
-from byceps.services.user.models.user import User
+from byceps.services.party.models import Party, PartyID
+from byceps.services.user.models.user import User, UserID
 from byceps.util.uuid import generate_uuid7
 
 from .events import WhereaboutsStatusUpdatedEvent
 from .models import (
     IPAddress,
+    OccupancyDeltas,
     Whereabouts,
+    WhereaboutsClient,
+    WhereaboutsClientID,
     WhereaboutsID,
     WhereaboutsStatus,
+    WhereaboutsStatusDiff,
     WhereaboutsUpdate,
+    WhereaboutsUpdateBatchChanges,
+    WhereaboutsUpdateRecord,
 )
 
 
@@ -49,13 +57,19 @@ def create_whereabouts(
 
 
 def set_status(
+    client: WhereaboutsClient,
     user: User,
     whereabouts: Whereabouts,
     *,
     source_address: IPAddress | None = None,
+    update_id: UUID | None = None,
 ) -> tuple[WhereaboutsStatus, WhereaboutsUpdate, WhereaboutsStatusUpdatedEvent]:
-    """Set a user's whereabouts."""
-    update_id = generate_uuid7()
+    """Set a user's whereabouts.
+
+    The update's ID is generated unless the client has provided one.
+    """
+    if update_id is None:
+        update_id = generate_uuid7()
     set_at = datetime.utcnow()
 
     status = WhereaboutsStatus(
@@ -69,6 +83,7 @@ def set_status(
         user=user,
         whereabouts_id=whereabouts.id,
         created_at=set_at,
+        client_id=client.id,
         source_address=source_address,
     )
 
@@ -81,3 +96,209 @@ def set_status(
     )
 
     return status, update, event
+
+
+def get_occupancy_deltas(
+    previous_whereabouts: tuple[PartyID, WhereaboutsID] | None,
+    new_whereabouts: tuple[PartyID, WhereaboutsID],
+) -> OccupancyDeltas:
+    """Return the changes to occupancies caused by a user moving from
+    their previous whereabouts (if any) to the new one.
+    """
+    if new_whereabouts == previous_whereabouts:
+        return {}
+
+    deltas = {new_whereabouts: 1}
+
+    if previous_whereabouts is not None:
+        deltas[previous_whereabouts] = -1
+
+    return deltas
+
+
+def index_status_rows(
+    rows: Iterable[tuple[UserID, WhereaboutsID, datetime]],
+) -> tuple[list[UserID], list[WhereaboutsID], list[tuple[int, int, datetime]]]:
+    """Replace user and whereabouts IDs in status rows with indexes
+    into lists of distinct IDs, in order of first appearance.
+    """
+    user_ids: list[UserID] = []
+    user_indexes: dict[UserID, int] = {}
+    whereabouts_ids: list[WhereaboutsID] = []
+    whereabouts_indexes: dict[WhereaboutsID, int] = {}
+    indexed_rows = []
+
+    for user_id, whereabouts_id, set_at in rows:
+        user_index = user_indexes.get(user_id)
+        if user_index is None:
+            user_index = user_indexes[user_id] = len(user_ids)
+            user_ids.append(user_id)
+
+        whereabouts_index = whereabouts_indexes.get(whereabouts_id)
+        if whereabouts_index is None:
+            whereabouts_index = whereabouts_indexes[whereabouts_id] = len(
+                whereabouts_ids
+            )
+            whereabouts_ids.append(whereabouts_id)
+
+        indexed_rows.append((user_index, whereabouts_index, set_at))
+
+    return user_ids, whereabouts_ids, indexed_rows
+
+
+def fill_minutes_without_count(
+    counts: Iterable[tuple[datetime, int]], start: datetime, end: datetime
+) -> list[tuple[datetime, int]]:
+    """Return a count for every minute from start to end (inclusive),
+    using zero for minutes without a count.
+    """
+    counts_by_minute = dict(counts)
+
+    minute = start.replace(second=0, microsecond=0)
+    end = end.replace(second=0, microsecond=0)
+
+    filled_counts = []
+    while minute <= end:
+        filled_counts.append((minute, counts_by_minute.get(minute, 0)))
+        minute += timedelta(minutes=1)
+
+    return filled_counts
+
+
+def diff_statuses(
+    party_id: PartyID,
+    recomputed: dict[UserID, tuple[WhereaboutsID, datetime]],
+    stored: dict[UserID, tuple[PartyID, WhereaboutsID, datetime]],
+) -> WhereaboutsStatusDiff:
+    """Compare the statuses recomputed from the party's updates with the
+    stored ones.
+
+    `stored` is expected to contain the statuses at the party as well as
+    the statuses (at any party) of all users in `recomputed`.
+
+    A stored status at another party that is more recent than the
+    recomputed one is kept, as the user has moved on since. Stored
+    statuses at the party without any underlying update are removed.
+    """
+    added = []
+    changed = []
+    unchanged_count = 0
+
+    for user_id, (whereabouts_id, set_at) in recomputed.items():
+        stored_status = stored.get(user_id)
+
+        if stored_status is None:
+            added.append((user_id, whereabouts_id, set_at))
+            continue
+
+        stored_party_id, stored_whereabouts_id, stored_set_at = stored_status
+
+        if (stored_party_id != party_id) and (stored_set_at > set_at):
+            continue
+
+        if (stored_whereabouts_id, stored_set_at) == (whereabouts_id, set_at):
+            unchanged_count += 1
+        else:
+            changed.append((user_id, whereabouts_id, set_at))
+
+    removed = [
+        user_id
+        for user_id, (stored_party_id, _, _) in stored.items()
+        if (stored_party_id == party_id) and (user_id not in recomputed)
+    ]
+
+    return WhereaboutsStatusDiff(
+        added=added,
+        changed=changed,
+        removed=removed,
+        unchanged_count=unchanged_count,
+    )
+
+
+def create_update_record(
+    update: WhereaboutsUpdate,
+    party_id: PartyID,
+    *,
+    idempotency_key: str | None = None,
+) -> WhereaboutsUpdateRecord:
+    """Create a record of the update (and the idempotency key the
+    client has sent along with it, if any) to be journaled.
+    """
+    return WhereaboutsUpdateRecord(
+        id=update.id,
+        party_id=party_id,
+        user_id=update.user.id,
+        whereabouts_id=update.whereabouts_id,
+        created_at=update.created_at,
+        client_id=update.client_id,
+        source_address=update.source_address,
+        idempotency_key=idempotency_key,
+    )
+
+
+def aggregate_update_batch(
+    records: Iterable[WhereaboutsUpdateRecord],
+    previous_statuses: dict[UserID, tuple[PartyID, WhereaboutsID, datetime]],
+) -> WhereaboutsUpdateBatchChanges:
+    """Combine the changes caused by a batch of updates, applied in
+    order of creation on top of the users' previous statuses.
+
+    An update that is not more recent than the user's status is kept as
+    history but does not change the status.
+    """
+    current_whereabouts = {
+        user_id: (party_id, whereabouts_id)
+        for user_id, (party_id, whereabouts_id, _) in previous_statuses.items()
+    }
+    current_set_ats = {
+        user_id: set_at for user_id, (_, _, set_at) in previous_statuses.items()
+    }
+
+    statuses: dict[UserID, tuple[WhereaboutsID, datetime]] = {}
+    occupancy_deltas: OccupancyDeltas = {}
+    stay_ends: dict[UserID, datetime] = {}
+    stays: list[tuple[WhereaboutsUpdateRecord, datetime | None]] = []
+    open_stay_indexes: dict[UserID, int] = {}
+    client_activity: dict[WhereaboutsClientID, datetime] = {}
+
+    for record in sorted(records, key=lambda r: (r.created_at, r.id)):
+        if record.client_id is not None:
+            client_activity[record.client_id] = record.created_at
+
+        set_at = current_set_ats.get(record.user_id)
+        if (set_at is not None) and (set_at >= record.created_at):
+            continue
+
+        previous_whereabouts = current_whereabouts.get(record.user_id)
+        new_whereabouts = (record.party_id, record.whereabouts_id)
+
+        deltas = get_occupancy_deltas(previous_whereabouts, new_whereabouts)
+        for key, delta in deltas.items():
+            occupancy_deltas[key] = occupancy_deltas.get(key, 0) + delta
+
+        if new_whereabouts != previous_whereabouts:
+            open_stay_index = open_stay_indexes.get(record.user_id)
+            if open_stay_index is None:
+                stay_ends[record.user_id] = record.created_at
+            else:
+                stays[open_stay_index] = (
+                    stays[open_stay_index][0],
+                    record.created_at,
+                )
+
+            open_stay_indexes[record.user_id] = len(stays)
+            stays.append((record, None))
+
+        current_whereabouts[record.user_id] = new_whereabouts
+        current_set_ats[record.user_id] = record.created_at
+        statuses[record.user_id] = (record.whereabouts_id, record.created_at)
+
+    return WhereaboutsUpdateBatchChanges(
+        statuses=statuses,
+        occupancy_deltas={
+            key: delta for key, delta in occupancy_deltas.items() if delta
+        },
+        stay_ends=stay_ends,
+        stays=stays,
+        client_activity=client_activity,
+    )
@@ -0,0 +1,174 @@
+"""
+byceps.services.whereabouts.whereabouts_export_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Export a party's whereabouts updates as CSV or NDJSON.
+
+Exports are produced incrementally, batch by batch, so they can be
+streamed to the client in constant memory regardless of the number of
+updates.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections.abc import Iterator
+import csv
+from datetime import datetime
+import io
+import itertools
+import json
+from typing import Any
+
+from byceps.services.party.models import Party
+from byceps.services.user import user_service
+from byceps.services.user.models.user import UserID
+
+from . import whereabouts_archive_service, whereabouts_repository
+from .models import WhereaboutsID
+
+
+EXPORT_BATCH_SIZE = 1000
+
+
+EXPORT_FIELD_NAMES = [
+    'id',
+    'created_at',
+    'user_id',
+    'user_screen_name',
+    'whereabouts_id',
+    'whereabouts_name',
+    'client_id',
+    'source_address',
+]
+
+
+def export_updates_as_csv(
+    party: Party,
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    whereabouts_id: WhereaboutsID | None = None,
+    user_id: UserID | None = None,
+) -> Iterator[str]:
+    """Yield the party's updates as CSV, one chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(EXPORT_FIELD_NAMES)
+    yield _drain(buffer)
+
+    for records in _get_record_batches(
+        party,
+        since=since,
+        until=until,
+        whereabouts_id=whereabouts_id,
+        user_id=user_id,
+    ):
+        writer.writerows(
+            [
+                ['' if value is None else value for value in record.values()]
+                for record in records
+            ]
+        )
+        yield _drain(buffer)
+
+
+def export_updates_as_ndjson(
+    party: Party,
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    whereabouts_id: WhereaboutsID | None = None,
+    user_id: UserID | None = None,
+) -> Iterator[str]:
+    """Yield the party's updates as newline-delimited JSON, one chunk
+    per batch.
+    """
+    for records in _get_record_batches(
+        party,
+        since=since,
+        until=until,
+        whereabouts_id=whereabouts_id,
+        user_id=user_id,
+    ):
+        yield ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def _get_record_batches(
+    party: Party,
+    *,
+    since: datetime | None,
+    until: datetime | None,
+    whereabouts_id: WhereaboutsID | None,
+    user_id: UserID | None,
+) -> Iterator[list[dict[str, Any]]]:
+    """Yield the updates as flat records, in batches.
+
+    Users are looked up once per batch, whereabouts once per export.
+    """
+    whereabouts_names_by_id = {
+        db_whereabouts.id: db_whereabouts.name
+        for db_whereabouts in whereabouts_repository.get_whereabouts_list(
+            party.id
+        )
+    }
+
+    # Archived updates are older than those still in the database.
+    batches = itertools.chain(
+        whereabouts_archive_service.get_archived_update_rows_in_batches(
+            party.id,
+            EXPORT_BATCH_SIZE,
+            since=since,
+            until=until,
+            whereabouts_id=whereabouts_id,
+            user_id=user_id,
+        ),
+        whereabouts_repository.get_update_export_rows_in_batches(
+            party.id,
+            EXPORT_BATCH_SIZE,
+            since=since,
+            until=until,
+            whereabouts_id=whereabouts_id,
+            user_id=user_id,
+        ),
+    )
+
+    for rows in batches:
+        batch_user_ids = {row[2] for row in rows}
+        users_by_id = user_service.get_users_indexed_by_id(
+            batch_user_ids, include_avatars=False
+        )
+
+        yield [
+            {
+                'id': str(update_id),
+                'created_at': created_at.isoformat(),
+                'user_id': str(row_user_id),
+                'user_screen_name': users_by_id[row_user_id].screen_name,
+                'whereabouts_id': str(row_whereabouts_id),
+                'whereabouts_name': whereabouts_names_by_id.get(
+                    row_whereabouts_id
+                ),
+                'client_id': str(client_id) if client_id else None,
+                'source_address': (
+                    str(source_address) if source_address else None
+                ),
+            }
+            for (
+                update_id,
+                created_at,
+                row_user_id,
+                row_whereabouts_id,
+                client_id,
+                source_address,
+            ) in rows
+        ]
+
+
+def _drain(buffer: io.StringIO) -> str:
+    """Return the buffer's content and empty it."""
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return value
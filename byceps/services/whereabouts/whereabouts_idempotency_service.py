@@ -0,0 +1,175 @@
+"""
+byceps.services.whereabouts.whereabouts_idempotency_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Recognize retried status updates.
+
+A client can identify an update by sending an idempotency key or by
+choosing the update's ID itself. Recently seen keys and IDs are kept in
+memory. Beyond that (and across processes), the database is consulted,
+in which idempotency keys and update IDs are unique.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import threading
+from uuid import UUID
+
+from sqlalchemy.exc import OperationalError
+
+from byceps.services.party.models import PartyID
+
+from . import whereabouts_outage_journal_service, whereabouts_repository
+from .models import WhereaboutsClientID
+
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+RECENT_KEYS_MAX = 10_000
+
+
+class DuplicateUpdateError(Exception):
+    """The update has been made before."""
+
+
+@dataclass(frozen=True, kw_only=True)
+class PreviousUpdate:
+    id: UUID
+    accepted_async: bool  # queued and acknowledged before being persisted
+
+
+# previous updates by client ID and idempotency key or update ID, least
+# recently used first
+_recent_keys: OrderedDict[
+    tuple[WhereaboutsClientID, str, str], PreviousUpdate
+] = OrderedDict()
+_recent_keys_lock = threading.Lock()
+
+
+def find_previous_update(
+    client_id: WhereaboutsClientID,
+    party_id: PartyID,
+    *,
+    idempotency_key: str | None = None,
+    update_id: UUID | None = None,
+) -> PreviousUpdate | None:
+    """Return the update the client has made before with that
+    idempotency key or update ID, if any.
+
+    Whether the update has been accepted asynchronously is only known
+    for recently seen keys and IDs. Updates found in the database are
+    reported as persisted synchronously.
+
+    If the database is unavailable (and the outage journal is enabled),
+    only recently seen keys and IDs are recognized. Retries of other
+    updates are journaled as well, and skipped when the journal is
+    replayed.
+    """
+    cache_key = _get_cache_key(client_id, idempotency_key, update_id)
+
+    with _recent_keys_lock:
+        previous_update = _recent_keys.get(cache_key)
+        if previous_update is not None:
+            _recent_keys.move_to_end(cache_key)
+            return previous_update
+
+    try:
+        previous_update_id = _find_update_id_in_db(
+            client_id, party_id, idempotency_key, update_id
+        )
+    except OperationalError:
+        if not whereabouts_outage_journal_service.is_enabled():
+            raise
+
+        whereabouts_repository.rollback()
+        return None
+
+    if previous_update_id is None:
+        return None
+
+    previous_update = PreviousUpdate(
+        id=previous_update_id, accepted_async=False
+    )
+    _remember(cache_key, previous_update)
+
+    return previous_update
+
+
+def remember_update(
+    client_id: WhereaboutsClientID,
+    update_id: UUID,
+    *,
+    idempotency_key: str | None = None,
+    accepted_async: bool = False,
+) -> None:
+    """Remember that the client has made the update (with that
+    idempotency key, if given).
+    """
+    cache_key = _get_cache_key(client_id, idempotency_key, update_id)
+    previous_update = PreviousUpdate(
+        id=update_id, accepted_async=accepted_async
+    )
+    _remember(cache_key, previous_update)
+
+
+def purge_idempotency_keys(max_age: timedelta) -> int:
+    """Delete recorded idempotency keys older than the maximum age.
+
+    Return the number of deleted keys.
+    """
+    cutoff = datetime.utcnow() - max_age
+    return whereabouts_repository.delete_idempotency_keys_created_before(cutoff)
+
+
+def clear_recent_keys() -> None:
+    """Forget the keys kept in memory."""
+    with _recent_keys_lock:
+        _recent_keys.clear()
+
+
+def _find_update_id_in_db(
+    client_id: WhereaboutsClientID,
+    party_id: PartyID,
+    idempotency_key: str | None,
+    update_id: UUID | None,
+) -> UUID | None:
+    if idempotency_key is not None:
+        return whereabouts_repository.find_update_id_for_idempotency_key(
+            client_id, idempotency_key
+        )
+
+    if (update_id is not None) and whereabouts_repository.has_update(
+        party_id, update_id
+    ):
+        return update_id
+
+    return None
+
+
+def _get_cache_key(
+    client_id: WhereaboutsClientID,
+    idempotency_key: str | None,
+    update_id: UUID | None,
+) -> tuple[WhereaboutsClientID, str, str]:
+    if idempotency_key is not None:
+        return client_id, 'key', idempotency_key
+
+    if update_id is not None:
+        return client_id, 'update_id', str(update_id)
+
+    raise ValueError('Either idempotency key or update ID is required')
+
+
+def _remember(
+    cache_key: tuple[WhereaboutsClientID, str, str],
+    previous_update: PreviousUpdate,
+) -> None:
+    with _recent_keys_lock:
+        _recent_keys[cache_key] = previous_update
+        _recent_keys.move_to_end(cache_key)
+        while len(_recent_keys) > RECENT_KEYS_MAX:
+            _recent_keys.popitem(last=False)
@@ -0,0 +1,93 @@
+"""
+byceps.services.whereabouts.whereabouts_occupancy_repository
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections.abc import Sequence
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import Insert, insert
+
+from byceps.database import db
+from byceps.services.party.models import PartyID
+
+from .dbmodels import DbWhereabouts, DbWhereaboutsOccupancy, DbWhereaboutsStatus
+from .models import OccupancyDeltas, WhereaboutsID
+
+
+def update_counts(deltas: OccupancyDeltas) -> None:
+    """Add the deltas to the occupancy counts.
+
+    The caller is expected to commit, so that the counts change in the
+    same transaction as the statuses they reflect.
+    """
+    for stmt in build_count_update_statements(deltas):
+        db.session.execute(stmt)
+
+
+def build_count_update_statements(deltas: OccupancyDeltas) -> list[Insert]:
+    """Return statements that add the deltas to the occupancy counts.
+
+    They are also part of the statements that persist a status update.
+    """
+    table = DbWhereaboutsOccupancy.__table__
+
+    return [
+        insert(table)
+        .values(
+            whereabouts_id=whereabouts_id,
+            party_id=party_id,
+            count=max(delta, 0),
+        )
+        .on_conflict_do_update(
+            index_elements=[table.c.whereabouts_id],
+            set_={'count': func.greatest(table.c.count + delta, 0)},
+        )
+        for (party_id, whereabouts_id), delta in deltas.items()
+    ]
+
+
+def get_counts(
+    party_id: PartyID,
+) -> Sequence[tuple[WhereaboutsID, str, int]]:
+    """Return the occupancy count of each of the party's whereabouts."""
+    return (
+        db.session.execute(
+            select(
+                DbWhereabouts.id,
+                DbWhereabouts.name,
+                func.coalesce(DbWhereaboutsOccupancy.count, 0),
+            )
+            .outerjoin(DbWhereaboutsOccupancy)
+            .filter(DbWhereabouts.party_id == party_id)
+            .order_by(DbWhereabouts.position)
+        )
+        .tuples()
+        .all()
+    )
+
+
+def rebuild_counts(party_id: PartyID) -> None:
+    """Recompute the party's occupancy counts from the statuses."""
+    db.session.execute(
+        delete(DbWhereaboutsOccupancy).filter_by(party_id=party_id)
+    )
+
+    db.session.execute(
+        insert(DbWhereaboutsOccupancy).from_select(
+            ['whereabouts_id', 'party_id', 'count'],
+            select(
+                DbWhereabouts.id,
+                DbWhereabouts.party_id,
+                func.count(DbWhereaboutsStatus.user_id),
+            )
+            .outerjoin(DbWhereaboutsStatus)
+            .filter(DbWhereabouts.party_id == party_id)
+            .group_by(DbWhereabouts.id, DbWhereabouts.party_id),
+        )
+    )
+
+    db.session.commit()
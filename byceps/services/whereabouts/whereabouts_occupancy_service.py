@@ -0,0 +1,92 @@
+"""
+byceps.services.whereabouts.whereabouts_occupancy_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Count how many users are at each whereabouts.
+
+The counts are maintained in the database along with status changes.
+Each process additionally keeps them in memory, applies its own
+changes there, and refreshes them from the database after a short time
+to pick up changes made by other processes.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import dataclasses
+import threading
+import time
+
+from byceps.services.party.models import Party, PartyID
+
+from . import whereabouts_occupancy_repository
+from .models import OccupancyDeltas, WhereaboutsOccupancy
+
+
+CACHE_TTL = 2  # seconds
+
+
+# occupancies and expiry (as monotonic time) by party ID
+_cache: dict[PartyID, tuple[list[WhereaboutsOccupancy], float]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_occupancies(party: Party) -> list[WhereaboutsOccupancy]:
+    """Return the number of users at each of the party's whereabouts."""
+    now = time.monotonic()
+
+    with _cache_lock:
+        cached = _cache.get(party.id)
+    if (cached is not None) and (cached[1] > now):
+        return cached[0]
+
+    rows = whereabouts_occupancy_repository.get_counts(party.id)
+    occupancies = [
+        WhereaboutsOccupancy(
+            whereabouts_id=whereabouts_id,
+            whereabouts_name=whereabouts_name,
+            count=count,
+        )
+        for whereabouts_id, whereabouts_name, count in rows
+    ]
+
+    with _cache_lock:
+        _cache[party.id] = (occupancies, now + CACHE_TTL)
+
+    return occupancies
+
+
+def apply_deltas(deltas: OccupancyDeltas) -> None:
+    """Apply already persisted changes to the counts in memory."""
+    with _cache_lock:
+        for party_id in {party_id for party_id, _ in deltas}:
+            cached = _cache.get(party_id)
+            if cached is None:
+                continue
+
+            occupancies, expires_at = cached
+            updated_occupancies = [
+                _apply_delta(
+                    occupancy,
+                    deltas.get((party_id, occupancy.whereabouts_id), 0),
+                )
+                for occupancy in occupancies
+            ]
+            _cache[party_id] = (updated_occupancies, expires_at)
+
+
+def _apply_delta(
+    occupancy: WhereaboutsOccupancy, delta: int
+) -> WhereaboutsOccupancy:
+    if delta == 0:
+        return occupancy
+
+    return dataclasses.replace(occupancy, count=max(occupancy.count + delta, 0))
+
+
+def rebuild_occupancies(party: Party) -> None:
+    """Recompute the party's counts from the users' statuses."""
+    whereabouts_occupancy_repository.rebuild_counts(party.id)
+
+    with _cache_lock:
+        _cache.pop(party.id, None)
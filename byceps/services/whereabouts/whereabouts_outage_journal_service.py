@@ -0,0 +1,141 @@
+"""
+byceps.services.whereabouts.whereabouts_outage_journal_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Keep status updates in a local journal while the database is
+unavailable, so they can be persisted once it is back.
+
+The journal is available if `WHEREABOUTS_OUTAGE_JOURNAL_PATH` is set to
+a local directory. Journaled updates are persisted by `whereabouts
+replay-outage-journal`.
+
+While the journal is enabled, the results of the lookups a status
+update requires (client, user, party, whereabouts) are remembered, so
+that updates of recently seen clients and users can still be accepted
+while the database is unavailable.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from pathlib import Path
+import threading
+from typing import Any, TypeVar
+
+from flask import current_app
+from sqlalchemy.exc import OperationalError
+
+from byceps.services.party.models import PartyID
+
+from . import whereabouts_domain_service, whereabouts_repository
+from .models import WhereaboutsUpdate
+from .whereabouts_update_journal import GroupCommitWriter, UpdateJournal
+
+
+T = TypeVar('T')
+
+
+RECENT_LOOKUPS_MAX = 10_000
+
+
+# writers by journal path, shared by the threads of this process
+_writers: dict[Path, GroupCommitWriter] = {}
+_writers_lock = threading.Lock()
+
+
+# results of lookups by key, least recently used first
+_recent_lookups: OrderedDict[Hashable, Any] = OrderedDict()
+_recent_lookups_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    """Return `True` if a journal directory is configured."""
+    return _get_journal_path() is not None
+
+
+def append_update(
+    update: WhereaboutsUpdate,
+    party_id: PartyID,
+    *,
+    idempotency_key: str | None = None,
+) -> None:
+    """Append the update (and its idempotency key, if any) to the
+    journal.
+
+    Return once it has been synced to disk, possibly together with
+    updates appended concurrently.
+    """
+    record = whereabouts_domain_service.create_update_record(
+        update, party_id, idempotency_key=idempotency_key
+    )
+
+    _get_writer().append([record])
+
+
+def look_up(key: Hashable, find: Callable[[], T | None]) -> T | None:
+    """Return the result of the lookup.
+
+    If the database is unavailable, return the result of the latest
+    successful lookup with the same key instead. Re-raise the error if
+    there is none, or if the journal is not enabled.
+    """
+    try:
+        result = find()
+    except OperationalError:
+        if not is_enabled():
+            raise
+
+        whereabouts_repository.rollback()
+
+        with _recent_lookups_lock:
+            if key in _recent_lookups:
+                _recent_lookups.move_to_end(key)
+                return _recent_lookups[key]
+
+        raise
+
+    if (result is not None) and is_enabled():
+        with _recent_lookups_lock:
+            _recent_lookups[key] = result
+            _recent_lookups.move_to_end(key)
+            while len(_recent_lookups) > RECENT_LOOKUPS_MAX:
+                _recent_lookups.popitem(last=False)
+
+    return result
+
+
+def clear_recent_lookups() -> None:
+    """Forget the remembered lookup results."""
+    with _recent_lookups_lock:
+        _recent_lookups.clear()
+
+
+def get_journal() -> UpdateJournal:
+    """Return the journal."""
+    return UpdateJournal(_get_configured_journal_path())
+
+
+def _get_writer() -> GroupCommitWriter:
+    path = _get_configured_journal_path()
+
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = GroupCommitWriter(UpdateJournal(path))
+
+    return writer
+
+
+def _get_configured_journal_path() -> Path:
+    path = _get_journal_path()
+    if path is None:
+        raise ValueError('No whereabouts outage journal path configured')
+
+    return path
+
+
+def _get_journal_path() -> Path | None:
+    value = current_app.config.get('WHEREABOUTS_OUTAGE_JOURNAL_PATH')
+    return Path(value) if value else None
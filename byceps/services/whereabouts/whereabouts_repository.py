@@ -6,27 +6,73 @@ byceps.services.whereabouts.whereabouts_repository
 :License: Revised BSD (see `LICENSE` file for details)
 """
 
-from collections.abc import Sequence
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime
+import ipaddress
+from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import (
+    bindparam,
+    case,
+    cast,
+    delete,
+    Executable,
+    func,
+    Select,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import undefer
 
-from byceps.database import db, execute_upsert
+from byceps.database import db
 from byceps.services.party.models import PartyID
 from byceps.services.user.models.user import UserID
 
+from . import (
+    whereabouts_occupancy_repository,
+    whereabouts_stay_repository,
+    whereabouts_update_partition_repository,
+)
 from .dbmodels import (
     DbWhereabouts,
+    DbWhereaboutsClientLivelinessStatus,
+    DbWhereaboutsIdempotencyKey,
     DbWhereaboutsStatus,
     DbWhereaboutsUpdate,
 )
 from .models import (
+    IPAddress,
+    OccupancyDeltas,
     Whereabouts,
+    WhereaboutsClientID,
     WhereaboutsID,
     WhereaboutsStatus,
+    WhereaboutsStatusDiff,
     WhereaboutsUpdate,
+    WhereaboutsUpdateBatchChanges,
+    WhereaboutsUpdateRecord,
 )
 
 
+STATUS_REBUILD_CHUNK_SIZE = 1000
+
+
+# columns (and their types) of updates to stream via `COPY`
+UPDATE_COPY_COLUMNS = [
+    ('id', 'uuid'),
+    ('party_id', 'text'),
+    ('user_id', 'uuid'),
+    ('whereabouts_id', 'uuid'),
+    ('created_at', 'timestamp'),
+    ('client_id', 'uuid'),
+    ('source_address', 'inet'),
+]
+
+
 # -------------------------------------------------------------------- #
 # whereabouts
 
@@ -44,6 +90,13 @@ def create_whereabouts(whereabouts: Whereabouts) -> None:
     )
 
     db.session.add(db_whereabouts)
+
+    # Updates are stored in a partition per party, created along with
+    # the party's first whereabouts.
+    whereabouts_update_partition_repository.create_partition(
+        whereabouts.party.id, commit=False
+    )
+
     db.session.commit()
 
 
@@ -82,36 +135,386 @@ def get_whereabouts_list(party_id: PartyID) -> Sequence[DbWhereabouts]:
     ).all()
 
 
+def get_whereabouts_for_ids(
+    whereabouts_ids: set[WhereaboutsID],
+) -> Sequence[DbWhereabouts]:
+    """Return the whereabouts with those IDs."""
+    if not whereabouts_ids:
+        return []
+
+    return db.session.scalars(
+        select(DbWhereabouts).filter(DbWhereabouts.id.in_(whereabouts_ids))
+    ).all()
+
+
 # -------------------------------------------------------------------- #
 # status
 
 
+def lock_status(user_id: UserID) -> tuple[PartyID, WhereaboutsID] | None:
+    """Return party and whereabouts of the user's current status, if
+    any, and lock the status until the end of the transaction.
+
+    The lock is held even if the user has no status yet.
+    """
+    db.session.execute(build_status_advisory_lock_statement(user_id))
+
+    return (
+        db.session.execute(build_status_lock_statement(user_id))
+        .tuples()
+        .one_or_none()
+    )
+
+
+def build_status_advisory_lock_statement(user_id: UserID) -> Select:
+    """Return a statement that takes an advisory lock on the user's
+    status until the end of the transaction.
+
+    Unlike a row lock, this also serializes setting a user's first
+    status, for which there is no row to lock yet.
+    """
+    return select(func.pg_advisory_xact_lock(_get_status_lock_key(user_id)))
+
+
+def _get_status_lock_key(user_id: UserID) -> int:
+    """Derive a (signed 64-bit) advisory lock key from the user ID."""
+    return int.from_bytes(user_id.bytes[8:], 'big', signed=True)
+
+
+def build_status_lock_statement(user_id: UserID) -> Select:
+    """Return a statement that selects party and whereabouts of the
+    user's current status, and locks the status.
+    """
+    return (
+        select(DbWhereabouts.party_id, DbWhereaboutsStatus.whereabouts_id)
+        .join(DbWhereabouts)
+        .filter(DbWhereaboutsStatus.user_id == user_id)
+        .with_for_update(of=DbWhereaboutsStatus)
+    )
+
+
 def persist_update(
-    status: WhereaboutsStatus, update: WhereaboutsUpdate
+    status: WhereaboutsStatus,
+    update: WhereaboutsUpdate,
+    occupancy_deltas: OccupancyDeltas,
+    *,
+    party_id: PartyID,
+    starts_stay: bool,
+    idempotency_key: str | None = None,
 ) -> None:
+    statements = build_update_persistence_statements(
+        status,
+        update,
+        occupancy_deltas,
+        party_id=party_id,
+        starts_stay=starts_stay,
+        idempotency_key=idempotency_key,
+    )
+
+    for stmt in statements:
+        db.session.execute(stmt)
+
+    db.session.commit()
+
+
+def build_update_persistence_statements(
+    status: WhereaboutsStatus,
+    update: WhereaboutsUpdate,
+    occupancy_deltas: OccupancyDeltas,
+    *,
+    party_id: PartyID,
+    starts_stay: bool,
+    idempotency_key: str | None = None,
+) -> list[Executable]:
+    """Return the statements that persist a status update, to be
+    executed in a single transaction.
+
+    If an idempotency key is given, it is recorded along with the
+    update. Executing the statements fails if the client has used the
+    key before, as does reusing an update ID.
+    """
+    statements: list[Executable] = []
+
     # status
-    table = DbWhereaboutsStatus.__table__
-    identifier = {
-        'user_id': status.user.id,
-    }
-    replacement = {
-        'whereabouts_id': status.whereabouts_id,
-        'set_at': status.set_at,
-    }
-    execute_upsert(table, identifier, replacement)
+    status_table = DbWhereaboutsStatus.__table__
+    statements.append(
+        insert(status_table)
+        .values(
+            user_id=status.user.id,
+            whereabouts_id=status.whereabouts_id,
+            set_at=status.set_at,
+        )
+        .on_conflict_do_update(
+            index_elements=[status_table.c.user_id],
+            set_={
+                'whereabouts_id': status.whereabouts_id,
+                'set_at': status.set_at,
+            },
+        )
+    )
 
     # update
-    db_update = DbWhereaboutsUpdate(
-        update.id,
-        update.user.id,
-        update.whereabouts_id,
-        update.created_at,
-        update.source_address,
+    statements.append(
+        insert(DbWhereaboutsUpdate.__table__).values(
+            id=update.id,
+            party_id=party_id,
+            user_id=update.user.id,
+            whereabouts_id=update.whereabouts_id,
+            created_at=update.created_at,
+            client_id=update.client_id,
+            source_address=(
+                str(update.source_address) if update.source_address else None
+            ),
+        )
+    )
+
+    # idempotency key
+    if (idempotency_key is not None) and (update.client_id is not None):
+        statements.append(
+            insert(DbWhereaboutsIdempotencyKey.__table__).values(
+                client_id=update.client_id,
+                key=idempotency_key,
+                update_id=update.id,
+                created_at=update.created_at,
+            )
+        )
+
+    # occupancies
+    statements.extend(
+        whereabouts_occupancy_repository.build_count_update_statements(
+            occupancy_deltas
+        )
+    )
+
+    # stays
+    if starts_stay:
+        statements.extend(
+            whereabouts_stay_repository.build_stay_start_statements(
+                party_id, update
+            )
+        )
+
+    return statements
+
+
+def insert_update_records(
+    records: Sequence[WhereaboutsUpdateRecord],
+) -> set[UUID]:
+    """Insert the updates with a multi-row statement, skipping those
+    that already exist.
+
+    Return the IDs of the inserted updates. The caller is expected to
+    commit.
+    """
+    if not records:
+        return set()
+
+    table = DbWhereaboutsUpdate.__table__
+
+    return set(
+        db.session.scalars(
+            insert(table)
+            .values(
+                [
+                    {
+                        'id': record.id,
+                        'party_id': record.party_id,
+                        'user_id': record.user_id,
+                        'whereabouts_id': record.whereabouts_id,
+                        'created_at': record.created_at,
+                        'client_id': record.client_id,
+                        'source_address': (
+                            str(record.source_address)
+                            if record.source_address
+                            else None
+                        ),
+                    }
+                    for record in records
+                ]
+            )
+            .on_conflict_do_nothing()
+            .returning(table.c.id)
+        ).all()
+    )
+
+
+def insert_idempotency_keys(
+    records: Sequence[WhereaboutsUpdateRecord],
+) -> set[UUID]:
+    """Record the idempotency keys the updates have been made with,
+    skipping keys already recorded.
+
+    Return the IDs of the updates whose keys have been recorded. The
+    caller is expected to commit.
+    """
+    rows = [
+        {
+            'client_id': record.client_id,
+            'key': record.idempotency_key,
+            'update_id': record.id,
+            'created_at': record.created_at,
+        }
+        for record in records
+        if (record.idempotency_key is not None)
+        and (record.client_id is not None)
+    ]
+
+    if not rows:
+        return set()
+
+    table = DbWhereaboutsIdempotencyKey.__table__
+
+    return set(
+        db.session.scalars(
+            insert(table)
+            .values(rows)
+            .on_conflict_do_nothing()
+            .returning(table.c.update_id)
+        ).all()
+    )
+
+
+def lock_statuses(
+    user_ids: set[UserID],
+) -> dict[UserID, tuple[PartyID, WhereaboutsID, datetime]]:
+    """Return party, whereabouts, and time of the users' current
+    statuses, and lock them until the end of the transaction.
+
+    The locks are held even for users that have no status yet.
+    """
+    if not user_ids:
+        return {}
+
+    # Take advisory locks in a consistent order to avoid deadlocks.
+    for lock_key in sorted(map(_get_status_lock_key, user_ids)):
+        db.session.execute(select(func.pg_advisory_xact_lock(lock_key)))
+
+    rows = db.session.execute(
+        select(
+            DbWhereaboutsStatus.user_id,
+            DbWhereabouts.party_id,
+            DbWhereaboutsStatus.whereabouts_id,
+            DbWhereaboutsStatus.set_at,
+        )
+        .join(DbWhereabouts)
+        .filter(DbWhereaboutsStatus.user_id.in_(user_ids))
+        .order_by(DbWhereaboutsStatus.user_id)
+        .with_for_update(of=DbWhereaboutsStatus)
+    ).tuples()
+
+    return {
+        user_id: (party_id, whereabouts_id, set_at)
+        for user_id, party_id, whereabouts_id, set_at in rows
+    }
+
+
+def persist_update_batch_changes(
+    changes: WhereaboutsUpdateBatchChanges,
+) -> None:
+    """Apply the changes caused by a batch of updates with multi-row
+    statements, and commit.
+    """
+    # statuses
+    if changes.statuses:
+        status_table = DbWhereaboutsStatus.__table__
+        stmt = insert(status_table).values(
+            [
+                {
+                    'user_id': user_id,
+                    'whereabouts_id': whereabouts_id,
+                    'set_at': set_at,
+                }
+                for user_id, (
+                    whereabouts_id,
+                    set_at,
+                ) in changes.statuses.items()
+            ]
+        )
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[status_table.c.user_id],
+                set_={
+                    'whereabouts_id': stmt.excluded.whereabouts_id,
+                    'set_at': stmt.excluded.set_at,
+                },
+            )
+        )
+
+    # occupancies
+    whereabouts_occupancy_repository.update_counts(changes.occupancy_deltas)
+
+    # stays
+    whereabouts_stay_repository.end_stays(changes.stay_ends)
+    whereabouts_stay_repository.insert_stays(changes.stays)
+
+    # client liveliness
+    if changes.client_activity:
+        liveliness_table = DbWhereaboutsClientLivelinessStatus.__table__
+        db.session.execute(
+            update(liveliness_table)
+            .where(liveliness_table.c.client_id == bindparam('b_client_id'))
+            .where(
+                liveliness_table.c.latest_activity_at
+                < bindparam('b_latest_activity_at')
+            )
+            .values(
+                signed_on=True,
+                latest_activity_at=bindparam('b_latest_activity_at'),
+            ),
+            [
+                {
+                    'b_client_id': client_id,
+                    'b_latest_activity_at': latest_activity_at,
+                }
+                for client_id, latest_activity_at in (
+                    changes.client_activity.items()
+                )
+            ],
+        )
+
+    db.session.commit()
+
+
+def has_update(party_id: PartyID, update_id: UUID) -> bool:
+    """Return `True` if the party has an update with that ID."""
+    return (
+        db.session.scalar(
+            select(DbWhereaboutsUpdate.id)
+            .filter(DbWhereaboutsUpdate.party_id == party_id)
+            .filter(DbWhereaboutsUpdate.id == update_id)
+        )
+        is not None
+    )
+
+
+def find_update_id_for_idempotency_key(
+    client_id: WhereaboutsClientID, key: str
+) -> UUID | None:
+    """Return the ID of the update the client has sent along with that
+    idempotency key, if any.
+    """
+    return db.session.scalar(
+        select(DbWhereaboutsIdempotencyKey.update_id)
+        .filter_by(client_id=client_id)
+        .filter_by(key=key)
+    )
+
+
+def delete_idempotency_keys_created_before(cutoff: datetime) -> int:
+    """Delete idempotency keys created before the cutoff.
+
+    Return the number of deleted keys.
+    """
+    result = db.session.execute(
+        delete(DbWhereaboutsIdempotencyKey).filter(
+            DbWhereaboutsIdempotencyKey.created_at < cutoff
+        )
     )
-    db.session.add(db_update)
 
     db.session.commit()
 
+    return result.rowcount
+
 
 def find_status(
     user_id: UserID, party_id: PartyID
@@ -132,3 +535,547 @@ def get_statuses(party_id: PartyID) -> Sequence[DbWhereaboutsStatus]:
         .join(DbWhereabouts)
         .filter(DbWhereabouts.party_id == party_id)
     ).all()
+
+
+def get_status_rows_as_of(
+    party_id: PartyID, at: datetime
+) -> Sequence[tuple[UserID, WhereaboutsID, datetime]]:
+    """Return the user statuses as they were at the given time,
+    reconstructed from the updates.
+
+    Uses `DISTINCT ON (user_id)` to pick each user's latest update up to
+    that time, which the `(user_id, created_at)` index on updates
+    serves.
+    """
+    return (
+        db.session.execute(
+            select(
+                DbWhereaboutsUpdate.user_id,
+                DbWhereaboutsUpdate.whereabouts_id,
+                DbWhereaboutsUpdate.created_at,
+            )
+            .filter(DbWhereaboutsUpdate.party_id == party_id)
+            .filter(DbWhereaboutsUpdate.created_at <= at)
+            .distinct(DbWhereaboutsUpdate.user_id)
+            .order_by(
+                DbWhereaboutsUpdate.user_id,
+                DbWhereaboutsUpdate.created_at.desc(),
+                DbWhereaboutsUpdate.id.desc(),
+            )
+        )
+        .tuples()
+        .all()
+    )
+
+
+def get_status_rows(
+    party_id: PartyID,
+    limit: int,
+    *,
+    since: datetime | None = None,
+    after: tuple[datetime, UserID] | None = None,
+) -> Sequence[tuple[UserID, WhereaboutsID, datetime]]:
+    """Return user statuses as plain rows, ordered by time of setting
+    and user ID to allow for keyset pagination.
+    """
+    stmt = (
+        select(
+            DbWhereaboutsStatus.user_id,
+            DbWhereaboutsStatus.whereabouts_id,
+            DbWhereaboutsStatus.set_at,
+        )
+        .join(DbWhereabouts)
+        .filter(DbWhereabouts.party_id == party_id)
+    )
+
+    if since is not None:
+        stmt = stmt.filter(DbWhereaboutsStatus.set_at >= since)
+
+    if after is not None:
+        stmt = stmt.filter(
+            tuple_(DbWhereaboutsStatus.set_at, DbWhereaboutsStatus.user_id)
+            > tuple_(*after)
+        )
+
+    stmt = stmt.order_by(
+        DbWhereaboutsStatus.set_at, DbWhereaboutsStatus.user_id
+    ).limit(limit)
+
+    return db.session.execute(stmt).tuples().all()
+
+
+def get_status_rows_for_rebuild(
+    party_id: PartyID, user_ids: set[UserID]
+) -> dict[UserID, tuple[PartyID, WhereaboutsID, datetime]]:
+    """Return the stored statuses at the party, and those (at any party)
+    of the given users.
+    """
+    stmt = select(
+        DbWhereaboutsStatus.user_id,
+        DbWhereabouts.party_id,
+        DbWhereaboutsStatus.whereabouts_id,
+        DbWhereaboutsStatus.set_at,
+    ).join(DbWhereabouts)
+
+    statuses = {}
+
+    rows = db.session.execute(
+        stmt.filter(DbWhereabouts.party_id == party_id)
+    ).tuples()
+    for user_id, *status in rows:
+        statuses[user_id] = tuple(status)
+
+    user_ids_list = list(user_ids)
+    for i in range(0, len(user_ids_list), STATUS_REBUILD_CHUNK_SIZE):
+        chunk = user_ids_list[i : i + STATUS_REBUILD_CHUNK_SIZE]
+        rows = db.session.execute(
+            stmt.filter(DbWhereaboutsStatus.user_id.in_(chunk))
+        ).tuples()
+        for user_id, *status in rows:
+            statuses[user_id] = tuple(status)
+
+    return statuses
+
+
+def apply_status_diff(diff: WhereaboutsStatusDiff) -> None:
+    """Insert, update, and delete statuses in bulk, in a single
+    transaction.
+    """
+    rows = [
+        {
+            'user_id': user_id,
+            'whereabouts_id': whereabouts_id,
+            'set_at': set_at,
+        }
+        for user_id, whereabouts_id, set_at in diff.added + diff.changed
+    ]
+
+    table = DbWhereaboutsStatus.__table__
+    for i in range(0, len(rows), STATUS_REBUILD_CHUNK_SIZE):
+        stmt = insert(table).values(rows[i : i + STATUS_REBUILD_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={
+                'whereabouts_id': stmt.excluded.whereabouts_id,
+                'set_at': stmt.excluded.set_at,
+            },
+        )
+        db.session.execute(stmt)
+
+    for i in range(0, len(diff.removed), STATUS_REBUILD_CHUNK_SIZE):
+        chunk = diff.removed[i : i + STATUS_REBUILD_CHUNK_SIZE]
+        db.session.execute(
+            delete(DbWhereaboutsStatus).filter(
+                DbWhereaboutsStatus.user_id.in_(chunk)
+            )
+        )
+
+    db.session.commit()
+
+
+# -------------------------------------------------------------------- #
+# updates
+
+
+def copy_update_records(
+    records: Iterable[WhereaboutsUpdateRecord],
+    *,
+    skip_existing: bool = False,
+    commit: bool = True,
+) -> int:
+    """Stream the updates into the database via `COPY ... FROM STDIN`
+    (in binary format).
+
+    This is much faster than inserting them one by one and meant for
+    bulk loads (backfills, restores, generated datasets). Statuses,
+    occupancies, and stays are not touched.
+
+    Unless existing updates are to be skipped, the copy fails if any of
+    the updates already exists. Skipping them requires copying into a
+    temporary table first.
+
+    Requires psycopg (3) as database driver.
+
+    Return the number of inserted updates.
+    """
+    column_names = ', '.join(name for name, _ in UPDATE_COPY_COLUMNS)
+    column_types = [type_name for _, type_name in UPDATE_COPY_COLUMNS]
+
+    if skip_existing:
+        db.session.execute(
+            text(
+                'CREATE TEMPORARY TABLE whereabouts_updates_copy '
+                '(LIKE whereabouts_updates)'
+            )
+        )
+        target_table_name = 'whereabouts_updates_copy'
+    else:
+        target_table_name = DbWhereaboutsUpdate.__tablename__
+
+    dbapi_connection = db.session.connection().connection.dbapi_connection
+
+    count = 0
+    with dbapi_connection.cursor() as cursor:
+        with cursor.copy(
+            f'COPY {target_table_name} ({column_names}) '
+            'FROM STDIN (FORMAT BINARY)'
+        ) as copy:
+            copy.set_types(column_types)
+            for record in records:
+                copy.write_row(
+                    (
+                        record.id,
+                        record.party_id,
+                        record.user_id,
+                        record.whereabouts_id,
+                        record.created_at,
+                        record.client_id,
+                        record.source_address,
+                    )
+                )
+                count += 1
+
+    if skip_existing:
+        count = _insert_copied_updates()
+
+    if commit:
+        db.session.commit()
+
+    return count
+
+
+def _insert_copied_updates() -> int:
+    column_names = ', '.join(name for name, _ in UPDATE_COPY_COLUMNS)
+
+    result = db.session.execute(
+        text(
+            f'INSERT INTO {DbWhereaboutsUpdate.__tablename__} '
+            f'({column_names}) '
+            f'SELECT {column_names} FROM whereabouts_updates_copy '
+            'ON CONFLICT DO NOTHING'
+        )
+    )
+    db.session.execute(text('DROP TABLE whereabouts_updates_copy'))
+
+    return result.rowcount
+
+
+def add_update_records_individually(
+    records: Iterable[WhereaboutsUpdateRecord],
+) -> None:
+    """Add the updates one ORM object at a time, and flush.
+
+    This is slow; it serves as a baseline for benchmarks.
+    """
+    for record in records:
+        db.session.add(
+            DbWhereaboutsUpdate(
+                record.id,
+                record.party_id,
+                record.user_id,
+                record.whereabouts_id,
+                record.created_at,
+                record.client_id,
+                record.source_address,
+            )
+        )
+
+    db.session.flush()
+
+
+def rollback() -> None:
+    """Discard uncommitted changes."""
+    db.session.rollback()
+
+
+def get_update_rows_after(
+    party_id: PartyID, after_update_id: UUID | None, limit: int
+) -> Sequence[tuple[UUID, UserID, WhereaboutsID, datetime]]:
+    """Return the party's updates following the given one (or from the
+    start), in order of update ID.
+    """
+    stmt = select(
+        DbWhereaboutsUpdate.id,
+        DbWhereaboutsUpdate.user_id,
+        DbWhereaboutsUpdate.whereabouts_id,
+        DbWhereaboutsUpdate.created_at,
+    ).filter(DbWhereaboutsUpdate.party_id == party_id)
+
+    if after_update_id is not None:
+        stmt = stmt.filter(DbWhereaboutsUpdate.id > after_update_id)
+
+    stmt = stmt.order_by(DbWhereaboutsUpdate.id).limit(limit)
+
+    return db.session.execute(stmt).tuples().all()
+
+
+def get_update_counts_per_minute_for_client(
+    client_id: WhereaboutsClientID, since: datetime
+) -> Sequence[tuple[datetime, int]]:
+    """Return the number of updates sent by the client per minute."""
+    minute = func.date_trunc('minute', DbWhereaboutsUpdate.created_at)
+
+    return (
+        db.session.execute(
+            select(minute, func.count(DbWhereaboutsUpdate.id))
+            .filter(DbWhereaboutsUpdate.client_id == client_id)
+            .filter(DbWhereaboutsUpdate.created_at >= since)
+            .group_by(minute)
+            .order_by(minute)
+        )
+        .tuples()
+        .all()
+    )
+
+
+def get_latest_updates_for_client(
+    client_id: WhereaboutsClientID, limit: int
+) -> Sequence[DbWhereaboutsUpdate]:
+    """Return the most recent updates sent by the client."""
+    return db.session.scalars(
+        select(DbWhereaboutsUpdate)
+        .options(undefer(DbWhereaboutsUpdate._source_address))
+        .filter(DbWhereaboutsUpdate.client_id == client_id)
+        .order_by(DbWhereaboutsUpdate.created_at.desc())
+        .limit(limit)
+    ).all()
+
+
+def get_updates_for_user(
+    user_id: UserID,
+    party_id: PartyID,
+    limit: int,
+    *,
+    after: UUID | None = None,
+) -> Sequence[DbWhereaboutsUpdate]:
+    """Return the user's updates for the party, newest first.
+
+    Pagination is keyset-based: Pass the ID of the last update of the
+    previous page as `after` to get the next page.
+    """
+    stmt = (
+        select(DbWhereaboutsUpdate)
+        .filter(DbWhereaboutsUpdate.party_id == party_id)
+        .filter(DbWhereaboutsUpdate.user_id == user_id)
+    )
+
+    if after is not None:
+        after_created_at = db.session.scalar(
+            select(DbWhereaboutsUpdate.created_at).filter_by(
+                party_id=party_id, id=after
+            )
+        )
+        if after_created_at is None:
+            return []
+
+        stmt = stmt.filter(
+            tuple_(DbWhereaboutsUpdate.created_at, DbWhereaboutsUpdate.id)
+            < tuple_(after_created_at, after)
+        )
+
+    return db.session.scalars(
+        stmt.order_by(
+            DbWhereaboutsUpdate.created_at.desc(),
+            DbWhereaboutsUpdate.id.desc(),
+        ).limit(limit)
+    ).all()
+
+
+def get_update_rows_in_batches(
+    party_id: PartyID, batch_size: int
+) -> Iterator[Sequence[tuple[UserID, WhereaboutsID, datetime]]]:
+    """Yield the party's updates as plain rows, in batches.
+
+    Rows are fetched through a server-side cursor, so memory usage does
+    not depend on the total number of updates.
+    """
+    result = db.session.execute(
+        select(
+            DbWhereaboutsUpdate.user_id,
+            DbWhereaboutsUpdate.whereabouts_id,
+            DbWhereaboutsUpdate.created_at,
+        )
+        .filter(DbWhereaboutsUpdate.party_id == party_id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    yield from result.tuples().partitions()
+
+
+def get_update_export_rows_in_batches(
+    party_id: PartyID,
+    batch_size: int,
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    whereabouts_id: WhereaboutsID | None = None,
+    user_id: UserID | None = None,
+) -> Iterator[
+    Sequence[
+        tuple[
+            UUID,
+            datetime,
+            UserID,
+            WhereaboutsID,
+            WhereaboutsClientID | None,
+            IPAddress | None,
+        ]
+    ]
+]:
+    """Yield the party's updates matching the filters as plain rows, in
+    batches, ordered by creation time.
+
+    Rows are fetched through a server-side cursor, so memory usage does
+    not depend on the total number of updates.
+    """
+    stmt = select(
+        DbWhereaboutsUpdate.id,
+        DbWhereaboutsUpdate.created_at,
+        DbWhereaboutsUpdate.user_id,
+        DbWhereaboutsUpdate.whereabouts_id,
+        DbWhereaboutsUpdate.client_id,
+        DbWhereaboutsUpdate._source_address,
+    ).filter(DbWhereaboutsUpdate.party_id == party_id)
+
+    if since is not None:
+        stmt = stmt.filter(DbWhereaboutsUpdate.created_at >= since)
+
+    if until is not None:
+        stmt = stmt.filter(DbWhereaboutsUpdate.created_at < until)
+
+    if whereabouts_id is not None:
+        stmt = stmt.filter(DbWhereaboutsUpdate.whereabouts_id == whereabouts_id)
+
+    if user_id is not None:
+        stmt = stmt.filter(DbWhereaboutsUpdate.user_id == user_id)
+
+    result = db.session.execute(
+        stmt.order_by(
+            DbWhereaboutsUpdate.created_at, DbWhereaboutsUpdate.id
+        ).execution_options(yield_per=batch_size)
+    )
+
+    for rows in result.tuples().partitions():
+        yield [_to_update_row(row) for row in rows]
+
+
+def get_oldest_update_rows(
+    party_id: PartyID, limit: int
+) -> Sequence[
+    tuple[
+        UUID,
+        datetime,
+        UserID,
+        WhereaboutsID,
+        WhereaboutsClientID | None,
+        IPAddress | None,
+    ]
+]:
+    """Return the party's oldest updates as plain rows, in order of
+    update ID.
+    """
+    rows = db.session.execute(
+        select(
+            DbWhereaboutsUpdate.id,
+            DbWhereaboutsUpdate.created_at,
+            DbWhereaboutsUpdate.user_id,
+            DbWhereaboutsUpdate.whereabouts_id,
+            DbWhereaboutsUpdate.client_id,
+            DbWhereaboutsUpdate._source_address,
+        )
+        .filter(DbWhereaboutsUpdate.party_id == party_id)
+        .order_by(DbWhereaboutsUpdate.id)
+        .limit(limit)
+    ).tuples()
+
+    return [_to_update_row(row) for row in rows]
+
+
+def _to_update_row(
+    row: tuple[
+        UUID,
+        datetime,
+        UserID,
+        WhereaboutsID,
+        WhereaboutsClientID | None,
+        str | None,
+    ],
+) -> tuple[
+    UUID,
+    datetime,
+    UserID,
+    WhereaboutsID,
+    WhereaboutsClientID | None,
+    IPAddress | None,
+]:
+    """Parse the source address of a plain update row.
+
+    The address column is selected directly, as the model's hybrid
+    property has no SQL expression.
+    """
+    update_id, created_at, user_id, whereabouts_id, client_id, address = row
+
+    return (
+        update_id,
+        created_at,
+        user_id,
+        whereabouts_id,
+        client_id,
+        ipaddress.ip_address(address) if address else None,
+    )
+
+
+def delete_updates(party_id: PartyID, update_ids: list[UUID]) -> None:
+    """Delete the party's updates with those IDs."""
+    db.session.execute(
+        delete(DbWhereaboutsUpdate)
+        .filter(DbWhereaboutsUpdate.party_id == party_id)
+        .filter(DbWhereaboutsUpdate.id.in_(update_ids))
+    )
+    db.session.commit()
+
+
+def anonymize_source_addresses(
+    party_id: PartyID, *, truncate: bool, limit: int
+) -> int:
+    """Remove (or truncate to their network prefix) the source addresses
+    of up to `limit` of the party's updates, and commit.
+
+    Addresses are truncated to /24 (IPv4) or /48 (IPv6).
+
+    Return the number of updates changed. Zero means there is nothing
+    left to do.
+    """
+    column = DbWhereaboutsUpdate._source_address
+
+    truncated = cast(
+        func.host(
+            func.network(
+                func.set_masklen(
+                    column, case((func.family(column) == 4, 24), else_=48)
+                )
+            )
+        ),
+        postgresql.INET,
+    )
+
+    chunk_stmt = (
+        select(DbWhereaboutsUpdate.id)
+        .filter(DbWhereaboutsUpdate.party_id == party_id)
+        .filter(column.is_not(None))
+    )
+    if truncate:
+        chunk_stmt = chunk_stmt.filter(column != truncated)
+    chunk_stmt = chunk_stmt.limit(limit)
+
+    result = db.session.execute(
+        update(DbWhereaboutsUpdate)
+        .filter(DbWhereaboutsUpdate.party_id == party_id)
+        .filter(DbWhereaboutsUpdate.id.in_(chunk_stmt.scalar_subquery()))
+        .values({column: truncated if truncate else None})
+        .execution_options(synchronize_session=False)
+    )
+
+    db.session.commit()
+
+    return result.rowcount
@@ -0,0 +1,104 @@
+"""
+byceps.services.whereabouts.whereabouts_rollup_domain_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from byceps.services.user.models.user import UserID
+
+from .models import WhereaboutsID, WhereaboutsOccupancyMinute
+
+
+# arrivals and departures by whereabouts ID and minute
+TransitionCounts = dict[tuple[WhereaboutsID, datetime], tuple[int, int]]
+
+
+def truncate_to_minute(dt: datetime) -> datetime:
+    return dt.replace(second=0, microsecond=0)
+
+
+def count_transitions(
+    updates: Iterable[tuple[UserID, WhereaboutsID, datetime]],
+    previous_whereabouts_ids: dict[UserID, WhereaboutsID],
+) -> TransitionCounts:
+    """Count arrivals and departures per whereabouts and minute.
+
+    Updates must be ordered chronologically. Previous whereabouts are
+    the users' whereabouts before the first of the updates.
+
+    An update to the whereabouts the user is already at is not a
+    transition.
+    """
+    current_whereabouts_ids = dict(previous_whereabouts_ids)
+    counts: defaultdict[tuple[WhereaboutsID, datetime], list[int]] = (
+        defaultdict(lambda: [0, 0])
+    )
+
+    for user_id, whereabouts_id, created_at in updates:
+        previous_whereabouts_id = current_whereabouts_ids.get(user_id)
+        if whereabouts_id == previous_whereabouts_id:
+            continue
+
+        minute = truncate_to_minute(created_at)
+
+        counts[whereabouts_id, minute][0] += 1
+        if previous_whereabouts_id is not None:
+            counts[previous_whereabouts_id, minute][1] += 1
+
+        current_whereabouts_ids[user_id] = whereabouts_id
+
+    return {
+        key: (arrivals, departures)
+        for key, (arrivals, departures) in counts.items()
+    }
+
+
+def build_occupancy_minutes(
+    transition_counts: Iterable[tuple[datetime, int, int]],
+    occupancy_before_start: int,
+    start: datetime,
+    end: datetime,
+) -> list[WhereaboutsOccupancyMinute]:
+    """Return occupancy, arrivals, and departures for every minute from
+    start to end (inclusive).
+
+    Transition counts (minute, arrivals, departures) outside of that
+    period are ignored. The occupancy is the running total of the
+    counts, beginning with the occupancy before the start.
+    """
+    start = truncate_to_minute(start)
+    end = truncate_to_minute(end)
+
+    counts_by_minute = {
+        minute: (arrivals, departures)
+        for minute, arrivals, departures in transition_counts
+        if start <= minute <= end
+    }
+
+    occupancy_minutes = []
+    occupancy = occupancy_before_start
+    minute = start
+    while minute <= end:
+        arrivals, departures = counts_by_minute.get(minute, (0, 0))
+        occupancy += arrivals - departures
+
+        occupancy_minutes.append(
+            WhereaboutsOccupancyMinute(
+                minute=minute,
+                occupancy=occupancy,
+                arrivals=arrivals,
+                departures=departures,
+            )
+        )
+
+        minute += timedelta(minutes=1)
+
+    return occupancy_minutes
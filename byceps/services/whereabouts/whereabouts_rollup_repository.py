@@ -0,0 +1,195 @@
+"""
+byceps.services.whereabouts.whereabouts_rollup_repository
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections.abc import Sequence
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from byceps.database import db, execute_upsert
+from byceps.services.party.models import PartyID
+from byceps.services.user.models.user import UserID
+
+from .dbmodels import (
+    DbWhereabouts,
+    DbWhereaboutsRollupCursor,
+    DbWhereaboutsTransitionRollup,
+    DbWhereaboutsUpdate,
+)
+from .models import WhereaboutsID
+from .whereabouts_rollup_domain_service import TransitionCounts
+
+
+def get_party_ids() -> set[PartyID]:
+    """Return the IDs of all parties that have whereabouts."""
+    return set(
+        db.session.scalars(select(DbWhereabouts.party_id).distinct()).all()
+    )
+
+
+def find_cursor(party_id: PartyID) -> UUID | None:
+    """Return the ID of the most recent update included in the party's
+    rollups, if any.
+    """
+    return db.session.scalar(
+        select(DbWhereaboutsRollupCursor.last_update_id).filter_by(
+            party_id=party_id
+        )
+    )
+
+
+def get_updates_after(
+    party_id: PartyID,
+    after_update_id: UUID | None,
+    until: datetime,
+    limit: int,
+) -> Sequence[tuple[UUID, UserID, WhereaboutsID, datetime]]:
+    """Return the party's updates following the given one, ordered by
+    (time-based) ID.
+    """
+    stmt = (
+        select(
+            DbWhereaboutsUpdate.id,
+            DbWhereaboutsUpdate.user_id,
+            DbWhereaboutsUpdate.whereabouts_id,
+            DbWhereaboutsUpdate.created_at,
+        )
+        .filter(DbWhereaboutsUpdate.party_id == party_id)
+        .filter(DbWhereaboutsUpdate.created_at < until)
+    )
+
+    if after_update_id is not None:
+        stmt = stmt.filter(DbWhereaboutsUpdate.id > after_update_id)
+
+    stmt = stmt.order_by(DbWhereaboutsUpdate.id).limit(limit)
+
+    return db.session.execute(stmt).tuples().all()
+
+
+def get_latest_whereabouts_ids(
+    party_id: PartyID, user_ids: set[UserID], up_to_update_id: UUID
+) -> dict[UserID, WhereaboutsID]:
+    """Return the users' whereabouts as of the given update."""
+    rows = db.session.execute(
+        select(DbWhereaboutsUpdate.user_id, DbWhereaboutsUpdate.whereabouts_id)
+        .filter(DbWhereaboutsUpdate.party_id == party_id)
+        .filter(DbWhereaboutsUpdate.user_id.in_(user_ids))
+        .filter(DbWhereaboutsUpdate.id <= up_to_update_id)
+        .distinct(DbWhereaboutsUpdate.user_id)
+        .order_by(DbWhereaboutsUpdate.user_id, DbWhereaboutsUpdate.id.desc())
+    ).tuples()
+
+    return dict(rows)
+
+
+def add_transition_counts(
+    party_id: PartyID, counts: TransitionCounts, last_update_id: UUID
+) -> None:
+    """Add to the party's transition counts and advance its cursor, in
+    a single transaction.
+    """
+    if counts:
+        rows = [
+            {
+                'whereabouts_id': whereabouts_id,
+                'minute': minute,
+                'party_id': party_id,
+                'arrivals': arrivals,
+                'departures': departures,
+            }
+            for (whereabouts_id, minute), (arrivals, departures) in (
+                counts.items()
+            )
+        ]
+
+        table = DbWhereaboutsTransitionRollup.__table__
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.whereabouts_id, table.c.minute],
+            set_={
+                'arrivals': table.c.arrivals + stmt.excluded.arrivals,
+                'departures': table.c.departures + stmt.excluded.departures,
+            },
+        )
+        db.session.execute(stmt, rows)
+
+    execute_upsert(
+        DbWhereaboutsRollupCursor.__table__,
+        {'party_id': party_id},
+        {'last_update_id': last_update_id},
+    )
+
+    db.session.commit()
+
+
+def get_occupancies_before(
+    party_id: PartyID, before: datetime
+) -> dict[WhereaboutsID, int]:
+    """Return the occupancy of each of the party's whereabouts as of
+    the end of the minute before the given one.
+
+    The running total is computed by the database, so only a single
+    row per whereabouts is transferred.
+    """
+    rows = db.session.execute(
+        select(
+            DbWhereaboutsTransitionRollup.whereabouts_id,
+            func.sum(
+                DbWhereaboutsTransitionRollup.arrivals
+                - DbWhereaboutsTransitionRollup.departures
+            ),
+        )
+        .filter_by(party_id=party_id)
+        .filter(DbWhereaboutsTransitionRollup.minute < before)
+        .group_by(DbWhereaboutsTransitionRollup.whereabouts_id)
+    ).tuples()
+
+    return {
+        whereabouts_id: int(occupancy) for whereabouts_id, occupancy in rows
+    }
+
+
+def get_transition_counts(
+    party_id: PartyID, start: datetime, end: datetime
+) -> Sequence[tuple[WhereaboutsID, datetime, int, int]]:
+    """Return the party's transition counts from the start to the end
+    minute (inclusive), ordered by whereabouts and minute.
+    """
+    return (
+        db.session.execute(
+            select(
+                DbWhereaboutsTransitionRollup.whereabouts_id,
+                DbWhereaboutsTransitionRollup.minute,
+                DbWhereaboutsTransitionRollup.arrivals,
+                DbWhereaboutsTransitionRollup.departures,
+            )
+            .filter_by(party_id=party_id)
+            .filter(DbWhereaboutsTransitionRollup.minute >= start)
+            .filter(DbWhereaboutsTransitionRollup.minute <= end)
+            .order_by(
+                DbWhereaboutsTransitionRollup.whereabouts_id,
+                DbWhereaboutsTransitionRollup.minute,
+            )
+        )
+        .tuples()
+        .all()
+    )
+
+
+def delete_rollups(party_id: PartyID) -> None:
+    """Delete the party's rollups and cursor."""
+    db.session.execute(
+        delete(DbWhereaboutsTransitionRollup).filter_by(party_id=party_id)
+    )
+    db.session.execute(
+        delete(DbWhereaboutsRollupCursor).filter_by(party_id=party_id)
+    )
+
+    db.session.commit()
@@ -0,0 +1,246 @@
+"""
+byceps.services.whereabouts.whereabouts_rollup_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Roll up whereabouts updates into per-minute arrival and departure
+counts, from which occupancy over time is derived.
+
+Updates are processed incrementally in the order of their (time-based)
+IDs. A cursor per party marks the most recent update already included.
+
+Archived updates are older than those in the database, so they are
+rolled up first when a party's rollups are (re)built from scratch.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime, timedelta
+from itertools import groupby
+from uuid import UUID
+
+import structlog
+
+from byceps.services.party.models import Party, PartyID
+from byceps.services.user.models.user import UserID
+
+from . import (
+    whereabouts_archive_service,
+    whereabouts_repository,
+    whereabouts_rollup_domain_service,
+    whereabouts_rollup_repository,
+    whereabouts_service,
+)
+from .models import WhereaboutsID, WhereaboutsOccupancyHistory
+
+
+log = structlog.get_logger()
+
+
+BATCH_SIZE = 10_000
+
+
+# Only roll up updates older than this, so that updates committed a
+# little late (but with an earlier ID than an already processed one)
+# are not skipped.
+SETTLE_DELAY = timedelta(minutes=1)
+
+
+def get_party_ids() -> set[PartyID]:
+    """Return the IDs of all parties that have whereabouts."""
+    return whereabouts_rollup_repository.get_party_ids()
+
+
+def update_rollups(party_id: PartyID) -> int:
+    """Roll up the party's updates not yet included.
+
+    If the party's rollups have not been started yet, its archived
+    updates are rolled up first.
+
+    Return the number of processed updates.
+    """
+    cursor = whereabouts_rollup_repository.find_cursor(party_id)
+    until = datetime.utcnow() - SETTLE_DELAY
+    processed_count = 0
+
+    has_archived_updates = whereabouts_archive_service.has_archived_updates(
+        party_id
+    )
+    # the users' latest whereabouts according to the archive, if loaded
+    archived_whereabouts_ids: dict[UserID, WhereaboutsID] | None = None
+
+    if (cursor is None) and has_archived_updates:
+        cursor, processed_count, archived_whereabouts_ids = (
+            _roll_up_archived_updates(party_id)
+        )
+
+    while True:
+        updates = whereabouts_rollup_repository.get_updates_after(
+            party_id, cursor, until, BATCH_SIZE
+        )
+        if not updates:
+            break
+
+        user_ids = {user_id for _, user_id, _, _ in updates}
+        if cursor is not None:
+            previous_whereabouts_ids = (
+                whereabouts_rollup_repository.get_latest_whereabouts_ids(
+                    party_id, user_ids, cursor
+                )
+            )
+
+            # Users whose previous update is not in the database anymore
+            # might have been at whereabouts according to the archive.
+            missing_user_ids = user_ids - previous_whereabouts_ids.keys()
+            if missing_user_ids and has_archived_updates:
+                if archived_whereabouts_ids is None:
+                    archived_whereabouts_ids = _get_archived_whereabouts_ids(
+                        party_id
+                    )
+
+                for user_id in missing_user_ids:
+                    whereabouts_id = archived_whereabouts_ids.get(user_id)
+                    if whereabouts_id is not None:
+                        previous_whereabouts_ids[user_id] = whereabouts_id
+        else:
+            previous_whereabouts_ids = {}
+
+        counts = whereabouts_rollup_domain_service.count_transitions(
+            (
+                (user_id, whereabouts_id, created_at)
+                for _, user_id, whereabouts_id, created_at in updates
+            ),
+            previous_whereabouts_ids,
+        )
+
+        cursor = updates[-1][0]
+        whereabouts_rollup_repository.add_transition_counts(
+            party_id, counts, cursor
+        )
+
+        processed_count += len(updates)
+
+    log.info(
+        'Whereabouts rollups updated',
+        party_id=party_id,
+        processed_updates=processed_count,
+    )
+
+    return processed_count
+
+
+def _roll_up_archived_updates(
+    party_id: PartyID,
+) -> tuple[UUID | None, int, dict[UserID, WhereaboutsID]]:
+    """Roll up the party's archived updates.
+
+    Return the ID of the most recent archived update, the number of
+    processed updates, and the users' latest whereabouts.
+    """
+    cursor = None
+    processed_count = 0
+    current_whereabouts_ids: dict[UserID, WhereaboutsID] = {}
+
+    for rows in whereabouts_archive_service.get_archived_update_rows_in_batches(
+        party_id, BATCH_SIZE
+    ):
+        updates = [
+            (user_id, whereabouts_id, created_at)
+            for _, created_at, user_id, whereabouts_id, _, _ in rows
+        ]
+
+        counts = whereabouts_rollup_domain_service.count_transitions(
+            updates, current_whereabouts_ids
+        )
+
+        for user_id, whereabouts_id, _ in updates:
+            current_whereabouts_ids[user_id] = whereabouts_id
+
+        cursor = rows[-1][0]
+        whereabouts_rollup_repository.add_transition_counts(
+            party_id, counts, cursor
+        )
+
+        processed_count += len(rows)
+
+    return cursor, processed_count, current_whereabouts_ids
+
+
+def _get_archived_whereabouts_ids(
+    party_id: PartyID,
+) -> dict[UserID, WhereaboutsID]:
+    """Return the users' latest whereabouts according to the party's
+    archived updates.
+    """
+    return {
+        user_id: whereabouts_id
+        for _, _, user_id, whereabouts_id, _, _ in (
+            whereabouts_archive_service.iterate_archived_update_rows(party_id)
+        )
+    }
+
+
+def backfill_rollups(party_id: PartyID) -> int:
+    """Discard the party's rollups and roll up all its updates (including
+    archived ones) again.
+
+    Raise an exception, and keep the rollups, if the updates they have
+    been rolled up from are gone (e.g. because they have been dropped).
+
+    Return the number of processed updates.
+    """
+    cursor = whereabouts_rollup_repository.find_cursor(party_id)
+    if (
+        (cursor is not None)
+        and not whereabouts_repository.has_update(party_id, cursor)
+        and not whereabouts_archive_service.has_archived_updates(party_id)
+    ):
+        raise ValueError(
+            'The updates the rollups have been computed from are gone.'
+        )
+
+    whereabouts_rollup_repository.delete_rollups(party_id)
+
+    return update_rollups(party_id)
+
+
+def get_occupancy_history(
+    party: Party, start: datetime, end: datetime
+) -> list[WhereaboutsOccupancyHistory]:
+    """Return occupancy, arrivals, and departures for every minute from
+    start to end, for each of the party's whereabouts.
+    """
+    whereabouts_list = whereabouts_service.get_whereabouts_list(party)
+
+    start = whereabouts_rollup_domain_service.truncate_to_minute(start)
+    end = whereabouts_rollup_domain_service.truncate_to_minute(end)
+
+    occupancies_before_start = (
+        whereabouts_rollup_repository.get_occupancies_before(party.id, start)
+    )
+
+    rows = whereabouts_rollup_repository.get_transition_counts(
+        party.id, start, end
+    )
+    counts_by_whereabouts_id = {
+        whereabouts_id: [
+            (minute, arrivals, departures)
+            for _, minute, arrivals, departures in whereabouts_rows
+        ]
+        for whereabouts_id, whereabouts_rows in groupby(
+            rows, key=lambda row: row[0]
+        )
+    }
+
+    return [
+        WhereaboutsOccupancyHistory(
+            whereabouts=whereabouts,
+            minutes=whereabouts_rollup_domain_service.build_occupancy_minutes(
+                counts_by_whereabouts_id.get(whereabouts.id, []),
+                occupancies_before_start.get(whereabouts.id, 0),
+                start,
+                end,
+            ),
+        )
+        for whereabouts in sorted(whereabouts_list, key=lambda w: w.position)
+    ]
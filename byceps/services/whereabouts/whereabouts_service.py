@@ -6,19 +6,35 @@ byceps.services.whereabouts.whereabouts_service
 :License: Revised BSD (see `LICENSE` file for details)
 """
 
+from collections.abc import Sequence
 import dataclasses
+from datetime import datetime, timedelta
+import itertools
+from uuid import UUID
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+import structlog
 
 from byceps.services.party import party_service
-from byceps.services.party.models import Party
+from byceps.services.party.models import Party, PartyID
 from byceps.services.user import user_service
-from byceps.services.user.models.user import User
+from byceps.services.user.models.user import User, UserID
 
 from . import (
+    whereabouts_archive_service,
+    whereabouts_client_notification_service,
     whereabouts_client_repository,
     whereabouts_domain_service,
+    whereabouts_occupancy_service,
+    whereabouts_outage_journal_service,
     whereabouts_repository,
+    whereabouts_update_partition_repository,
+)
+from .dbmodels import (
+    DbWhereabouts,
+    DbWhereaboutsStatus,
+    DbWhereaboutsUpdate,
 )
-from .dbmodels import DbWhereabouts, DbWhereaboutsStatus
 from .events import WhereaboutsStatusUpdatedEvent
 from .models import (
     IPAddress,
@@ -26,8 +42,21 @@ from .models import (
     WhereaboutsClient,
     WhereaboutsID,
     WhereaboutsStatus,
+    WhereaboutsStatusDiff,
+    WhereaboutsStatusSnapshotCursor,
+    WhereaboutsStatusSnapshotPage,
     WhereaboutsUpdate,
+    WhereaboutsUpdateRecord,
+    WhereaboutsUserUpdatesPage,
 )
+from .whereabouts_idempotency_service import DuplicateUpdateError
+from .whereabouts_update_journal import UpdateJournal
+
+
+log = structlog.get_logger()
+
+
+STATUS_REBUILD_BATCH_SIZE = 10_000
 
 
 # -------------------------------------------------------------------- #
@@ -62,6 +91,8 @@ def create_whereabouts(
 
     whereabouts_repository.create_whereabouts(whereabouts)
 
+    whereabouts_client_notification_service.notify_whereabouts_changed(party.id)
+
     return whereabouts
 
 
@@ -83,6 +114,10 @@ def update_whereabouts(
 
     whereabouts_repository.update_whereabouts(updated_whereabouts)
 
+    whereabouts_client_notification_service.notify_whereabouts_changed(
+        whereabouts.party.id
+    )
+
     return updated_whereabouts
 
 
@@ -120,6 +155,29 @@ def get_whereabouts_list(party: Party) -> list[Whereabouts]:
     ]
 
 
+def get_whereabouts_indexed_by_id(
+    whereabouts_ids: set[WhereaboutsID],
+) -> dict[WhereaboutsID, Whereabouts]:
+    """Return the whereabouts with those IDs, indexed by ID."""
+    db_whereabouts_list = whereabouts_repository.get_whereabouts_for_ids(
+        whereabouts_ids
+    )
+
+    party_ids = {
+        db_whereabouts.party_id for db_whereabouts in db_whereabouts_list
+    }
+    parties_by_id = {
+        party_id: party_service.get_party(party_id) for party_id in party_ids
+    }
+
+    return {
+        db_whereabouts.id: _db_entity_to_whereabouts(
+            db_whereabouts, parties_by_id[db_whereabouts.party_id]
+        )
+        for db_whereabouts in db_whereabouts_list
+    }
+
+
 def _db_entity_to_whereabouts(
     db_whereabouts: DbWhereabouts, party: Party
 ) -> Whereabouts:
@@ -144,13 +202,70 @@ def set_status(
     whereabouts: Whereabouts,
     *,
     source_address: IPAddress | None = None,
+    update_id: UUID | None = None,
+    idempotency_key: str | None = None,
 ) -> tuple[WhereaboutsStatus, WhereaboutsUpdate, WhereaboutsStatusUpdatedEvent]:
-    """Set a user's whereabouts."""
+    """Set a user's whereabouts.
+
+    Raise `DuplicateUpdateError` if the client has made an update with
+    that ID or idempotency key before.
+
+    If the database is unavailable and an outage journal is configured,
+    the update is journaled instead, to be persisted later.
+    """
     status, update, event = whereabouts_domain_service.set_status(
-        user, whereabouts, source_address=source_address
+        client,
+        user,
+        whereabouts,
+        source_address=source_address,
+        update_id=update_id,
     )
 
-    whereabouts_repository.persist_update(status, update)
+    try:
+        previous_whereabouts = whereabouts_repository.lock_status(user.id)
+        new_whereabouts = (whereabouts.party.id, whereabouts.id)
+        occupancy_deltas = whereabouts_domain_service.get_occupancy_deltas(
+            previous_whereabouts, new_whereabouts
+        )
+
+        whereabouts_repository.persist_update(
+            status,
+            update,
+            occupancy_deltas,
+            party_id=whereabouts.party.id,
+            starts_stay=(new_whereabouts != previous_whereabouts),
+            idempotency_key=idempotency_key,
+        )
+    except IntegrityError as e:
+        whereabouts_repository.rollback()
+
+        # Tell a retry that raced the original request from other
+        # constraint violations.
+        if _is_duplicate_update(
+            client, whereabouts.party.id, update.id, idempotency_key
+        ):
+            raise DuplicateUpdateError() from e
+
+        raise
+    except OperationalError:
+        if not whereabouts_outage_journal_service.is_enabled():
+            raise
+
+        whereabouts_repository.rollback()
+
+        whereabouts_outage_journal_service.append_update(
+            update, whereabouts.party.id, idempotency_key=idempotency_key
+        )
+
+        log.warning(
+            'Database unavailable; whereabouts update journaled',
+            update_id=str(update.id),
+        )
+
+        # Client liveliness is updated when the journal is replayed.
+        return status, update, event
+
+    whereabouts_occupancy_service.apply_deltas(occupancy_deltas)
 
     whereabouts_client_repository.update_liveliness_status(
         client.id, True, event.occurred_at
@@ -159,6 +274,108 @@ def set_status(
     return status, update, event
 
 
+def _is_duplicate_update(
+    client: WhereaboutsClient,
+    party_id: PartyID,
+    update_id: UUID,
+    idempotency_key: str | None,
+) -> bool:
+    if idempotency_key is not None:
+        return (
+            whereabouts_repository.find_update_id_for_idempotency_key(
+                client.id, idempotency_key
+            )
+            is not None
+        )
+
+    return whereabouts_repository.has_update(party_id, update_id)
+
+
+def persist_update_records(
+    records: Sequence[WhereaboutsUpdateRecord],
+) -> int:
+    """Persist journaled updates, along with the changes they cause to
+    statuses, occupancies, stays, and client liveliness, in a single
+    transaction.
+
+    Updates that have already been persisted are skipped, so records
+    can safely be persisted more than once. Idempotency keys are
+    recorded along with the updates, and updates made with a key that
+    has been recorded already (i.e. retries) are skipped as well.
+
+    Return the number of newly persisted updates.
+    """
+    keyed_update_ids = whereabouts_repository.insert_idempotency_keys(records)
+    records = [
+        record
+        for record in records
+        if (record.idempotency_key is None)
+        or (record.client_id is None)
+        or (record.id in keyed_update_ids)
+    ]
+
+    inserted_update_ids = whereabouts_repository.insert_update_records(records)
+    new_records = [
+        record for record in records if record.id in inserted_update_ids
+    ]
+
+    previous_statuses = whereabouts_repository.lock_statuses(
+        {record.user_id for record in new_records}
+    )
+
+    changes = whereabouts_domain_service.aggregate_update_batch(
+        new_records, previous_statuses
+    )
+
+    whereabouts_repository.persist_update_batch_changes(changes)
+
+    whereabouts_occupancy_service.apply_deltas(changes.occupancy_deltas)
+
+    return len(new_records)
+
+
+def persist_journaled_updates(
+    journal: UpdateJournal, *, batch_size: int
+) -> int | None:
+    """Persist all of the journal's updates in order, in batches, and
+    remove them from the journal.
+
+    If persisting fails, the remaining updates stay in the journal, to
+    be persisted on the next attempt.
+
+    Return the number of newly persisted updates, or `None` if the
+    journal is being processed by another process.
+    """
+    with journal.reading() as is_reader:
+        if not is_reader:
+            return None
+
+        journal.seal_open_segment()
+
+        total = 0
+
+        for segment in journal.get_sealed_segments():
+            records = journal.read_segment(segment)
+            while batch := list(itertools.islice(records, batch_size)):
+                try:
+                    total += persist_update_records(batch)
+                except OperationalError:
+                    whereabouts_repository.rollback()
+                    raise
+
+            journal.remove_segment(segment)
+
+        return total
+
+
+def replay_outage_journal(*, batch_size: int) -> int | None:
+    """Persist the updates journaled while the database was
+    unavailable.
+    """
+    journal = whereabouts_outage_journal_service.get_journal()
+    return persist_journaled_updates(journal, batch_size=batch_size)
+
+
 def find_status(user: User, party: Party) -> WhereaboutsStatus | None:
     """Return user's status for the party, if known."""
     db_status = whereabouts_repository.find_status(user.id, party.id)
@@ -186,6 +403,136 @@ def get_statuses(party: Party) -> list[WhereaboutsStatus]:
     ]
 
 
+def get_statuses_as_of(party: Party, at: datetime) -> list[WhereaboutsStatus]:
+    """Return user statuses as they were at the given time."""
+    rows = whereabouts_repository.get_status_rows_as_of(party.id, at)
+
+    user_ids = {user_id for user_id, _, _ in rows}
+    users_by_id = user_service.get_users_indexed_by_id(
+        user_ids, include_avatars=True
+    )
+
+    return [
+        WhereaboutsStatus(
+            user=users_by_id[user_id],
+            whereabouts_id=whereabouts_id,
+            set_at=set_at,
+        )
+        for user_id, whereabouts_id, set_at in rows
+    ]
+
+
+def rebuild_statuses(
+    party: Party, *, dry_run: bool = False
+) -> WhereaboutsStatusDiff:
+    """Recompute the statuses of the party's users from its updates
+    (including archived ones) and apply the differences to the stored
+    statuses, unless it is a dry run.
+
+    Return the differences.
+    """
+    recomputed: dict[UserID, tuple[WhereaboutsID, datetime]] = {}
+
+    # Archived updates are older than those in the database, and both
+    # are read in order of (time-based) update ID, so the last update
+    # per user wins.
+    for (
+        _,
+        created_at,
+        user_id,
+        whereabouts_id,
+        _,
+        _,
+    ) in whereabouts_archive_service.iterate_archived_update_rows(party.id):
+        recomputed[user_id] = (whereabouts_id, created_at)
+
+    after_update_id = None
+    while True:
+        rows = whereabouts_repository.get_update_rows_after(
+            party.id, after_update_id, STATUS_REBUILD_BATCH_SIZE
+        )
+        if not rows:
+            break
+
+        for _, user_id, whereabouts_id, created_at in rows:
+            recomputed[user_id] = (whereabouts_id, created_at)
+
+        after_update_id = rows[-1][0]
+
+    stored = whereabouts_repository.get_status_rows_for_rebuild(
+        party.id, set(recomputed)
+    )
+
+    diff = whereabouts_domain_service.diff_statuses(
+        party.id, recomputed, stored
+    )
+
+    if not dry_run:
+        whereabouts_repository.apply_status_diff(diff)
+
+        # Users whose status has been moved from another party affect
+        # that party's occupancies, too.
+        affected_party_ids = {party.id} | {
+            stored[user_id][0]
+            for user_id, _, _ in diff.changed
+            if stored[user_id][0] != party.id
+        }
+        for affected_party_id in affected_party_ids:
+            affected_party = party_service.get_party(affected_party_id)
+            whereabouts_occupancy_service.rebuild_occupancies(affected_party)
+
+    return diff
+
+
+def get_status_snapshot_page(
+    party: Party,
+    limit: int,
+    *,
+    since: datetime | None = None,
+    after: WhereaboutsStatusSnapshotCursor | None = None,
+) -> WhereaboutsStatusSnapshotPage:
+    """Return a page of the party's user statuses in compact form."""
+    after_key = (after.set_at, after.user_id) if after else None
+
+    # Fetch one extra row to find out if there is a next page.
+    rows = whereabouts_repository.get_status_rows(
+        party.id, limit + 1, since=since, after=after_key
+    )
+    has_next_page = len(rows) > limit
+    rows = rows[:limit]
+
+    user_ids, whereabouts_ids, statuses = (
+        whereabouts_domain_service.index_status_rows(rows)
+    )
+
+    users_by_id = user_service.get_users_indexed_by_id(
+        set(user_ids), include_avatars=False
+    )
+
+    whereabouts_by_id = {
+        whereabouts.id: whereabouts
+        for whereabouts in get_whereabouts_list(party)
+    }
+
+    if has_next_page:
+        last_user_id, _, last_set_at = rows[-1]
+        next_cursor = WhereaboutsStatusSnapshotCursor(
+            set_at=last_set_at, user_id=last_user_id
+        )
+    else:
+        next_cursor = None
+
+    return WhereaboutsStatusSnapshotPage(
+        users=[users_by_id[user_id] for user_id in user_ids],
+        whereabouts_list=[
+            whereabouts_by_id[whereabouts_id]
+            for whereabouts_id in whereabouts_ids
+        ],
+        statuses=statuses,
+        next_cursor=next_cursor,
+    )
+
+
 def _db_entity_to_status(
     db_status: DbWhereaboutsStatus, user: User
 ) -> WhereaboutsStatus:
@@ -194,3 +541,163 @@ def _db_entity_to_status(
         whereabouts_id=db_status.whereabouts_id,
         set_at=db_status.set_at,
     )
+
+
+# -------------------------------------------------------------------- #
+# updates
+
+
+def anonymize_source_addresses(
+    party: Party, *, truncate: bool = False, chunk_size: int = 5000
+) -> int:
+    """Remove (or truncate) the source addresses of the party's updates.
+
+    The updates are changed in chunks, each in its own short
+    transaction, to avoid holding locks on many rows for long.
+
+    Return the number of updates changed.
+    """
+    total = 0
+
+    while True:
+        count = whereabouts_repository.anonymize_source_addresses(
+            party.id, truncate=truncate, limit=chunk_size
+        )
+        if count == 0:
+            break
+
+        total += count
+
+    return total
+
+
+def get_update_counts_per_minute_for_client(
+    client: WhereaboutsClient, period: timedelta
+) -> list[tuple[datetime, int]]:
+    """Return the number of updates sent by the client per minute,
+    for every minute of the period until now.
+    """
+    now = datetime.utcnow()
+    since = now - period
+
+    counts = whereabouts_repository.get_update_counts_per_minute_for_client(
+        client.id, since
+    )
+
+    return whereabouts_domain_service.fill_minutes_without_count(
+        counts, since, now
+    )
+
+
+def get_latest_updates_for_client(
+    client: WhereaboutsClient, limit: int
+) -> list[WhereaboutsUpdate]:
+    """Return the most recent updates sent by the client."""
+    db_updates = whereabouts_repository.get_latest_updates_for_client(
+        client.id, limit
+    )
+
+    user_ids = {db_update.user_id for db_update in db_updates}
+    users_by_id = user_service.get_users_indexed_by_id(
+        user_ids, include_avatars=True
+    )
+
+    return [
+        _db_entity_to_update(db_update, users_by_id[db_update.user_id])
+        for db_update in db_updates
+    ]
+
+
+def get_updates_for_user_page(
+    user: User,
+    party: Party,
+    limit: int,
+    *,
+    after: UUID | None = None,
+) -> WhereaboutsUserUpdatesPage:
+    """Return a page of the user's updates for the party, newest first.
+
+    Archived updates are included once those in the database are
+    exhausted.
+
+    Source addresses are not included.
+    """
+    # Fetch one extra row to find out if there is a next page.
+    db_updates = whereabouts_repository.get_updates_for_user(
+        user.id, party.id, limit + 1, after=after
+    )
+    updates = [
+        _db_entity_to_update(db_update, user, include_source_address=False)
+        for db_update in db_updates
+    ]
+
+    if len(updates) <= limit:
+        # Archived updates are older than those in the database, so
+        # they continue where the database leaves off.
+        archived_rows = whereabouts_archive_service.get_latest_archived_update_rows_for_user(
+            party.id, user.id, limit + 1 - len(updates), before=after
+        )
+        updates.extend(
+            WhereaboutsUpdate(
+                id=update_id,
+                user=user,
+                whereabouts_id=whereabouts_id,
+                created_at=created_at,
+                client_id=client_id,
+                source_address=None,
+            )
+            for (
+                update_id,
+                created_at,
+                _,
+                whereabouts_id,
+                client_id,
+                _,
+            ) in archived_rows
+        )
+
+    has_next_page = len(updates) > limit
+    updates = updates[:limit]
+
+    next_cursor = updates[-1].id if has_next_page else None
+
+    return WhereaboutsUserUpdatesPage(updates=updates, next_cursor=next_cursor)
+
+
+def create_update_partition(party: Party) -> None:
+    """Create a partition for the party's updates, unless it exists.
+
+    Updates of the party that are still in the default partition are
+    moved into the new one.
+    """
+    whereabouts_update_partition_repository.create_partition(party.id)
+
+
+def drop_updates(party: Party) -> bool:
+    """Delete all of the party's updates by dropping its partition.
+
+    Return `False` if the party has no partition of its own.
+    """
+    return whereabouts_update_partition_repository.drop_partition(party.id)
+
+
+def _db_entity_to_update(
+    db_update: DbWhereaboutsUpdate,
+    user: User,
+    *,
+    include_source_address: bool = True,
+) -> WhereaboutsUpdate:
+    # The source address column is deferred; accessing it without having
+    # it undeferred in the query would cause an additional query.
+    source_address = (
+        db_update.source_address if include_source_address else None
+    )
+
+    return WhereaboutsUpdate(
+        id=db_update.id,
+        user=user,
+        whereabouts_id=db_update.whereabouts_id,
+        created_at=db_update.created_at,
+        client_id=db_update.client_id,
+        source_address=source_address,
+    )
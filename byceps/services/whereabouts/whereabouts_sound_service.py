@@ -11,7 +11,10 @@ import dataclasses
 from byceps.services.user import user_service
 from byceps.services.user.models.user import User, UserID
 
-from . import whereabouts_sound_repository
+from . import (
+    whereabouts_client_notification_service,
+    whereabouts_sound_repository,
+)
 from .dbmodels import DbWhereaboutsUserSound
 from .models import WhereaboutsUserSound
 
@@ -22,6 +25,8 @@ def create_user_sound(user: User, name: str) -> WhereaboutsUserSound:
 
     whereabouts_sound_repository.create_user_sound(user_sound)
 
+    whereabouts_client_notification_service.notify_user_sound_changed(user.id)
+
     return user_sound
 
 
@@ -33,6 +38,10 @@ def update_user_sound(
 
     whereabouts_sound_repository.update_user_sound(updated_user_sound)
 
+    whereabouts_client_notification_service.notify_user_sound_changed(
+        user_sound.user.id
+    )
+
     return updated_user_sound
 
 
@@ -40,6 +49,8 @@ def delete_user_sound(user_id: UserID) -> None:
     """Delete a users-specific sound."""
     whereabouts_sound_repository.delete_user_sound(user_id)
 
+    whereabouts_client_notification_service.notify_user_sound_changed(user_id)
+
 
 def find_sound_for_user(user_id: UserID) -> WhereaboutsUserSound | None:
     """Find a sound specific for this user."""
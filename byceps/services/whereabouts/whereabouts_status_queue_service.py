@@ -0,0 +1,109 @@
+"""
+byceps.services.whereabouts.whereabouts_status_queue_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Queue status updates in a local journal, so they can be acknowledged
+without waiting for the database (write-behind).
+
+The queue is available if `WHEREABOUTS_STATUS_QUEUE_PATH` is set to a
+local directory. A writer (`whereabouts drain-status-queue`) persists
+queued updates in batches.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import UUID
+
+from flask import current_app
+
+from byceps.services.user.models.user import User
+
+from . import whereabouts_domain_service, whereabouts_service
+from .events import WhereaboutsStatusUpdatedEvent
+from .models import (
+    IPAddress,
+    Whereabouts,
+    WhereaboutsClient,
+    WhereaboutsStatus,
+    WhereaboutsUpdate,
+)
+from .whereabouts_update_journal import UpdateJournal
+
+
+DRAIN_BATCH_SIZE = 500
+
+
+def is_enabled() -> bool:
+    """Return `True` if a queue directory is configured."""
+    return _get_queue_path() is not None
+
+
+def enqueue_status(
+    client: WhereaboutsClient,
+    user: User,
+    whereabouts: Whereabouts,
+    *,
+    source_address: IPAddress | None = None,
+    update_id: UUID | None = None,
+    idempotency_key: str | None = None,
+) -> tuple[WhereaboutsStatus, WhereaboutsUpdate, WhereaboutsStatusUpdatedEvent]:
+    """Set a user's whereabouts, to be persisted later.
+
+    The idempotency key, if given, is persisted along with the update.
+    """
+    status, update, event = whereabouts_domain_service.set_status(
+        client,
+        user,
+        whereabouts,
+        source_address=source_address,
+        update_id=update_id,
+    )
+
+    record = whereabouts_domain_service.create_update_record(
+        update, whereabouts.party.id, idempotency_key=idempotency_key
+    )
+
+    _get_journal().append([record])
+
+    return status, update, event
+
+
+def drain(*, batch_size: int = DRAIN_BATCH_SIZE) -> int | None:
+    """Persist all queued updates, in batches.
+
+    Return the number of newly persisted updates, or `None` if the
+    queue is being drained by another process.
+    """
+    return whereabouts_service.persist_journaled_updates(
+        _get_journal(), batch_size=batch_size
+    )
+
+
+def get_lag() -> timedelta | None:
+    """Return the age of the oldest update that has not been persisted
+    yet, if any.
+    """
+    if not is_enabled():
+        return None
+
+    oldest_created_at = _get_journal().get_oldest_record_created_at()
+    if oldest_created_at is None:
+        return None
+
+    return datetime.utcnow() - oldest_created_at
+
+
+def _get_journal() -> UpdateJournal:
+    path = _get_queue_path()
+    if path is None:
+        raise ValueError('No whereabouts status queue path configured')
+
+    return UpdateJournal(path)
+
+
+def _get_queue_path() -> Path | None:
+    value = current_app.config.get('WHEREABOUTS_STATUS_QUEUE_PATH')
+    return Path(value) if value else None
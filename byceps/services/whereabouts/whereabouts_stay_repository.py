@@ -0,0 +1,224 @@
+"""
+byceps.services.whereabouts.whereabouts_stay_repository
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections.abc import Sequence
+from datetime import datetime
+
+from sqlalchemy import (
+    bindparam,
+    delete,
+    Executable,
+    func,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+
+from byceps.database import db
+from byceps.services.party.models import PartyID
+from byceps.services.user.models.user import UserID
+
+from .dbmodels import DbWhereaboutsStay, DbWhereaboutsUpdate
+from .models import WhereaboutsID, WhereaboutsUpdate, WhereaboutsUpdateRecord
+
+
+def start_stay(
+    party_id: PartyID, whereabouts_update: WhereaboutsUpdate
+) -> None:
+    """End the user's open stay, if any, and start a new one with the
+    update.
+
+    The caller is expected to commit, so that stays change in the same
+    transaction as the update they are derived from.
+    """
+    for stmt in build_stay_start_statements(party_id, whereabouts_update):
+        db.session.execute(stmt)
+
+
+def build_stay_start_statements(
+    party_id: PartyID, whereabouts_update: WhereaboutsUpdate
+) -> list[Executable]:
+    """Return statements that end the user's open stay, if any, and
+    start a new one with the update.
+
+    They are also part of the statements that persist a status update.
+    """
+    return [
+        update(DbWhereaboutsStay)
+        .filter(DbWhereaboutsStay.user_id == whereabouts_update.user.id)
+        .filter(DbWhereaboutsStay.left_at.is_(None))
+        .values(left_at=whereabouts_update.created_at),
+        insert(DbWhereaboutsStay).values(
+            id=whereabouts_update.id,
+            party_id=party_id,
+            whereabouts_id=whereabouts_update.whereabouts_id,
+            user_id=whereabouts_update.user.id,
+            entered_at=whereabouts_update.created_at,
+        ),
+    ]
+
+
+def end_stays(ends: dict[UserID, datetime]) -> None:
+    """End the users' open stays at the given times.
+
+    The caller is expected to commit.
+    """
+    if not ends:
+        return
+
+    table = DbWhereaboutsStay.__table__
+
+    db.session.execute(
+        update(table)
+        .where(table.c.user_id == bindparam('b_user_id'))
+        .where(table.c.left_at.is_(None))
+        .values(left_at=bindparam('b_left_at')),
+        [
+            {'b_user_id': user_id, 'b_left_at': left_at}
+            for user_id, left_at in ends.items()
+        ],
+    )
+
+
+def insert_stays(
+    stays: list[tuple[WhereaboutsUpdateRecord, datetime | None]],
+) -> None:
+    """Insert stays started by the updates with a multi-row statement.
+
+    The caller is expected to commit.
+    """
+    if not stays:
+        return
+
+    db.session.execute(
+        insert(DbWhereaboutsStay).values(
+            [
+                {
+                    'id': record.id,
+                    'party_id': record.party_id,
+                    'whereabouts_id': record.whereabouts_id,
+                    'user_id': record.user_id,
+                    'entered_at': record.created_at,
+                    'left_at': left_at,
+                }
+                for record, left_at in stays
+            ]
+        )
+    )
+
+
+def get_stays(
+    whereabouts_id: WhereaboutsID, start: datetime, end: datetime
+) -> Sequence[DbWhereaboutsStay]:
+    """Return stays at the whereabouts that overlap the time window,
+    ordered by the time they began.
+    """
+    return db.session.scalars(
+        select(DbWhereaboutsStay)
+        .filter(DbWhereaboutsStay.whereabouts_id == whereabouts_id)
+        .filter(DbWhereaboutsStay.entered_at < end)
+        .filter(
+            or_(
+                DbWhereaboutsStay.left_at.is_(None),
+                DbWhereaboutsStay.left_at > start,
+            )
+        )
+        .order_by(DbWhereaboutsStay.entered_at)
+    ).all()
+
+
+def has_stays_without_update(party_id: PartyID) -> bool:
+    """Return `True` if any of the party's stays has been started by an
+    update that is not in the database anymore (e.g. because it has
+    been archived or dropped).
+    """
+    update_exists = (
+        select(DbWhereaboutsUpdate.id)
+        .filter(DbWhereaboutsUpdate.party_id == party_id)
+        .filter(DbWhereaboutsUpdate.id == DbWhereaboutsStay.id)
+        .exists()
+    )
+
+    return db.session.scalar(
+        select(
+            select(DbWhereaboutsStay.id)
+            .filter(DbWhereaboutsStay.party_id == party_id)
+            .filter(~update_exists)
+            .exists()
+        )
+    )
+
+
+def rebuild_stays(party_id: PartyID) -> int:
+    """Recompute the party's stays from the updates.
+
+    Updates at other parties are taken into account, too, as moving to
+    another party's whereabouts ends a stay.
+
+    Return the number of stays.
+    """
+    db.session.execute(delete(DbWhereaboutsStay).filter_by(party_id=party_id))
+
+    user_window = {
+        'partition_by': DbWhereaboutsUpdate.user_id,
+        'order_by': (DbWhereaboutsUpdate.created_at, DbWhereaboutsUpdate.id),
+    }
+
+    updates = select(
+        DbWhereaboutsUpdate.id,
+        DbWhereaboutsUpdate.party_id,
+        DbWhereaboutsUpdate.whereabouts_id,
+        DbWhereaboutsUpdate.user_id,
+        DbWhereaboutsUpdate.created_at,
+        func.lag(DbWhereaboutsUpdate.whereabouts_id)
+        .over(**user_window)
+        .label('previous_whereabouts_id'),
+    ).subquery()
+
+    stay_starts = (
+        select(updates)
+        .filter(
+            updates.c.previous_whereabouts_id.is_distinct_from(
+                updates.c.whereabouts_id
+            )
+        )
+        .subquery()
+    )
+
+    stays = select(
+        stay_starts.c.id,
+        stay_starts.c.party_id,
+        stay_starts.c.whereabouts_id,
+        stay_starts.c.user_id,
+        stay_starts.c.created_at.label('entered_at'),
+        func.lead(stay_starts.c.created_at)
+        .over(
+            partition_by=stay_starts.c.user_id,
+            order_by=(stay_starts.c.created_at, stay_starts.c.id),
+        )
+        .label('left_at'),
+    ).subquery()
+
+    result = db.session.execute(
+        insert(DbWhereaboutsStay).from_select(
+            [
+                'id',
+                'party_id',
+                'whereabouts_id',
+                'user_id',
+                'entered_at',
+                'left_at',
+            ],
+            select(stays).filter(stays.c.party_id == party_id),
+        )
+    )
+
+    db.session.commit()
+
+    return result.rowcount
@@ -0,0 +1,64 @@
+"""
+byceps.services.whereabouts.whereabouts_stay_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Find out who has been at whereabouts during a time window.
+
+Stays (from entering to leaving whereabouts) are derived from
+consecutive updates and maintained along with status changes, so the
+lookup is a range scan instead of a replay of all updates.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+from byceps.services.party.models import Party
+from byceps.services.user import user_service
+
+from . import whereabouts_stay_repository
+from .models import Whereabouts, WhereaboutsStay
+
+
+def get_stays(
+    whereabouts: Whereabouts, start: datetime, end: datetime
+) -> list[WhereaboutsStay]:
+    """Return the stays of users at the whereabouts at any moment
+    between start and end.
+    """
+    db_stays = whereabouts_stay_repository.get_stays(whereabouts.id, start, end)
+
+    user_ids = {db_stay.user_id for db_stay in db_stays}
+    users_by_id = user_service.get_users_indexed_by_id(
+        user_ids, include_avatars=False
+    )
+
+    return [
+        WhereaboutsStay(
+            user=users_by_id[db_stay.user_id],
+            whereabouts_id=db_stay.whereabouts_id,
+            entered_at=db_stay.entered_at,
+            left_at=db_stay.left_at,
+        )
+        for db_stay in db_stays
+    ]
+
+
+def rebuild_stays(party: Party) -> int:
+    """Recompute the party's stays from the updates.
+
+    Raise an exception, and keep the stays, if some of the updates they
+    have been derived from are not in the database anymore (because
+    they have been archived or dropped). Those stays could not be
+    recomputed.
+
+    Return the number of stays.
+    """
+    if whereabouts_stay_repository.has_stays_without_update(party.id):
+        raise ValueError(
+            'Some of the updates the stays have been derived from are not '
+            'in the database anymore.'
+        )
+
+    return whereabouts_stay_repository.rebuild_stays(party.id)
@@ -0,0 +1,271 @@
+"""
+byceps.services.whereabouts.whereabouts_update_journal
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Durable, append-only journal of update records in a local directory.
+
+Records are appended (and synced to disk) to the open segment. To
+process them, a reader seals the open segment by renaming it, then
+removes each sealed segment once its records have been persisted. If a
+reader is interrupted, the segment is processed again, so persisting
+records has to be idempotent.
+
+Appending and sealing are serialized between processes by an exclusive
+lock on a lock file, so the directory must be local to the host.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from datetime import datetime
+import fcntl
+import ipaddress
+import json
+import os
+from pathlib import Path
+import threading
+import time
+from uuid import UUID
+
+from byceps.services.party.models import PartyID
+from byceps.services.user.models.user import UserID
+
+from .models import WhereaboutsClientID, WhereaboutsID, WhereaboutsUpdateRecord
+
+
+OPEN_SEGMENT_NAME = 'open.ndjson'
+SEALED_SEGMENT_NAME_PATTERN = 'sealed-*.ndjson'
+LOCK_FILE_NAME = '.lock'
+READER_LOCK_FILE_NAME = '.reader.lock'
+
+
+class UpdateJournal:
+    """A journal kept in the given directory."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+
+    def append(self, records: Sequence[WhereaboutsUpdateRecord]) -> None:
+        """Append the records and sync them to disk."""
+        data = ''.join(
+            _serialize_record(record) + '\n' for record in records
+        ).encode('utf-8')
+
+        with self._locked(LOCK_FILE_NAME):
+            with (self._path / OPEN_SEGMENT_NAME).open('a+b') as f:
+                # Terminate a line that has been written only partially
+                # (due to a crash), so the next record is not lost.
+                size = f.seek(0, os.SEEK_END)
+                if (size > 0) and (os.pread(f.fileno(), 1, size - 1) != b'\n'):
+                    data = b'\n' + data
+
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def seal_open_segment(self) -> None:
+        """Seal the open segment (if it contains records), so appending
+        continues in a new one.
+        """
+        open_segment = self._path / OPEN_SEGMENT_NAME
+
+        with self._locked(LOCK_FILE_NAME):
+            if not open_segment.exists() or open_segment.stat().st_size == 0:
+                return
+
+            open_segment.rename(
+                self._path / f'sealed-{time.time_ns():020d}.ndjson'
+            )
+            _fsync_directory(self._path)
+
+    def get_sealed_segments(self) -> list[Path]:
+        """Return the sealed segments, oldest first."""
+        return sorted(self._path.glob(SEALED_SEGMENT_NAME_PATTERN))
+
+    def read_segment(self, segment: Path) -> Iterator[WhereaboutsUpdateRecord]:
+        """Yield the segment's records, in order of appending.
+
+        A line that cannot be parsed (i.e. one that has been written
+        only partially) is skipped.
+        """
+        with segment.open('rb') as f:
+            for line in f:
+                try:
+                    yield _parse_record(line)
+                except ValueError:
+                    continue
+
+    def remove_segment(self, segment: Path) -> None:
+        """Remove a segment whose records have been persisted."""
+        segment.unlink(missing_ok=True)
+
+    def get_oldest_record_created_at(self) -> datetime | None:
+        """Return the creation time of the oldest record that has not
+        been removed yet, if any.
+        """
+        segments = [
+            *self.get_sealed_segments(),
+            self._path / OPEN_SEGMENT_NAME,
+        ]
+
+        for segment in segments:
+            if not segment.exists():
+                continue
+
+            for record in self.read_segment(segment):
+                return record.created_at
+
+        return None
+
+    @contextmanager
+    def reading(self) -> Iterator[bool]:
+        """Try to become the journal's only reader.
+
+        Yield `False` if another reader is active.
+        """
+        self._path.mkdir(parents=True, exist_ok=True)
+
+        with (self._path / READER_LOCK_FILE_NAME).open('a') as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+
+            try:
+                yield True
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def _locked(self, lock_file_name: str) -> Iterator[None]:
+        self._path.mkdir(parents=True, exist_ok=True)
+
+        with (self._path / lock_file_name).open('a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class GroupCommitWriter:
+    """Append records to a journal from multiple threads.
+
+    While records are being written and synced, further records are
+    collected, to be written and synced together afterwards (group
+    commit). Each call returns once its records are on disk.
+    """
+
+    def __init__(self, journal: UpdateJournal) -> None:
+        self._journal = journal
+        self._condition = threading.Condition()
+        self._pending: list[WhereaboutsUpdateRecord] = []
+        self._collecting_group = 1
+        self._synced_group = 0
+        self._is_syncing = False
+        self._errors: dict[int, Exception] = {}
+
+    def append(self, records: Sequence[WhereaboutsUpdateRecord]) -> None:
+        with self._condition:
+            self._pending.extend(records)
+            group = self._collecting_group
+
+            while self._synced_group < group:
+                if self._is_syncing:
+                    self._condition.wait()
+                else:
+                    self._sync_pending()
+
+            error = self._errors.get(group)
+
+        if error is not None:
+            raise error
+
+    def _sync_pending(self) -> None:
+        """Write and sync the pending records.
+
+        Must be called with the condition's lock held; it is released
+        while writing.
+        """
+        records = self._pending
+        self._pending = []
+        group = self._collecting_group
+        self._collecting_group += 1
+        self._is_syncing = True
+
+        error = None
+
+        self._condition.release()
+        try:
+            self._journal.append(records)
+        except Exception as e:
+            error = e
+        finally:
+            self._condition.acquire()
+
+        if error is not None:
+            self._errors[group] = error
+            # Forget errors of groups whose callers have long returned.
+            for old_group in [g for g in self._errors if g < group - 1000]:
+                del self._errors[old_group]
+
+        self._is_syncing = False
+        self._synced_group = group
+        self._condition.notify_all()
+
+
+def _serialize_record(record: WhereaboutsUpdateRecord) -> str:
+    return json.dumps(
+        {
+            'id': str(record.id),
+            'party_id': record.party_id,
+            'user_id': str(record.user_id),
+            'whereabouts_id': str(record.whereabouts_id),
+            'created_at': record.created_at.isoformat(),
+            'client_id': str(record.client_id) if record.client_id else None,
+            'source_address': (
+                str(record.source_address) if record.source_address else None
+            ),
+            'idempotency_key': record.idempotency_key,
+        }
+    )
+
+
+def _parse_record(line: bytes) -> WhereaboutsUpdateRecord:
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(str(e)) from e
+
+    client_id_str = data['client_id']
+    source_address_str = data['source_address']
+
+    return WhereaboutsUpdateRecord(
+        id=UUID(data['id']),
+        party_id=PartyID(data['party_id']),
+        user_id=UserID(UUID(data['user_id'])),
+        whereabouts_id=WhereaboutsID(UUID(data['whereabouts_id'])),
+        created_at=datetime.fromisoformat(data['created_at']),
+        client_id=(
+            WhereaboutsClientID(UUID(client_id_str)) if client_id_str else None
+        ),
+        source_address=(
+            ipaddress.ip_address(source_address_str)
+            if source_address_str
+            else None
+        ),
+        # absent from records journaled by earlier versions
+        idempotency_key=data.get('idempotency_key'),
+    )
+
+
+def _fsync_directory(path: Path) -> None:
+    """Make a rename within the directory durable."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
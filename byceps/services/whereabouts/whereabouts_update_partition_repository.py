@@ -0,0 +1,128 @@
+"""
+byceps.services.whereabouts.whereabouts_update_partition_repository
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Manage the per-party partitions of the updates table.
+
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import hashlib
+import re
+
+from sqlalchemy import text
+
+from byceps.database import db
+from byceps.services.party.models import PartyID
+
+
+PARENT_TABLE_NAME = 'whereabouts_updates'
+DEFAULT_PARTITION_TABLE_NAME = 'whereabouts_updates_default'
+
+
+def get_partition_name(party_id: PartyID) -> str:
+    """Return the name of the party's partition.
+
+    The name is derived from the party ID, shortened to fit PostgreSQL's
+    identifier length limit, and made unique by a hash suffix.
+    """
+    slug = re.sub(r'[^a-z0-9]+', '_', party_id.lower()).strip('_')[:32]
+    digest = hashlib.sha1(party_id.encode('utf-8')).hexdigest()[:8]
+    return f'{PARENT_TABLE_NAME}_{slug}_{digest}'
+
+
+def has_partition(party_id: PartyID) -> bool:
+    """Return `True` if the party has a partition of its own."""
+    partition_name = get_partition_name(party_id)
+
+    return (
+        db.session.scalar(
+            text('SELECT to_regclass(:name)'), {'name': partition_name}
+        )
+        is not None
+    )
+
+
+def create_partition(party_id: PartyID, *, commit: bool = True) -> None:
+    """Create a partition for the party's updates, unless it exists.
+
+    Updates of the party that are still in the default partition are
+    moved into the new one.
+    """
+    if has_partition(party_id):
+        return
+
+    partition = _quote_identifier(get_partition_name(party_id))
+    default_partition = _quote_identifier(DEFAULT_PARTITION_TABLE_NAME)
+    parent = _quote_identifier(PARENT_TABLE_NAME)
+    party_id_literal = _quote_literal(party_id)
+
+    # Keep updates from being added to the default partition while the
+    # party's ones are moved out of it, as those would be lost
+    # otherwise (or fail the attachment). This also serializes
+    # concurrent attempts to create the partition.
+    db.session.execute(
+        text(f'LOCK TABLE {default_partition} IN SHARE ROW EXCLUSIVE MODE')
+    )
+
+    if has_partition(party_id):
+        return
+
+    db.session.execute(
+        text(
+            f'CREATE TABLE {partition} '
+            f'(LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+    )
+
+    db.session.execute(
+        text(
+            f'INSERT INTO {partition} '
+            f'SELECT * FROM {default_partition} WHERE party_id = :party_id'
+        ),
+        {'party_id': party_id},
+    )
+    db.session.execute(
+        text(f'DELETE FROM {default_partition} WHERE party_id = :party_id'),
+        {'party_id': party_id},
+    )
+
+    db.session.execute(
+        text(
+            f'ALTER TABLE {parent} ATTACH PARTITION {partition} '
+            f'FOR VALUES IN ({party_id_literal})'
+        )
+    )
+
+    if commit:
+        db.session.commit()
+
+
+def drop_partition(party_id: PartyID) -> bool:
+    """Detach and drop the party's partition, and with it all of its
+    updates.
+
+    Return `False` if the party has no partition of its own.
+    """
+    if not has_partition(party_id):
+        return False
+
+    partition = _quote_identifier(get_partition_name(party_id))
+    parent = _quote_identifier(PARENT_TABLE_NAME)
+
+    db.session.execute(
+        text(f'ALTER TABLE {parent} DETACH PARTITION {partition}')
+    )
+    db.session.execute(text(f'DROP TABLE {partition}'))
+    db.session.commit()
+
+    return True
+
+
+def _quote_identifier(name: str) -> str:
+    return db.session.get_bind().dialect.identifier_preparer.quote(name)
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
@@ -0,0 +1,50 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import pytest
+
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import (
+    whereabouts_client_service,
+    whereabouts_service,
+)
+from byceps.services.whereabouts.models import Whereabouts, WhereaboutsClient
+
+from tests.helpers import generate_token
+
+
+@pytest.fixture(scope='module')
+def whereabouts_client(admin_user: User) -> WhereaboutsClient:
+    client, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+    approved_client, _ = whereabouts_client_service.approve_client(
+        client, admin_user
+    )
+    return approved_client
+
+
+@pytest.fixture(scope='module')
+def client_token_header(whereabouts_client: WhereaboutsClient):
+    return 'Authorization', f'Bearer {whereabouts_client.token}'
+
+
+@pytest.fixture(scope='module')
+def whereabouts(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+@pytest.fixture(scope='module')
+def whereabouts1(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+@pytest.fixture(scope='module')
+def whereabouts2(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
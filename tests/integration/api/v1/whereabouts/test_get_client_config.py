@@ -0,0 +1,115 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import pytest
+
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import whereabouts_client_service
+from byceps.services.whereabouts.models import (
+    WhereaboutsClient,
+    WhereaboutsClientConfig,
+)
+
+
+URL = '/v1/whereabouts/client/config'
+
+
+def test_without_assigned_config(
+    api_client, whereabouts_client_without_config: WhereaboutsClient
+):
+    headers = [_get_client_token_header(whereabouts_client_without_config)]
+    response = api_client.get(URL, headers=headers)
+
+    assert response.status_code == 404
+
+
+def test_assign_and_get_config(
+    api_client,
+    api_client_authz_header,
+    whereabouts_client: WhereaboutsClient,
+    client_config: WhereaboutsClientConfig,
+):
+    assign_url = f'/v1/whereabouts/client_configs/{client_config.id}/clients'
+    payload = {'client_ids': [str(whereabouts_client.id)]}
+
+    assign_response = api_client.post(
+        assign_url, headers=[api_client_authz_header], json=payload
+    )
+
+    assert assign_response.status_code == 200
+    assert assign_response.json == {'assigned_count': 1}
+
+    headers = [_get_client_token_header(whereabouts_client)]
+
+    response = api_client.get(URL, headers=headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert response.get_data(as_text=True) == client_config.content
+
+    etag, is_weak = response.get_etag()
+    assert etag == client_config.content_hash
+    assert not is_weak
+
+    conditional_headers = headers + [('If-None-Match', f'"{etag}"')]
+    conditional_response = api_client.get(URL, headers=conditional_headers)
+
+    assert conditional_response.status_code == 304
+    assert conditional_response.get_data() == b''
+    assert conditional_response.get_etag() == (etag, False)
+
+
+def test_assign_unknown_config(
+    api_client,
+    api_client_authz_header,
+    whereabouts_client: WhereaboutsClient,
+):
+    url = (
+        '/v1/whereabouts/client_configs'
+        '/00000000-0000-0000-0000-000000000000/clients'
+    )
+    payload = {'client_ids': [str(whereabouts_client.id)]}
+
+    response = api_client.post(
+        url, headers=[api_client_authz_header], json=payload
+    )
+
+    assert response.status_code == 404
+
+
+def test_assign_unauthorized(
+    api_client, client_config: WhereaboutsClientConfig
+):
+    url = f'/v1/whereabouts/client_configs/{client_config.id}/clients'
+
+    response = api_client.post(url, json={'client_ids': []})
+
+    assert response.status_code == 401
+
+
+@pytest.fixture(scope='module')
+def whereabouts_client_without_config(admin_user: User) -> WhereaboutsClient:
+    return _create_approved_client(admin_user)
+
+
+@pytest.fixture(scope='module')
+def client_config() -> WhereaboutsClientConfig:
+    return whereabouts_client_service.create_client_config(
+        'Entrance', None, 'volume = 80\n'
+    )
+
+
+def _create_approved_client(admin_user: User) -> WhereaboutsClient:
+    client, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+    approved_client, _ = whereabouts_client_service.approve_client(
+        client, admin_user
+    )
+    return approved_client
+
+
+def _get_client_token_header(client: WhereaboutsClient) -> tuple[str, str]:
+    return 'Authorization', f'Bearer {client.token}'
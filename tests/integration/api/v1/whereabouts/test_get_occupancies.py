@@ -0,0 +1,92 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import pytest
+
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import whereabouts_service
+from byceps.services.whereabouts.models import Whereabouts
+
+
+def test_get_occupancies(
+    api_client,
+    api_client_authz_header,
+    party: Party,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+    updates,
+):
+    response = send_request(api_client, api_client_authz_header, party.id)
+
+    assert response.status_code == 200
+    assert response.get_etag()[0] is not None
+
+    counts_by_name = {
+        item['name']: item['count'] for item in response.json['whereabouts']
+    }
+    # User 1 has moved on, user 2 is still there.
+    assert counts_by_name[whereabouts1.name] == 1
+    assert counts_by_name[whereabouts2.name] == 1
+
+
+def test_get_occupancies_not_modified(
+    api_client, api_client_authz_header, party: Party, updates
+):
+    response1 = send_request(api_client, api_client_authz_header, party.id)
+    etag = response1.headers['ETag']
+
+    headers = [api_client_authz_header, ('If-None-Match', etag)]
+    url = f'/v1/whereabouts/parties/{party.id}/occupancies'
+    response2 = api_client.get(url, headers=headers)
+
+    assert response2.status_code == 304
+
+
+def test_get_occupancies_for_unknown_party(api_client, api_client_authz_header):
+    response = send_request(
+        api_client, api_client_authz_header, 'unknown-party-id'
+    )
+
+    assert response.status_code == 404
+
+
+def test_get_occupancies_unauthorized(api_client, party: Party):
+    response = api_client.get(f'/v1/whereabouts/parties/{party.id}/occupancies')
+
+    assert response.status_code == 401
+
+
+@pytest.fixture(scope='module')
+def user1(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def user2(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def updates(
+    whereabouts_client,
+    user1: User,
+    user2: User,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+):
+    return [
+        whereabouts_service.set_status(whereabouts_client, user, whereabouts)[1]
+        for user, whereabouts in [
+            (user1, whereabouts1),
+            (user2, whereabouts1),
+            (user1, whereabouts2),
+        ]
+    ]
+
+
+def send_request(api_client, api_client_authz_header, party_id: str):
+    url = f'/v1/whereabouts/parties/{party_id}/occupancies'
+    return api_client.get(url, headers=[api_client_authz_header])
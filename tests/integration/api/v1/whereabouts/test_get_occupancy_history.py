@@ -0,0 +1,133 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+import pytest
+
+from byceps.services.party.models import Party
+from byceps.services.whereabouts import whereabouts_rollup_repository
+from byceps.services.whereabouts.models import Whereabouts
+
+from tests.helpers import generate_uuid
+
+
+def test_get_occupancy_history(
+    api_client,
+    api_client_authz_header,
+    party: Party,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+    rollups,
+):
+    response = send_request(
+        api_client,
+        api_client_authz_header,
+        party.id,
+        start='2025-05-29T14:00:00',
+        end='2025-05-29T14:02:00',
+    )
+
+    assert response.status_code == 200
+
+    minutes_by_name = {
+        item['name']: item['minutes'] for item in response.json['whereabouts']
+    }
+
+    # Arrivals before the start are included in the occupancy, but
+    # transitions after the end are not.
+    assert minutes_by_name[whereabouts1.name] == [
+        ['2025-05-29T14:00:00', 4, 2, 1],
+        ['2025-05-29T14:01:00', 4, 0, 0],
+        ['2025-05-29T14:02:00', 1, 0, 3],
+    ]
+    assert minutes_by_name[whereabouts2.name] == [
+        ['2025-05-29T14:00:00', 0, 0, 0],
+        ['2025-05-29T14:01:00', 0, 0, 0],
+        ['2025-05-29T14:02:00', 3, 3, 0],
+    ]
+
+
+def test_get_occupancy_history_with_end_before_start(
+    api_client, api_client_authz_header, party: Party
+):
+    response = send_request(
+        api_client,
+        api_client_authz_header,
+        party.id,
+        start='2025-05-29T14:00:00',
+        end='2025-05-29T13:59:00',
+    )
+
+    assert response.status_code == 400
+
+
+def test_get_occupancy_history_with_too_long_period(
+    api_client, api_client_authz_header, party: Party
+):
+    response = send_request(
+        api_client,
+        api_client_authz_header,
+        party.id,
+        start='2025-05-01T00:00:00',
+        end='2025-05-29T00:00:00',
+    )
+
+    assert response.status_code == 400
+
+
+def test_get_occupancy_history_for_unknown_party(
+    api_client, api_client_authz_header
+):
+    response = send_request(
+        api_client,
+        api_client_authz_header,
+        'unknown-party-id',
+        start='2025-05-29T14:00:00',
+        end='2025-05-29T14:02:00',
+    )
+
+    assert response.status_code == 404
+
+
+def test_get_occupancy_history_unauthorized(api_client, party: Party):
+    url = f'/v1/whereabouts/parties/{party.id}/occupancies/history'
+    query_string = {
+        'start': '2025-05-29T14:00:00',
+        'end': '2025-05-29T14:02:00',
+    }
+
+    response = api_client.get(url, query_string=query_string)
+
+    assert response.status_code == 401
+
+
+@pytest.fixture()
+def rollups(party: Party, whereabouts1: Whereabouts, whereabouts2: Whereabouts):
+    counts = {
+        (whereabouts1.id, datetime(2025, 5, 29, 13, 58)): (3, 0),
+        (whereabouts1.id, datetime(2025, 5, 29, 14, 0)): (2, 1),
+        (whereabouts1.id, datetime(2025, 5, 29, 14, 2)): (0, 3),
+        (whereabouts2.id, datetime(2025, 5, 29, 14, 2)): (3, 0),
+        (whereabouts2.id, datetime(2025, 5, 29, 14, 5)): (1, 0),
+    }
+
+    whereabouts_rollup_repository.add_transition_counts(
+        party.id, counts, generate_uuid()
+    )
+
+    yield
+
+    whereabouts_rollup_repository.delete_rollups(party.id)
+
+
+def send_request(
+    api_client, api_client_authz_header, party_id: str, *, start, end
+):
+    url = f'/v1/whereabouts/parties/{party_id}/occupancies/history'
+    query_string = {'start': start, 'end': end}
+    return api_client.get(
+        url, headers=[api_client_authz_header], query_string=query_string
+    )
@@ -7,14 +7,9 @@ import pytest
 
 from byceps.services.party.models import Party
 from byceps.services.user.models.user import User
-from byceps.services.whereabouts import (
-    whereabouts_client_service,
-    whereabouts_service,
-)
+from byceps.services.whereabouts import whereabouts_service
 from byceps.services.whereabouts.models import Whereabouts, WhereaboutsStatus
 
-from tests.helpers import generate_token
-
 
 CONTENT_TYPE_JSON = 'application/json'
 
@@ -53,33 +48,11 @@ def test_unauthorized(api_client, user: User, party: Party):
     assert response.json is None
 
 
-@pytest.fixture(scope='module')
-def whereabouts_client(admin_user: User):
-    client, _ = whereabouts_client_service.register_client(
-        button_count=3, audio_output=False
-    )
-    approved_client, _ = whereabouts_client_service.approve_client(
-        client, admin_user
-    )
-    return approved_client
-
-
 @pytest.fixture(scope='module')
 def user(make_user) -> User:
     return make_user()
 
 
-@pytest.fixture(scope='module')
-def whereabouts(party: Party) -> Whereabouts:
-    name = description = generate_token()
-    return whereabouts_service.create_whereabouts(party, name, description)
-
-
-@pytest.fixture(scope='module')
-def client_token_header(whereabouts_client):
-    return 'Authorization', f'Bearer {whereabouts_client.token}'
-
-
 @pytest.fixture(scope='module')
 def status(
     whereabouts_client, user: User, whereabouts: Whereabouts
@@ -0,0 +1,151 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import pytest
+
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import whereabouts_service
+from byceps.services.whereabouts.models import Whereabouts
+
+
+CONTENT_TYPE_JSON = 'application/json'
+
+
+def test_get_status_snapshot(
+    api_client,
+    api_client_authz_header,
+    party: Party,
+    user1: User,
+    user2: User,
+    whereabouts: Whereabouts,
+    statuses,
+):
+    response = send_request(api_client, api_client_authz_header, party)
+
+    assert response.status_code == 200
+    assert response.content_type == CONTENT_TYPE_JSON
+    assert response.headers['ETag']
+
+    response_data = response.json
+    assert response_data['next_cursor'] is None
+
+    user_ids = [user['id'] for user in response_data['users']]
+    assert len(user_ids) == len(set(user_ids))
+
+    whereabouts_ids = [w['id'] for w in response_data['whereabouts']]
+    assert len(whereabouts_ids) == len(set(whereabouts_ids))
+    assert {
+        'id': str(whereabouts.id),
+        'name': whereabouts.name,
+        'description': whereabouts.description,
+    } in response_data['whereabouts']
+
+    whereabouts_ids_by_user_id = {
+        user_ids[user_index]: whereabouts_ids[whereabouts_index]
+        for user_index, whereabouts_index, _ in response_data['statuses']
+    }
+    assert whereabouts_ids_by_user_id[str(user1.id)] == str(whereabouts.id)
+    assert whereabouts_ids_by_user_id[str(user2.id)] == str(whereabouts.id)
+
+
+def test_get_status_snapshot_paginated(
+    api_client,
+    api_client_authz_header,
+    party: Party,
+    user1: User,
+    user2: User,
+    statuses,
+):
+    user_ids = []
+    query_string = {'limit': 1}
+
+    while True:
+        response = send_request(
+            api_client,
+            api_client_authz_header,
+            party,
+            query_string=query_string,
+        )
+
+        assert response.status_code == 200
+        assert len(response.json['statuses']) == 1
+        user_ids.extend(user['id'] for user in response.json['users'])
+
+        next_cursor = response.json['next_cursor']
+        if next_cursor is None:
+            break
+
+        query_string = {'limit': 1, 'after': next_cursor}
+
+    assert len(user_ids) == len(set(user_ids))
+    assert user_ids.index(str(user1.id)) < user_ids.index(str(user2.id))
+
+
+def test_get_status_snapshot_not_modified(
+    api_client, api_client_authz_header, party: Party, statuses
+):
+    response1 = send_request(api_client, api_client_authz_header, party)
+    etag = response1.headers['ETag']
+
+    response2 = send_request(
+        api_client,
+        api_client_authz_header,
+        party,
+        headers=[('If-None-Match', etag)],
+    )
+
+    assert response2.status_code == 304
+
+
+def test_get_status_snapshot_invalid_cursor(
+    api_client, api_client_authz_header, party: Party
+):
+    response = send_request(
+        api_client,
+        api_client_authz_header,
+        party,
+        query_string={'after': 'invalid'},
+    )
+
+    assert response.status_code == 400
+
+
+def test_unauthorized(api_client, party: Party):
+    response = api_client.get(build_url(party))
+
+    assert response.status_code == 401
+
+
+@pytest.fixture(scope='module')
+def user1(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def user2(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def statuses(
+    whereabouts_client, user1: User, user2: User, whereabouts: Whereabouts
+):
+    return [
+        whereabouts_service.set_status(whereabouts_client, user, whereabouts)[0]
+        for user in [user1, user2]
+    ]
+
+
+def send_request(
+    api_client, api_client_authz_header, party: Party, *, headers=None, **kwargs
+):
+    url = build_url(party)
+    headers = [api_client_authz_header] + (headers or [])
+    return api_client.get(url, headers=headers, **kwargs)
+
+
+def build_url(party: Party) -> str:
+    return f'/v1/whereabouts/parties/{party.id}/statuses'
@@ -0,0 +1,126 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import whereabouts_service
+from byceps.services.whereabouts.models import Whereabouts
+
+
+def test_get_stays(
+    api_client,
+    api_client_authz_header,
+    party: Party,
+    user1: User,
+    user2: User,
+    whereabouts1: Whereabouts,
+    updates,
+):
+    start = updates[0].created_at - timedelta(minutes=1)
+    end = datetime.utcnow() + timedelta(minutes=1)
+
+    response = send_request(
+        api_client, api_client_authz_header, party, whereabouts1, start, end
+    )
+
+    assert response.status_code == 200
+
+    stays = response.json['stays']
+    assert [stay['user']['id'] for stay in stays] == [
+        str(user1.id),
+        str(user2.id),
+    ]
+
+    # User 1 has left, user 2 is still there.
+    assert stays[0]['entered_at'] == updates[0].created_at.isoformat()
+    assert stays[0]['left_at'] == updates[2].created_at.isoformat()
+    assert stays[1]['entered_at'] == updates[1].created_at.isoformat()
+    assert stays[1]['left_at'] is None
+
+
+def test_get_stays_outside_window(
+    api_client,
+    api_client_authz_header,
+    party: Party,
+    whereabouts1: Whereabouts,
+    updates,
+):
+    end = updates[0].created_at - timedelta(minutes=1)
+    start = end - timedelta(hours=1)
+
+    response = send_request(
+        api_client, api_client_authz_header, party, whereabouts1, start, end
+    )
+
+    assert response.status_code == 200
+    assert response.json['stays'] == []
+
+
+def test_get_stays_with_end_before_start(
+    api_client,
+    api_client_authz_header,
+    party: Party,
+    whereabouts1: Whereabouts,
+):
+    start = datetime.utcnow()
+    end = start - timedelta(hours=1)
+
+    response = send_request(
+        api_client, api_client_authz_header, party, whereabouts1, start, end
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.fixture(scope='module')
+def user1(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def user2(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def updates(
+    whereabouts_client,
+    user1: User,
+    user2: User,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+):
+    return [
+        whereabouts_service.set_status(whereabouts_client, user, whereabouts)[1]
+        for user, whereabouts in [
+            (user1, whereabouts1),
+            (user2, whereabouts1),
+            (user1, whereabouts2),
+            # Repeated scan at the same whereabouts does not start a stay.
+            (user2, whereabouts1),
+        ]
+    ]
+
+
+def send_request(
+    api_client,
+    api_client_authz_header,
+    party: Party,
+    whereabouts: Whereabouts,
+    start: datetime,
+    end: datetime,
+):
+    url = (
+        f'/v1/whereabouts/parties/{party.id}'
+        f'/whereabouts/{whereabouts.name}/stays'
+    )
+    query_string = {'start': start.isoformat(), 'end': end.isoformat()}
+    return api_client.get(
+        url, headers=[api_client_authz_header], query_string=query_string
+    )
@@ -8,14 +8,12 @@ import pytest
 from byceps.services.authn.identity_tag import authn_identity_tag_service
 from byceps.services.authn.identity_tag.models import UserIdentityTag
 from byceps.services.user.models.user import User
-from byceps.services.whereabouts import (
-    whereabouts_client_service,
-    whereabouts_sound_service,
-)
+from byceps.services.whereabouts import whereabouts_sound_service
 from byceps.services.whereabouts.models import WhereaboutsUserSound
 
 
 CONTENT_TYPE_JSON = 'application/json'
+CONTENT_TYPE_MSGPACK = 'application/msgpack'
 
 
 def test_with_unknown_identifier(api_client, client_token_header):
@@ -51,6 +49,27 @@ def test_with_known_identifier(
     assert response_data['sound_name'] == user_sound.name
 
 
+def test_with_known_identifier_as_msgpack(
+    api_client,
+    client_token_header,
+    identity_tag: UserIdentityTag,
+    user_sound: WhereaboutsUserSound,
+):
+    msgpack = pytest.importorskip('msgpack')
+
+    url = f'/v1/whereabouts/tags/{identity_tag.identifier}'
+    headers = [client_token_header, ('Accept', CONTENT_TYPE_MSGPACK)]
+    response = api_client.get(url, headers=headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == CONTENT_TYPE_MSGPACK
+
+    response_data = msgpack.unpackb(response.data)
+    assert response_data['identifier'] == identity_tag.identifier
+    assert response_data['user']['id'] == str(identity_tag.user.id)
+    assert response_data['sound_name'] == user_sound.name
+
+
 def test_with_known_identifier_unauthorized(
     api_client, identity_tag: UserIdentityTag, user_sound: WhereaboutsUserSound
 ):
@@ -61,22 +80,6 @@ def test_with_known_identifier_unauthorized(
     assert response.json is None
 
 
-@pytest.fixture(scope='module')
-def whereabouts_client(admin_user: User):
-    client, _ = whereabouts_client_service.register_client(
-        button_count=3, audio_output=False
-    )
-    approved_client, _ = whereabouts_client_service.approve_client(
-        client, admin_user
-    )
-    return approved_client
-
-
-@pytest.fixture(scope='module')
-def client_token_header(whereabouts_client):
-    return 'Authorization', f'Bearer {whereabouts_client.token}'
-
-
 @pytest.fixture(scope='module')
 def identity_tag(user: User, admin_user: User) -> UserIdentityTag:
     identifier = '0004283951'
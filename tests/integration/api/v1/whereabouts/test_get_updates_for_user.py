@@ -0,0 +1,132 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import pytest
+
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import whereabouts_service
+from byceps.services.whereabouts.models import Whereabouts
+
+
+CONTENT_TYPE_JSON = 'application/json'
+
+
+def test_get_updates_for_user(
+    api_client,
+    api_client_authz_header,
+    party: Party,
+    user: User,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+    updates,
+):
+    response = send_request(api_client, api_client_authz_header, party, user)
+
+    assert response.status_code == 200
+    assert response.content_type == CONTENT_TYPE_JSON
+
+    response_data = response.json
+    assert response_data['next_cursor'] is None
+    assert [update['id'] for update in response_data['updates']] == [
+        str(update.id) for update in reversed(updates)
+    ]
+    assert response_data['updates'][0]['whereabouts'] == {
+        'id': str(whereabouts1.id),
+        'name': whereabouts1.name,
+    }
+
+
+def test_get_updates_for_user_paginated(
+    api_client,
+    api_client_authz_header,
+    party: Party,
+    user: User,
+    updates,
+):
+    update_ids = []
+    query_string = {'limit': 2}
+
+    while True:
+        response = send_request(
+            api_client,
+            api_client_authz_header,
+            party,
+            user,
+            query_string=query_string,
+        )
+
+        assert response.status_code == 200
+        update_ids.extend(update['id'] for update in response.json['updates'])
+
+        next_cursor = response.json['next_cursor']
+        if next_cursor is None:
+            break
+
+        query_string = {'limit': 2, 'after': next_cursor}
+
+    assert update_ids == [str(update.id) for update in reversed(updates)]
+
+
+def test_get_updates_for_user_invalid_cursor(
+    api_client, api_client_authz_header, party: Party, user: User
+):
+    response = send_request(
+        api_client,
+        api_client_authz_header,
+        party,
+        user,
+        query_string={'after': 'invalid'},
+    )
+
+    assert response.status_code == 400
+
+
+def test_unauthorized(api_client, party: Party, user: User):
+    response = api_client.get(build_url(party, user))
+
+    assert response.status_code == 401
+
+
+@pytest.fixture(scope='module')
+def user(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def updates(
+    whereabouts_client,
+    user: User,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+):
+    return [
+        whereabouts_service.set_status(whereabouts_client, user, whereabouts)[1]
+        for whereabouts in [
+            whereabouts1,
+            whereabouts2,
+            whereabouts1,
+            whereabouts2,
+            whereabouts1,
+        ]
+    ]
+
+
+def send_request(
+    api_client,
+    api_client_authz_header,
+    party: Party,
+    user: User,
+    *,
+    headers=None,
+    **kwargs,
+):
+    url = build_url(party, user)
+    headers = [api_client_authz_header] + (headers or [])
+    return api_client.get(url, headers=headers, **kwargs)
+
+
+def build_url(party: Party, user: User) -> str:
+    return f'/v1/whereabouts/parties/{party.id}/users/{user.id}/updates'
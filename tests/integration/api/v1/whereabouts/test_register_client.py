@@ -9,7 +9,14 @@ import pytest
 
 from byceps.services.global_setting import global_setting_service
 from byceps.services.global_setting.models import GlobalSetting
-from byceps.services.whereabouts import whereabouts_client_service
+from byceps.services.whereabouts import (
+    whereabouts_client_registration_throttling,
+    whereabouts_client_repository,
+    whereabouts_client_service,
+)
+from byceps.services.whereabouts.whereabouts_client_registration_throttling import (
+    REGISTRATION_POLICY,
+)
 
 
 URL = '/v1/whereabouts/client/register'
@@ -29,6 +36,25 @@ def test_registration_closed(setting_registration_closed, api_client):
     assert response.status_code == 403
 
 
+def test_registration_closed_is_not_throttled(
+    setting_registration_closed, api_client
+):
+    payload = {
+        'button_count': 3,
+        'audio_output': True,
+    }
+
+    for _ in range(REGISTRATION_POLICY.capacity + 1):
+        response = send_request(api_client, payload)
+        assert response.status_code == 403
+
+    # The refused attempts have not used up the allowance.
+    whereabouts_client_service.open_registration()
+
+    response = send_request(api_client, payload)
+    assert response.status_code == 201
+
+
 def test_success(setting_registration_open, api_client):
     assert whereabouts_client_service.is_registration_open()
 
@@ -51,19 +77,83 @@ def test_success(setting_registration_open, api_client):
     }
 
 
+def test_throttled(setting_registration_open, api_client):
+    payload = {
+        'button_count': 3,
+        'audio_output': True,
+    }
+
+    for _ in range(REGISTRATION_POLICY.capacity):
+        response = send_request(api_client, payload)
+        assert response.status_code == 201
+
+    response = send_request(api_client, payload)
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+
+
+def test_client_candidate_limit_reached(
+    setting_registration_open, api_client, monkeypatch
+):
+    pending_count = len(whereabouts_client_service.get_client_candidates())
+    monkeypatch.setattr(
+        whereabouts_client_service, 'MAX_CLIENT_CANDIDATES', pending_count + 1
+    )
+
+    payload = {
+        'button_count': 3,
+        'audio_output': True,
+    }
+
+    response = send_request(api_client, payload)
+    assert response.status_code == 201
+
+    response = send_request(api_client, payload)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+
+
 def send_request(api_client, payload: dict[str, bool | int | str]):
     return api_client.post(URL, json=payload)
 
 
+@pytest.fixture(autouse=True)
+def reset_throttling() -> Iterator[None]:
+    whereabouts_client_registration_throttling.reset()
+    yield
+    whereabouts_client_registration_throttling.reset()
+
+
+@pytest.fixture(autouse=True)
+def delete_registered_candidates(api_app) -> Iterator[None]:
+    """Delete the client candidates registered by a test, so that they
+    do not count towards the limit of pending candidates in later tests.
+    """
+    candidate_ids_before = _get_client_candidate_ids()
+    yield
+    candidate_ids = _get_client_candidate_ids() - candidate_ids_before
+    whereabouts_client_repository.delete_client_candidates(candidate_ids)
+
+
+def _get_client_candidate_ids() -> set:
+    return {
+        candidate.id
+        for candidate in whereabouts_client_service.get_client_candidates()
+    }
+
+
 @pytest.fixture()
 def setting_registration_open(api_app) -> Iterator[GlobalSetting]:
     setting = global_setting_service.create_setting(
         'whereabouts_client_registration_status', 'open'
     )
+    whereabouts_client_service.clear_registration_status_cache()
 
     yield setting
 
     global_setting_service.remove_setting(setting.name)
+    whereabouts_client_service.clear_registration_status_cache()
 
 
 @pytest.fixture()
@@ -71,7 +161,9 @@ def setting_registration_closed(api_app) -> Iterator[GlobalSetting]:
     setting = global_setting_service.create_setting(
         'whereabouts_client_registration_status', 'closed'
     )
+    whereabouts_client_service.clear_registration_status_cache()
 
     yield setting
 
     global_setting_service.remove_setting(setting.name)
+    whereabouts_client_service.clear_registration_status_cache()
@@ -4,6 +4,7 @@
 """
 
 from datetime import datetime
+from uuid import uuid4
 
 from freezegun import freeze_time
 import pytest
@@ -11,10 +12,15 @@ import pytest
 from byceps.services.party.models import Party
 from byceps.services.user.models.user import User
 from byceps.services.whereabouts import (
-    whereabouts_client_service,
+    whereabouts_idempotency_service,
     whereabouts_service,
 )
 from byceps.services.whereabouts.models import Whereabouts
+from byceps.services.whereabouts.whereabouts_update_journal import (
+    UpdateJournal,
+)
+
+from byceps.util.uuid import generate_uuid7
 
 from tests.helpers import generate_token
 
@@ -55,6 +61,164 @@ def test_success(
     assert status_after.set_at == now
 
 
+def test_success_with_cbor(
+    api_client,
+    client_token_header,
+    whereabouts_client,
+    user2: User,
+    party: Party,
+    whereabouts: Whereabouts,
+):
+    cbor2 = pytest.importorskip('cbor2')
+
+    payload = {
+        'user_id': str(user2.id),
+        'party_id': str(party.id),
+        'whereabouts_name': str(whereabouts.name),
+    }
+
+    headers = [client_token_header]
+    response = api_client.post(
+        URL,
+        headers=headers,
+        data=cbor2.dumps(payload),
+        content_type='application/cbor',
+    )
+
+    assert response.status_code == 204
+
+    status_after = whereabouts_service.find_status(user2, party)
+    assert status_after is not None
+    assert status_after.whereabouts_id == whereabouts.id
+
+
+def test_retry_with_idempotency_key(
+    api_client,
+    client_token_header,
+    whereabouts_client,
+    user3: User,
+    party: Party,
+    whereabouts: Whereabouts,
+):
+    payload = {
+        'user_id': str(user3.id),
+        'party_id': str(party.id),
+        'whereabouts_name': str(whereabouts.name),
+    }
+
+    headers = [client_token_header, ('Idempotency-Key', generate_token())]
+
+    response1 = api_client.post(URL, headers=headers, json=payload)
+    assert response1.status_code == 204
+    assert 'Idempotent-Replayed' not in response1.headers
+
+    response2 = api_client.post(URL, headers=headers, json=payload)
+    assert response2.status_code == 204
+    assert response2.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_retry_with_update_id(
+    api_client,
+    client_token_header,
+    whereabouts_client,
+    user4: User,
+    party: Party,
+    whereabouts: Whereabouts,
+):
+    update_id = generate_uuid7()
+
+    payload = {
+        'user_id': str(user4.id),
+        'party_id': str(party.id),
+        'whereabouts_name': str(whereabouts.name),
+        'update_id': str(update_id),
+    }
+
+    response1 = send_request(api_client, client_token_header, payload)
+    assert response1.status_code == 204
+    assert 'Idempotent-Replayed' not in response1.headers
+
+    response2 = send_request(api_client, client_token_header, payload)
+    assert response2.status_code == 204
+    assert response2.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_retry_of_queued_update(
+    api_client,
+    client_token_header,
+    status_queue_path,
+    whereabouts_client,
+    user5: User,
+    party: Party,
+    whereabouts: Whereabouts,
+):
+    payload = {
+        'user_id': str(user5.id),
+        'party_id': str(party.id),
+        'whereabouts_name': str(whereabouts.name),
+    }
+
+    headers = [client_token_header, ('Idempotency-Key', generate_token())]
+    async_headers = headers + [('Prefer', 'respond-async')]
+
+    response1 = api_client.post(URL, headers=async_headers, json=payload)
+    assert response1.status_code == 202
+    assert 'Idempotent-Replayed' not in response1.headers
+
+    # The update has not been persisted yet, regardless of whether the
+    # retry asks for an asynchronous response.
+    for retry_headers in async_headers, headers:
+        response2 = api_client.post(URL, headers=retry_headers, json=payload)
+        assert response2.status_code == 202
+        assert response2.headers['Preference-Applied'] == 'respond-async'
+        assert response2.headers['Idempotent-Replayed'] == 'true'
+
+    persisted_count = whereabouts_service.persist_journaled_updates(
+        UpdateJournal(status_queue_path), batch_size=100
+    )
+    assert persisted_count == 1
+
+    # A process that has not seen the update finds it in the database.
+    whereabouts_idempotency_service.clear_recent_keys()
+
+    response3 = api_client.post(URL, headers=async_headers, json=payload)
+    assert response3.status_code == 202
+    assert response3.headers['Idempotent-Replayed'] == 'true'
+
+    response4 = api_client.post(URL, headers=headers, json=payload)
+    assert response4.status_code == 204
+    assert response4.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_update_id_of_wrong_version(
+    api_client,
+    client_token_header,
+    whereabouts_client,
+    user: User,
+    party: Party,
+    whereabouts: Whereabouts,
+):
+    payload = {
+        'user_id': str(user.id),
+        'party_id': str(party.id),
+        'whereabouts_name': str(whereabouts.name),
+        'update_id': str(uuid4()),
+    }
+
+    response = send_request(api_client, client_token_header, payload)
+
+    assert response.status_code == 400
+
+
+def test_unsupported_content_type(api_client, client_token_header):
+    headers = [client_token_header]
+    response = api_client.post(
+        URL, headers=headers, data='user_id=123', content_type='text/plain'
+    )
+
+    assert response.status_code == 415
+
+
 def test_unauthorized(api_client):
     response = api_client.post(URL)
 
@@ -128,30 +292,35 @@ def test_unknown_whereabouts_name(
 
 
 @pytest.fixture(scope='module')
-def whereabouts_client(admin_user: User):
-    client, _ = whereabouts_client_service.register_client(
-        button_count=3, audio_output=False
-    )
-    approved_client, _ = whereabouts_client_service.approve_client(
-        client, admin_user
-    )
-    return approved_client
+def user(make_user) -> User:
+    return make_user()
 
 
 @pytest.fixture(scope='module')
-def user(make_user) -> User:
+def user2(make_user) -> User:
     return make_user()
 
 
 @pytest.fixture(scope='module')
-def whereabouts(party) -> Whereabouts:
-    name = description = generate_token()
-    return whereabouts_service.create_whereabouts(party, name, description)
+def user3(make_user) -> User:
+    return make_user()
 
 
 @pytest.fixture(scope='module')
-def client_token_header(whereabouts_client):
-    return 'Authorization', f'Bearer {whereabouts_client.token}'
+def user4(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def user5(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture()
+def status_queue_path(api_app, tmp_path):
+    api_app.config['WHEREABOUTS_STATUS_QUEUE_PATH'] = str(tmp_path)
+    yield tmp_path
+    del api_app.config['WHEREABOUTS_STATUS_QUEUE_PATH']
 
 
 def send_request(api_client, client_token_header, payload: dict[str, str]):
@@ -0,0 +1,143 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from byceps.services.party import party_service
+from byceps.services.party.models import Party
+from byceps.services.user import user_service
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import (
+    whereabouts_client_repository,
+    whereabouts_idempotency_service,
+    whereabouts_outage_journal_service,
+    whereabouts_repository,
+    whereabouts_service,
+)
+from byceps.services.whereabouts.models import Whereabouts
+from byceps.services.whereabouts.whereabouts_update_journal import (
+    UpdateJournal,
+)
+
+from tests.helpers import generate_token
+
+
+URL = '/v1/whereabouts/statuses'
+
+
+def test_set_status_during_outage(
+    api_client,
+    client_token_header,
+    outage_journal_path,
+    whereabouts_client,
+    user: User,
+    party: Party,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+    monkeypatch,
+):
+    # The client, user, party, and whereabouts are looked up once while
+    # the database is available.
+    response = send_request(
+        api_client, client_token_header, user, party, whereabouts1
+    )
+    assert response.status_code == 204
+
+    _simulate_outage(monkeypatch)
+
+    idempotency_key = generate_token()
+
+    response = send_request(
+        api_client,
+        client_token_header,
+        user,
+        party,
+        whereabouts2,
+        idempotency_key=idempotency_key,
+    )
+    assert response.status_code == 204
+
+    # A retry that is not recognized (e.g. because it is handled by
+    # another process) is journaled as well.
+    whereabouts_idempotency_service.clear_recent_keys()
+    response = send_request(
+        api_client,
+        client_token_header,
+        user,
+        party,
+        whereabouts2,
+        idempotency_key=idempotency_key,
+    )
+    assert response.status_code == 204
+
+    monkeypatch.undo()
+
+    # Only one of the journaled updates is persisted.
+    persisted_count = whereabouts_service.persist_journaled_updates(
+        UpdateJournal(outage_journal_path), batch_size=100
+    )
+    assert persisted_count == 1
+
+    status = whereabouts_service.find_status(user, party)
+    assert status is not None
+    assert status.whereabouts_id == whereabouts2.id
+
+    update_id = whereabouts_repository.find_update_id_for_idempotency_key(
+        whereabouts_client.id, idempotency_key
+    )
+    assert update_id is not None
+
+
+@pytest.fixture()
+def outage_journal_path(api_app, tmp_path):
+    api_app.config['WHEREABOUTS_OUTAGE_JOURNAL_PATH'] = str(tmp_path)
+    whereabouts_outage_journal_service.clear_recent_lookups()
+    whereabouts_idempotency_service.clear_recent_keys()
+    yield tmp_path
+    del api_app.config['WHEREABOUTS_OUTAGE_JOURNAL_PATH']
+    whereabouts_outage_journal_service.clear_recent_lookups()
+
+
+def _simulate_outage(monkeypatch) -> None:
+    def fail(*args, **kwargs):
+        raise OperationalError('SELECT 1', {}, Exception('connection lost'))
+
+    for module, function_name in [
+        (whereabouts_client_repository, 'find_client_by_token'),
+        (user_service, 'find_user'),
+        (party_service, 'find_party'),
+        (whereabouts_repository, 'find_whereabouts_by_name'),
+        (whereabouts_repository, 'find_update_id_for_idempotency_key'),
+        (whereabouts_repository, 'lock_status'),
+    ]:
+        monkeypatch.setattr(module, function_name, fail)
+
+
+@pytest.fixture(scope='module')
+def user(make_user) -> User:
+    return make_user()
+
+
+def send_request(
+    api_client,
+    client_token_header,
+    user: User,
+    party: Party,
+    whereabouts: Whereabouts,
+    *,
+    idempotency_key: str | None = None,
+):
+    headers = [client_token_header]
+    if idempotency_key is not None:
+        headers.append(('Idempotency-Key', idempotency_key))
+
+    payload = {
+        'user_id': str(user.id),
+        'party_id': str(party.id),
+        'whereabouts_name': whereabouts.name,
+    }
+
+    return api_client.post(URL, headers=headers, json=payload)
@@ -0,0 +1,124 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+from ipaddress import ip_address
+
+import pytest
+from sqlalchemy import select
+
+from byceps.database import db
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import (
+    whereabouts_repository,
+    whereabouts_service,
+)
+from byceps.services.whereabouts.dbmodels import DbWhereaboutsUpdate
+from byceps.services.whereabouts.models import (
+    IPAddress,
+    Whereabouts,
+    WhereaboutsUpdateRecord,
+)
+from byceps.util.uuid import generate_uuid7
+
+from tests.helpers import generate_token
+
+
+IPV4_ADDRESS = ip_address('192.0.2.55')
+IPV6_ADDRESS = ip_address('2001:db8:1234:5678::1')
+
+
+def test_truncate_source_addresses(party: Party, updates):
+    # Change one update per chunk to go through several chunks.
+    count = whereabouts_service.anonymize_source_addresses(
+        party, truncate=True, chunk_size=1
+    )
+    assert count >= 2
+
+    assert _get_source_addresses(updates) == [
+        ip_address('192.0.2.0'),
+        ip_address('2001:db8:1234::'),
+        None,
+    ]
+
+    # Truncated addresses are left alone.
+    assert (
+        whereabouts_service.anonymize_source_addresses(
+            party, truncate=True, chunk_size=1
+        )
+        == 0
+    )
+
+
+def test_remove_source_addresses(party: Party, updates):
+    count = whereabouts_service.anonymize_source_addresses(party, chunk_size=1)
+    assert count >= 2
+
+    assert _get_source_addresses(updates) == [None, None, None]
+
+    assert whereabouts_service.anonymize_source_addresses(party) == 0
+
+
+@pytest.fixture(scope='module')
+def user(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def whereabouts(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+@pytest.fixture()
+def updates(party: Party, user: User, whereabouts: Whereabouts):
+    records = [
+        _build_record(party, user, whereabouts, IPV4_ADDRESS),
+        _build_record(party, user, whereabouts, IPV6_ADDRESS),
+        _build_record(party, user, whereabouts, None),
+    ]
+
+    whereabouts_repository.insert_update_records(records)
+    db.session.commit()
+
+    yield records
+
+    whereabouts_repository.delete_updates(
+        party.id, [record.id for record in records]
+    )
+
+
+def _build_record(
+    party: Party,
+    user: User,
+    whereabouts: Whereabouts,
+    source_address: IPAddress | None,
+) -> WhereaboutsUpdateRecord:
+    return WhereaboutsUpdateRecord(
+        id=generate_uuid7(),
+        party_id=party.id,
+        user_id=user.id,
+        whereabouts_id=whereabouts.id,
+        created_at=datetime.utcnow(),
+        client_id=None,
+        source_address=source_address,
+        idempotency_key=None,
+    )
+
+
+def _get_source_addresses(
+    records: list[WhereaboutsUpdateRecord],
+) -> list[IPAddress | None]:
+    db_updates_by_id = {
+        db_update.id: db_update
+        for db_update in db.session.scalars(
+            select(DbWhereaboutsUpdate).filter(
+                DbWhereaboutsUpdate.id.in_([record.id for record in records])
+            )
+        )
+    }
+
+    return [db_updates_by_id[record.id].source_address for record in records]
@@ -0,0 +1,135 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from ipaddress import ip_address
+
+import pytest
+
+from byceps.byceps_app import BycepsApp
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import (
+    whereabouts_archive_service,
+    whereabouts_client_service,
+    whereabouts_repository,
+    whereabouts_service,
+)
+from byceps.services.whereabouts.models import (
+    Whereabouts,
+    WhereaboutsClient,
+    WhereaboutsUpdate,
+)
+
+from tests.helpers import generate_token
+
+
+def test_archive_and_restore_updates(
+    archive_path,
+    party: Party,
+    user: User,
+    updates: list[WhereaboutsUpdate],
+):
+    archived_count = whereabouts_archive_service.archive_updates(
+        party, batch_size=2
+    )
+
+    assert archived_count >= len(updates)
+    assert whereabouts_repository.get_oldest_update_rows(party.id, 1) == []
+    assert whereabouts_archive_service.has_archived_updates(party.id)
+
+    archived_rows = list(
+        whereabouts_archive_service.iterate_archived_update_rows(
+            party.id, user_id=user.id
+        )
+    )
+    assert [row[0] for row in archived_rows] == [
+        update.id for update in updates
+    ]
+    assert [row[5] for row in archived_rows] == [
+        update.source_address for update in updates
+    ]
+
+    # Archived updates are still part of the user's history.
+    page = whereabouts_service.get_updates_for_user_page(user, party, 10)
+    assert [update.id for update in page.updates] == [
+        update.id for update in reversed(updates)
+    ]
+
+    restored_count = whereabouts_archive_service.restore_updates(party)
+
+    assert restored_count == archived_count
+    assert not whereabouts_archive_service.has_archived_updates(party.id)
+
+    rows = whereabouts_repository.get_oldest_update_rows(party.id, 10_000)
+    restored_rows = [row for row in rows if row[2] == user.id]
+    assert [row[0] for row in restored_rows] == [
+        update.id for update in updates
+    ]
+    assert [row[5] for row in restored_rows] == [
+        update.source_address for update in updates
+    ]
+
+
+@pytest.fixture()
+def archive_path(app: BycepsApp, tmp_path):
+    app.config['WHEREABOUTS_ARCHIVE_PATH'] = str(tmp_path)
+    yield tmp_path
+    del app.config['WHEREABOUTS_ARCHIVE_PATH']
+
+
+@pytest.fixture(scope='module')
+def whereabouts_client(admin_user: User) -> WhereaboutsClient:
+    client, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+    approved_client, _ = whereabouts_client_service.approve_client(
+        client, admin_user
+    )
+    return approved_client
+
+
+@pytest.fixture(scope='module')
+def user(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def whereabouts1(party: Party) -> Whereabouts:
+    return _create_whereabouts(party)
+
+
+@pytest.fixture(scope='module')
+def whereabouts2(party: Party) -> Whereabouts:
+    return _create_whereabouts(party)
+
+
+@pytest.fixture(scope='module')
+def updates(
+    whereabouts_client: WhereaboutsClient,
+    user: User,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+) -> list[WhereaboutsUpdate]:
+    updates = []
+
+    for whereabouts, source_address in [
+        (whereabouts1, ip_address('10.0.0.1')),
+        (whereabouts2, ip_address('2001:db8::1')),
+        (whereabouts1, None),
+    ]:
+        _, update, _ = whereabouts_service.set_status(
+            whereabouts_client,
+            user,
+            whereabouts,
+            source_address=source_address,
+        )
+        updates.append(update)
+
+    return updates
+
+
+def _create_whereabouts(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
@@ -0,0 +1,39 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import pytest
+
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import whereabouts_client_service
+
+
+def test_approve_stale_candidates(admin_user: User):
+    candidate1, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+    candidate2, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+
+    # Approved by someone else in the meantime.
+    whereabouts_client_service.approve_client(candidate1, admin_user)
+
+    approvals = whereabouts_client_service.approve_client_candidates(
+        [candidate1, candidate2], admin_user
+    )
+
+    assert [client.id for client, _ in approvals] == [candidate2.id]
+    assert [event.client_id for _, event in approvals] == [candidate2.id]
+
+
+def test_approve_candidate_twice(admin_user: User):
+    candidate, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+
+    whereabouts_client_service.approve_client(candidate, admin_user)
+
+    with pytest.raises(ValueError):
+        whereabouts_client_service.approve_client(candidate, admin_user)
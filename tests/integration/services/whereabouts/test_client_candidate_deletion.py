@@ -0,0 +1,63 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import whereabouts_client_service
+from byceps.services.whereabouts.models import WhereaboutsClientAuthorityStatus
+
+
+def test_delete_candidates(admin_user: User):
+    candidate1, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+    candidate2, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+
+    events = whereabouts_client_service.delete_client_candidates(
+        [candidate1, candidate2], admin_user
+    )
+
+    assert {event.client_id for event in events} == {
+        candidate1.id,
+        candidate2.id,
+    }
+    assert all(event.initiator == admin_user for event in events)
+
+    for candidate in [candidate1, candidate2]:
+        client_id = candidate.id
+        assert whereabouts_client_service.find_client(client_id) is None
+
+
+def test_delete_stale_candidates(admin_user: User):
+    candidate1, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+    candidate2, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+    candidate3, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+
+    # Approved and deleted, respectively, by someone else in the
+    # meantime.
+    client1, _ = whereabouts_client_service.approve_client(
+        candidate1, admin_user
+    )
+    whereabouts_client_service.delete_client_candidates(
+        [candidate2], admin_user
+    )
+
+    events = whereabouts_client_service.delete_client_candidates(
+        [candidate1, candidate2, candidate3], admin_user
+    )
+
+    assert [event.client_id for event in events] == [candidate3.id]
+
+    # The approved client has not been deleted.
+    client = whereabouts_client_service.find_client(client1.id)
+    assert client is not None
+    assert client.authority_status == WhereaboutsClientAuthorityStatus.approved
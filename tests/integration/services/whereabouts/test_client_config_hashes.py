@@ -0,0 +1,48 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from sqlalchemy import update
+
+from byceps.database import db
+from byceps.services.whereabouts import (
+    whereabouts_client_domain_service,
+    whereabouts_client_service,
+)
+from byceps.services.whereabouts.dbmodels import DbWhereaboutsClientConfig
+
+
+def test_backfill_client_config_content_hashes():
+    config = whereabouts_client_service.create_client_config(
+        'Entrance', None, 'volume = 80\n'
+    )
+
+    # Simulate the content having been changed in the database directly.
+    db.session.execute(
+        update(DbWhereaboutsClientConfig)
+        .filter_by(id=config.id)
+        .values(content='volume = 60\n')
+    )
+    db.session.commit()
+
+    updated_count = (
+        whereabouts_client_service.backfill_client_config_content_hashes()
+    )
+
+    assert updated_count >= 1
+
+    content_hash = whereabouts_client_service.find_client_config_content_hash(
+        config.id
+    )
+    assert content_hash == (
+        whereabouts_client_domain_service.compute_client_config_content_hash(
+            'volume = 60\n'
+        )
+    )
+
+    # Nothing is left to update.
+    updated_count = (
+        whereabouts_client_service.backfill_client_config_content_hashes()
+    )
+    assert updated_count == 0
@@ -0,0 +1,126 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+from ipaddress import ip_address
+
+import pytest
+from sqlalchemy import text
+
+from byceps.database import db
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import (
+    whereabouts_repository,
+    whereabouts_service,
+)
+from byceps.services.whereabouts.models import (
+    Whereabouts,
+    WhereaboutsUpdateRecord,
+)
+from byceps.util.uuid import generate_uuid7
+
+from tests.helpers import generate_token
+
+
+psycopg = pytest.importorskip('psycopg')
+
+
+def test_copy_update_records(party: Party, records):
+    count = whereabouts_repository.copy_update_records(records)
+
+    assert count == 3
+    assert _get_existing_ids(party, records) == {
+        record.id for record in records
+    }
+
+
+def test_copy_update_records_fails_on_existing_update(party: Party, records):
+    whereabouts_repository.copy_update_records(records[:1])
+
+    with pytest.raises(psycopg.errors.UniqueViolation):
+        whereabouts_repository.copy_update_records(records)
+
+    whereabouts_repository.rollback()
+
+    assert _get_existing_ids(party, records) == {records[0].id}
+
+
+def test_copy_update_records_skipping_existing(party: Party, records):
+    whereabouts_repository.copy_update_records(records[:1])
+
+    count = whereabouts_repository.copy_update_records(
+        records, skip_existing=True
+    )
+
+    assert count == 2
+    assert _get_existing_ids(party, records) == {
+        record.id for record in records
+    }
+
+    # The temporary table has been dropped, so it can be created again.
+    assert (
+        db.session.scalar(
+            text("SELECT to_regclass('whereabouts_updates_copy')")
+        )
+        is None
+    )
+
+    count = whereabouts_repository.copy_update_records(
+        records, skip_existing=True
+    )
+
+    assert count == 0
+
+
+@pytest.fixture(scope='module')
+def user(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def whereabouts(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+@pytest.fixture()
+def records(party: Party, user: User, whereabouts: Whereabouts):
+    records = [
+        _build_record(party, user, whereabouts, 14, 0),
+        _build_record(party, user, whereabouts, 14, 10),
+        _build_record(party, user, whereabouts, 14, 20),
+    ]
+
+    yield records
+
+    whereabouts_repository.delete_updates(
+        party.id, [record.id for record in records]
+    )
+
+
+def _build_record(
+    party: Party, user: User, whereabouts: Whereabouts, hour: int, minute: int
+) -> WhereaboutsUpdateRecord:
+    return WhereaboutsUpdateRecord(
+        id=generate_uuid7(),
+        party_id=party.id,
+        user_id=user.id,
+        whereabouts_id=whereabouts.id,
+        created_at=datetime(2025, 5, 29, hour, minute),
+        client_id=None,
+        source_address=ip_address('192.0.2.1'),
+        idempotency_key=None,
+    )
+
+
+def _get_existing_ids(
+    party: Party, records: list[WhereaboutsUpdateRecord]
+) -> set:
+    return {
+        record.id
+        for record in records
+        if whereabouts_repository.has_update(party.id, record.id)
+    }
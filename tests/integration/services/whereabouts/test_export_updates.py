@@ -0,0 +1,107 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import csv
+from ipaddress import ip_address
+import json
+
+import pytest
+
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import (
+    whereabouts_client_service,
+    whereabouts_export_service,
+    whereabouts_service,
+)
+from byceps.services.whereabouts.models import (
+    Whereabouts,
+    WhereaboutsClient,
+    WhereaboutsUpdate,
+)
+
+from tests.helpers import generate_token
+
+
+def test_export_updates_as_csv(
+    party: Party,
+    user: User,
+    whereabouts: Whereabouts,
+    whereabouts_client: WhereaboutsClient,
+    update: WhereaboutsUpdate,
+):
+    chunks = whereabouts_export_service.export_updates_as_csv(
+        party, user_id=user.id
+    )
+
+    rows = list(csv.DictReader(''.join(chunks).splitlines()))
+
+    assert rows == [
+        {
+            'id': str(update.id),
+            'created_at': update.created_at.isoformat(),
+            'user_id': str(user.id),
+            'user_screen_name': user.screen_name,
+            'whereabouts_id': str(whereabouts.id),
+            'whereabouts_name': whereabouts.name,
+            'client_id': str(whereabouts_client.id),
+            'source_address': '10.0.0.42',
+        }
+    ]
+
+
+def test_export_updates_as_ndjson(
+    party: Party,
+    user: User,
+    whereabouts: Whereabouts,
+    update: WhereaboutsUpdate,
+):
+    chunks = whereabouts_export_service.export_updates_as_ndjson(
+        party, user_id=user.id
+    )
+
+    records = [json.loads(line) for line in ''.join(chunks).splitlines()]
+
+    assert len(records) == 1
+    assert records[0]['id'] == str(update.id)
+    assert records[0]['whereabouts_name'] == whereabouts.name
+    assert records[0]['source_address'] == '10.0.0.42'
+
+
+@pytest.fixture(scope='module')
+def whereabouts_client(admin_user: User) -> WhereaboutsClient:
+    client, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+    approved_client, _ = whereabouts_client_service.approve_client(
+        client, admin_user
+    )
+    return approved_client
+
+
+@pytest.fixture(scope='module')
+def user(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def whereabouts(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+@pytest.fixture(scope='module')
+def update(
+    whereabouts_client: WhereaboutsClient,
+    user: User,
+    whereabouts: Whereabouts,
+) -> WhereaboutsUpdate:
+    _, update, _ = whereabouts_service.set_status(
+        whereabouts_client,
+        user,
+        whereabouts,
+        source_address=ip_address('10.0.0.42'),
+    )
+    return update
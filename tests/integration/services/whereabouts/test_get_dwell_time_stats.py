@@ -0,0 +1,124 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+import pytest
+
+from byceps.database import db
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import (
+    whereabouts_analytics_service,
+    whereabouts_repository,
+    whereabouts_service,
+)
+from byceps.services.whereabouts.models import (
+    Whereabouts,
+    WhereaboutsUpdateRecord,
+)
+from byceps.util.uuid import generate_uuid7
+
+from tests.helpers import generate_token
+
+
+pytest.importorskip('numpy')
+
+
+def test_get_dwell_time_stats(
+    party: Party,
+    user1: User,
+    user2: User,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+    updates,
+):
+    whereabouts_stats, user_party_times = (
+        whereabouts_analytics_service.get_dwell_time_stats(party)
+    )
+
+    stats_by_whereabouts_id = {
+        stats.whereabouts.id: stats for stats in whereabouts_stats
+    }
+
+    stats1 = stats_by_whereabouts_id[whereabouts1.id]
+    assert stats1.stay_count == 2
+    assert stats1.median_seconds == 900
+    assert stats1.p90_seconds == 1140
+
+    stats2 = stats_by_whereabouts_id[whereabouts2.id]
+    assert stats2.stay_count == 1
+    assert stats2.median_seconds == 1200
+    assert stats2.p90_seconds == 1200
+
+    seconds_by_user_id = {
+        user_party_time.user.id: user_party_time.seconds
+        for user_party_time in user_party_times
+    }
+    assert seconds_by_user_id[user1.id] == 1800
+    assert seconds_by_user_id[user2.id] == 1200
+
+
+@pytest.fixture(scope='module')
+def user1(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def user2(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def whereabouts1(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+@pytest.fixture(scope='module')
+def whereabouts2(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+@pytest.fixture()
+def updates(
+    party: Party,
+    user1: User,
+    user2: User,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+):
+    records = [
+        _build_record(party, user1, whereabouts1, 14, 0),
+        _build_record(party, user1, whereabouts2, 14, 10),
+        _build_record(party, user1, whereabouts1, 14, 30),
+        _build_record(party, user2, whereabouts1, 14, 0),
+        _build_record(party, user2, whereabouts2, 14, 20),
+    ]
+
+    whereabouts_repository.insert_update_records(records)
+    db.session.commit()
+
+    yield
+
+    whereabouts_repository.delete_updates(
+        party.id, [record.id for record in records]
+    )
+
+
+def _build_record(
+    party: Party, user: User, whereabouts: Whereabouts, hour: int, minute: int
+) -> WhereaboutsUpdateRecord:
+    return WhereaboutsUpdateRecord(
+        id=generate_uuid7(),
+        party_id=party.id,
+        user_id=user.id,
+        whereabouts_id=whereabouts.id,
+        created_at=datetime(2025, 5, 29, hour, minute),
+        client_id=None,
+        source_address=None,
+        idempotency_key=None,
+    )
@@ -0,0 +1,123 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+import pytest
+
+from byceps.database import db
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import (
+    whereabouts_repository,
+    whereabouts_service,
+)
+from byceps.services.whereabouts.models import (
+    Whereabouts,
+    WhereaboutsUpdateRecord,
+)
+from byceps.util.uuid import generate_uuid7
+
+from tests.helpers import generate_token
+
+
+def test_get_statuses_as_of(
+    party: Party,
+    user1: User,
+    user2: User,
+    user3: User,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+    updates,
+):
+    at = datetime(2025, 5, 29, 14, 15)
+
+    statuses = whereabouts_service.get_statuses_as_of(party, at)
+
+    statuses_by_user_id = {status.user.id: status for status in statuses}
+
+    # Of two updates at the same time, the later one (by ID) wins.
+    status1 = statuses_by_user_id[user1.id]
+    assert status1.whereabouts_id == whereabouts1.id
+    assert status1.set_at == datetime(2025, 5, 29, 14, 10)
+
+    # Updates after that time are ignored.
+    status2 = statuses_by_user_id[user2.id]
+    assert status2.whereabouts_id == whereabouts2.id
+    assert status2.set_at == datetime(2025, 5, 29, 14, 5)
+
+    # Users without any update until then have no status.
+    assert user3.id not in statuses_by_user_id
+
+
+@pytest.fixture(scope='module')
+def user1(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def user2(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def user3(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def whereabouts1(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+@pytest.fixture(scope='module')
+def whereabouts2(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+@pytest.fixture()
+def updates(
+    party: Party,
+    user1: User,
+    user2: User,
+    user3: User,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+):
+    # UUIDv7s are generated in ascending order.
+    records = [
+        _build_record(party, user1, whereabouts1, 14, 0),
+        _build_record(party, user1, whereabouts2, 14, 10),
+        _build_record(party, user1, whereabouts1, 14, 10),
+        _build_record(party, user2, whereabouts2, 14, 5),
+        _build_record(party, user2, whereabouts1, 14, 20),
+        _build_record(party, user3, whereabouts1, 14, 30),
+    ]
+
+    whereabouts_repository.insert_update_records(records)
+    db.session.commit()
+
+    yield
+
+    whereabouts_repository.delete_updates(
+        party.id, [record.id for record in records]
+    )
+
+
+def _build_record(
+    party: Party, user: User, whereabouts: Whereabouts, hour: int, minute: int
+) -> WhereaboutsUpdateRecord:
+    return WhereaboutsUpdateRecord(
+        id=generate_uuid7(),
+        party_id=party.id,
+        user_id=user.id,
+        whereabouts_id=whereabouts.id,
+        created_at=datetime(2025, 5, 29, hour, minute),
+        client_id=None,
+        source_address=None,
+        idempotency_key=None,
+    )
@@ -0,0 +1,77 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+import pytest
+
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import (
+    whereabouts_client_service,
+    whereabouts_repository,
+    whereabouts_service,
+)
+from byceps.services.whereabouts.models import (
+    Whereabouts,
+    WhereaboutsClient,
+    WhereaboutsUpdateRecord,
+)
+from byceps.util.uuid import generate_uuid7
+
+from tests.helpers import generate_token
+
+
+def test_persist_update_records_with_idempotency_key(
+    party: Party,
+    user: User,
+    whereabouts: Whereabouts,
+    whereabouts_client: WhereaboutsClient,
+):
+    idempotency_key = generate_token()
+    record = WhereaboutsUpdateRecord(
+        id=generate_uuid7(),
+        party_id=party.id,
+        user_id=user.id,
+        whereabouts_id=whereabouts.id,
+        created_at=datetime.utcnow(),
+        client_id=whereabouts_client.id,
+        source_address=None,
+        idempotency_key=idempotency_key,
+    )
+
+    assert whereabouts_service.persist_update_records([record]) == 1
+
+    assert (
+        whereabouts_repository.find_update_id_for_idempotency_key(
+            whereabouts_client.id, idempotency_key
+        )
+        == record.id
+    )
+
+    # Persisting the record again (e.g. on replay) skips it.
+    assert whereabouts_service.persist_update_records([record]) == 0
+
+
+@pytest.fixture(scope='module')
+def whereabouts_client(admin_user: User) -> WhereaboutsClient:
+    client, _ = whereabouts_client_service.register_client(
+        button_count=3, audio_output=False
+    )
+    approved_client, _ = whereabouts_client_service.approve_client(
+        client, admin_user
+    )
+    return approved_client
+
+
+@pytest.fixture(scope='module')
+def user(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def whereabouts(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
@@ -0,0 +1,145 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+import pytest
+
+from byceps.byceps_app import BycepsApp
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import (
+    whereabouts_archive_service,
+    whereabouts_rollup_repository,
+    whereabouts_rollup_service,
+    whereabouts_service,
+    whereabouts_stay_service,
+)
+from byceps.services.whereabouts.models import (
+    Whereabouts,
+    WhereaboutsID,
+    WhereaboutsUpdateRecord,
+)
+from byceps.util.uuid import generate_uuid7
+
+from tests.helpers import generate_token
+
+
+START = datetime(2025, 5, 29, 14, 0)
+END = datetime(2025, 5, 29, 14, 30)
+
+
+def test_backfill_rollups_includes_archived_updates(
+    archive_path,
+    party: Party,
+    user: User,
+    whereabouts1: Whereabouts,
+    whereabouts2: Whereabouts,
+):
+    _persist_update(party, user, whereabouts1, 14, 0)
+    _persist_update(party, user, whereabouts2, 14, 10)
+
+    whereabouts_rollup_service.backfill_rollups(party.id)
+    counts_before_archival = _get_transition_counts(
+        party, whereabouts1, whereabouts2
+    )
+
+    whereabouts_archive_service.archive_updates(party)
+
+    whereabouts_rollup_service.backfill_rollups(party.id)
+    assert (
+        _get_transition_counts(party, whereabouts1, whereabouts2)
+        == counts_before_archival
+    )
+
+    # The previous whereabouts of a new update is taken from the
+    # archive.
+    _persist_update(party, user, whereabouts1, 14, 20)
+
+    whereabouts_rollup_service.update_rollups(party.id)
+    assert _get_transition_counts(party, whereabouts1, whereabouts2) == {
+        (whereabouts1.id, datetime(2025, 5, 29, 14, 0)): (1, 0),
+        (whereabouts1.id, datetime(2025, 5, 29, 14, 10)): (0, 1),
+        (whereabouts1.id, datetime(2025, 5, 29, 14, 20)): (1, 0),
+        (whereabouts2.id, datetime(2025, 5, 29, 14, 10)): (1, 0),
+        (whereabouts2.id, datetime(2025, 5, 29, 14, 20)): (0, 1),
+    }
+
+
+def test_rebuild_stays_refuses_with_archived_updates(
+    archive_path,
+    party: Party,
+    user: User,
+    whereabouts1: Whereabouts,
+):
+    _persist_update(party, user, whereabouts1, 14, 0)
+
+    whereabouts_archive_service.archive_updates(party)
+
+    with pytest.raises(ValueError):
+        whereabouts_stay_service.rebuild_stays(party)
+
+    # The stays have been kept.
+    stays = whereabouts_stay_service.get_stays(whereabouts1, START, END)
+    assert [stay.user.id for stay in stays] == [user.id]
+
+
+@pytest.fixture()
+def archive_path(app: BycepsApp, tmp_path, party: Party):
+    app.config['WHEREABOUTS_ARCHIVE_PATH'] = str(tmp_path)
+    yield tmp_path
+    whereabouts_archive_service.restore_updates(party)
+    del app.config['WHEREABOUTS_ARCHIVE_PATH']
+    whereabouts_rollup_repository.delete_rollups(party.id)
+
+
+@pytest.fixture()
+def user(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture()
+def whereabouts1(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+@pytest.fixture()
+def whereabouts2(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+def _persist_update(
+    party: Party, user: User, whereabouts: Whereabouts, hour: int, minute: int
+) -> None:
+    record = WhereaboutsUpdateRecord(
+        id=generate_uuid7(),
+        party_id=party.id,
+        user_id=user.id,
+        whereabouts_id=whereabouts.id,
+        created_at=datetime(2025, 5, 29, hour, minute),
+        client_id=None,
+        source_address=None,
+        idempotency_key=None,
+    )
+
+    whereabouts_service.persist_update_records([record])
+
+
+def _get_transition_counts(
+    party: Party, whereabouts1: Whereabouts, whereabouts2: Whereabouts
+) -> dict[tuple[WhereaboutsID, datetime], tuple[int, int]]:
+    whereabouts_ids = {whereabouts1.id, whereabouts2.id}
+
+    return {
+        (whereabouts_id, minute): (arrivals, departures)
+        for whereabouts_id, minute, arrivals, departures in (
+            whereabouts_rollup_repository.get_transition_counts(
+                party.id, START, END
+            )
+        )
+        if whereabouts_id in whereabouts_ids
+    }
@@ -0,0 +1,125 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from collections.abc import Iterator
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from byceps.database import db
+from byceps.services.party.models import Party
+from byceps.services.user.models.user import User
+from byceps.services.whereabouts import (
+    whereabouts_service,
+    whereabouts_update_partition_repository,
+)
+from byceps.services.whereabouts.models import (
+    Whereabouts,
+    WhereaboutsUpdateRecord,
+)
+from byceps.services.whereabouts.whereabouts_update_partition_repository import (
+    DEFAULT_PARTITION_TABLE_NAME,
+    PARENT_TABLE_NAME,
+)
+from byceps.util.uuid import generate_uuid7
+
+from tests.helpers import generate_token
+
+
+def test_create_partition(party: Party, user: User, whereabouts: Whereabouts):
+    # The partition has been created along with the party's first
+    # whereabouts.
+    assert whereabouts_update_partition_repository.has_partition(party.id)
+
+    record = _build_record(party, user, whereabouts)
+    whereabouts_service.persist_update_records([record])
+
+    # Creating it again keeps it, and the updates in it.
+    whereabouts_service.create_update_partition(party)
+
+    assert whereabouts_update_partition_repository.has_partition(party.id)
+    assert _count_updates(_get_partition_name(party), party) == 1
+    assert _count_updates(DEFAULT_PARTITION_TABLE_NAME, party) == 0
+
+
+def test_create_partition_moves_updates_out_of_default_partition(
+    party: Party, user: User, whereabouts: Whereabouts, partition_dropped
+):
+    record = _build_record(party, user, whereabouts)
+    whereabouts_service.persist_update_records([record])
+
+    assert _count_updates(DEFAULT_PARTITION_TABLE_NAME, party) == 1
+
+    whereabouts_service.create_update_partition(party)
+
+    assert whereabouts_update_partition_repository.has_partition(party.id)
+    assert _count_updates(_get_partition_name(party), party) == 1
+    assert _count_updates(DEFAULT_PARTITION_TABLE_NAME, party) == 0
+    assert _count_updates(PARENT_TABLE_NAME, party) == 1
+
+
+def test_drop_partition(party: Party, user: User, whereabouts: Whereabouts):
+    record = _build_record(party, user, whereabouts)
+    whereabouts_service.persist_update_records([record])
+
+    assert whereabouts_service.drop_updates(party)
+
+    assert not whereabouts_update_partition_repository.has_partition(party.id)
+    assert _count_updates(PARENT_TABLE_NAME, party) == 0
+
+    # There is nothing left to drop.
+    assert not whereabouts_service.drop_updates(party)
+
+
+@pytest.fixture(scope='module')
+def user(make_user) -> User:
+    return make_user()
+
+
+@pytest.fixture(scope='module')
+def whereabouts(party: Party) -> Whereabouts:
+    name = description = generate_token()
+    return whereabouts_service.create_whereabouts(party, name, description)
+
+
+@pytest.fixture(autouse=True)
+def empty_partition(party: Party, whereabouts: Whereabouts) -> Iterator[None]:
+    yield
+
+    # Leave an empty partition behind for the next test.
+    whereabouts_service.drop_updates(party)
+    whereabouts_service.create_update_partition(party)
+
+
+@pytest.fixture()
+def partition_dropped(party: Party) -> None:
+    whereabouts_service.drop_updates(party)
+
+
+def _build_record(
+    party: Party, user: User, whereabouts: Whereabouts
+) -> WhereaboutsUpdateRecord:
+    return WhereaboutsUpdateRecord(
+        id=generate_uuid7(),
+        party_id=party.id,
+        user_id=user.id,
+        whereabouts_id=whereabouts.id,
+        created_at=datetime.utcnow(),
+        client_id=None,
+        source_address=None,
+        idempotency_key=None,
+    )
+
+
+def _get_partition_name(party: Party) -> str:
+    return whereabouts_update_partition_repository.get_partition_name(party.id)
+
+
+def _count_updates(table_name: str, party: Party) -> int:
+    return db.session.scalar(
+        text(f'SELECT COUNT(*) FROM {table_name} WHERE party_id = :party_id'),
+        {'party_id': party.id},
+    )
@@ -6,9 +6,16 @@
 from datetime import datetime
 from uuid import UUID
 
+from flask_babel import force_locale
+
 from byceps.announce.announce import build_announcement_request
 from byceps.byceps_app import BycepsApp
 from byceps.services.core.events import EventParty
+from byceps.services.webhooks.models import Announcement
+from byceps.services.whereabouts.announcing import (
+    cache_per_locale,
+    clear_announcement_cache,
+)
 from byceps.services.whereabouts.events import (
     WhereaboutsClientApprovedEvent,
     WhereaboutsClientDeletedEvent,
@@ -133,3 +140,35 @@ def test_whereabouts_status_updated(
     actual = build_announcement_request(event, webhook_for_irc)
 
     assert_text(actual, expected_text)
+
+
+def test_announcement_is_rendered_once_per_event_and_locale(
+    app: BycepsApp, now: datetime, webhook_for_irc
+):
+    renderings = []
+
+    @cache_per_locale
+    def announce(event_name, event, webhook):
+        renderings.append(event.client_id)
+        return Announcement(str(event.client_id))
+
+    clear_announcement_cache()
+
+    event1 = WhereaboutsClientSignedOnEvent(
+        occurred_at=now, initiator=None, client_id=CLIENT_ID
+    )
+    event2 = WhereaboutsClientSignedOnEvent(
+        occurred_at=now, initiator=None, client_id=CLIENT_ID
+    )
+
+    with force_locale('en'):
+        announcement1 = announce('event', event1, webhook_for_irc)
+        announcement2 = announce('event', event1, webhook_for_irc)
+        announce('event', event2, webhook_for_irc)
+
+    with force_locale('de'):
+        announce('event', event1, webhook_for_irc)
+
+    assert announcement2 is announcement1
+    # once for each distinct event and locale
+    assert len(renderings) == 3
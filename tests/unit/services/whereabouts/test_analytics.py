@@ -0,0 +1,89 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+import pytest
+
+from byceps.services.whereabouts import whereabouts_analytics_service
+
+
+np = pytest.importorskip('numpy')
+
+
+def test_load_update_columns():
+    batches = [
+        [
+            ('user1', 'hall', datetime(2025, 5, 29, 14, 0, 0)),
+            ('user2', 'orga', datetime(2025, 5, 29, 14, 0, 30)),
+        ],
+        [
+            ('user1', 'orga', datetime(2025, 5, 29, 14, 1, 0)),
+        ],
+    ]
+
+    user_ids, whereabouts_ids, users, whereabouts, timestamps = (
+        whereabouts_analytics_service.load_update_columns(batches)
+    )
+
+    assert user_ids == ['user1', 'user2']
+    assert whereabouts_ids == ['hall', 'orga']
+    assert users.tolist() == [0, 1, 0]
+    assert whereabouts.tolist() == [0, 1, 1]
+    assert (timestamps - timestamps[0]).tolist() == [0, 30, 60]
+
+
+def test_compute_stays():
+    # unordered on purpose
+    users = np.array([0, 1, 0, 0, 1, 0])
+    whereabouts = np.array([0, 0, 0, 1, 1, 0])
+    timestamps = np.array([0, 5, 60, 100, 50, 400])
+
+    stay_users, stay_whereabouts, durations = (
+        whereabouts_analytics_service.compute_stays(
+            users, whereabouts, timestamps
+        )
+    )
+
+    # User 0: at 0 from 0 (repeated at 60) to 100, at 1 from 100 to
+    # 400, then at 0 again (not completed).
+    # User 1: at 0 from 5 to 50, then at 1 (not completed).
+    assert sorted(
+        zip(stay_users.tolist(), stay_whereabouts.tolist(), durations.tolist())
+    ) == [
+        (0, 0, 100),
+        (0, 1, 300),
+        (1, 0, 45),
+    ]
+
+
+def test_compute_stays_without_updates():
+    empty = np.empty(0, dtype=np.int64)
+
+    stay_users, stay_whereabouts, durations = (
+        whereabouts_analytics_service.compute_stays(empty, empty, empty)
+    )
+
+    assert len(stay_users) == 0
+    assert len(stay_whereabouts) == 0
+    assert len(durations) == 0
+
+
+def test_aggregate_durations_per_group():
+    groups = np.array([1, 0, 1, 1, 0])
+    durations = np.array([10, 100, 30, 20, 300])
+
+    counts, medians, p90s = (
+        whereabouts_analytics_service.aggregate_durations_per_group(
+            groups, durations, 3
+        )
+    )
+
+    assert counts.tolist() == [2, 3, 0]
+    assert medians[0] == 200
+    assert medians[1] == 20
+    assert np.isnan(medians[2])
+    assert p90s[1] == pytest.approx(28)
+    assert np.isnan(p90s[2])
@@ -0,0 +1,143 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+from ipaddress import ip_address
+
+from flask import Flask
+import pytest
+
+from byceps.services.party.models import PartyID
+from byceps.services.user.models.user import UserID
+from byceps.services.whereabouts import whereabouts_archive_service
+from byceps.services.whereabouts.models import WhereaboutsID
+
+from tests.helpers import generate_uuid
+
+
+PARTY_ID = PartyID('archived-party')
+USER1_ID = UserID(generate_uuid())
+USER2_ID = UserID(generate_uuid())
+WHEREABOUTS_ID = WhereaboutsID(generate_uuid())
+
+
+def test_read_archived_rows(app_context, rows):
+    write_rows(rows[:2])
+    write_rows(rows[2:])
+
+    actual = list(
+        whereabouts_archive_service.iterate_archived_update_rows(PARTY_ID)
+    )
+
+    assert actual == rows
+
+
+def test_skip_batches_written_more_than_once(app_context, rows):
+    write_rows(rows[:2])
+    write_rows(rows[:2])  # interrupted archival
+    write_rows(rows[:3])
+    write_rows(rows[3:])
+
+    actual = list(
+        whereabouts_archive_service.iterate_archived_update_rows(PARTY_ID)
+    )
+
+    assert actual == rows
+
+
+def test_drop_source_addresses(app_context, rows):
+    write_rows(rows, drop_source_addresses=True)
+
+    actual = list(
+        whereabouts_archive_service.iterate_archived_update_rows(PARTY_ID)
+    )
+
+    assert [row[5] for row in actual] == [None, None, None, None]
+
+
+def test_filter_archived_rows(app_context, rows):
+    write_rows(rows)
+
+    actual = list(
+        whereabouts_archive_service.iterate_archived_update_rows(
+            PARTY_ID,
+            since=datetime(2025, 5, 29, 14, 1),
+            user_id=USER1_ID,
+        )
+    )
+
+    assert actual == [rows[2]]
+
+
+def test_get_latest_archived_update_rows_for_user(app_context, rows):
+    write_rows(rows)
+
+    get = whereabouts_archive_service.get_latest_archived_update_rows_for_user
+
+    assert get(PARTY_ID, USER1_ID, 5) == [rows[2], rows[0]]
+    assert get(PARTY_ID, USER1_ID, 1) == [rows[2]]
+    assert get(PARTY_ID, USER1_ID, 5, before=rows[2][0]) == [rows[0]]
+
+
+def test_without_archive(app_context):
+    assert not whereabouts_archive_service.has_archived_updates(PARTY_ID)
+    assert (
+        list(whereabouts_archive_service.iterate_archived_update_rows(PARTY_ID))
+        == []
+    )
+
+
+@pytest.fixture()
+def app_context(tmp_path):
+    app = Flask(__name__)
+    app.config['WHEREABOUTS_ARCHIVE_PATH'] = str(tmp_path)
+    with app.app_context():
+        yield
+
+
+@pytest.fixture()
+def rows():
+    # IDs must be in ascending order, just like (time-based) update IDs.
+    update_ids = sorted(generate_uuid() for _ in range(4))
+
+    return [
+        (
+            update_ids[0],
+            datetime(2025, 5, 29, 14, 0),
+            USER1_ID,
+            WHEREABOUTS_ID,
+            None,
+            ip_address('10.0.0.1'),
+        ),
+        (
+            update_ids[1],
+            datetime(2025, 5, 29, 14, 1),
+            USER2_ID,
+            WHEREABOUTS_ID,
+            None,
+            ip_address('10.0.0.2'),
+        ),
+        (
+            update_ids[2],
+            datetime(2025, 5, 29, 14, 2),
+            USER1_ID,
+            WHEREABOUTS_ID,
+            None,
+            ip_address('2001:db8::1'),
+        ),
+        (
+            update_ids[3],
+            datetime(2025, 5, 29, 14, 3),
+            USER2_ID,
+            WHEREABOUTS_ID,
+            None,
+            None,
+        ),
+    ]
+
+
+def write_rows(rows, *, drop_source_addresses=False) -> None:
+    path = whereabouts_archive_service._get_archive_file_path(PARTY_ID)
+    whereabouts_archive_service._append_batch(path, rows, drop_source_addresses)
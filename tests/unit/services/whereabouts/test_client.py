@@ -58,6 +58,19 @@ def test_approve_client(make_client_candidate, admin_user):
     assert actual_event.client_id is not None
 
 
+def test_delete_client_candidate(make_client_candidate, admin_user):
+    candidate = make_client_candidate(WhereaboutsClientAuthorityStatus.pending)
+
+    actual_event = whereabouts_client_domain_service.delete_client_candidate(
+        candidate, admin_user
+    )
+
+    assert isinstance(actual_event, WhereaboutsClientDeletedEvent)
+    assert actual_event.occurred_at is not None
+    assert actual_event.initiator == admin_user
+    assert actual_event.client_id == candidate.id
+
+
 def test_delete_client(make_client, admin_user):
     approved_client = make_client(WhereaboutsClientAuthorityStatus.approved)
 
@@ -79,6 +92,19 @@ def test_delete_client(make_client, admin_user):
     assert actual_event.client_id is not None
 
 
+def test_create_client_config():
+    content = 'volume = 80\n'
+
+    actual = whereabouts_client_domain_service.create_client_config(
+        'Entrance', None, content
+    )
+
+    assert actual.content == content
+    assert actual.content_hash == (
+        'f0e50ac0a854f5c1180c310809c741d42869ee5d553b3a8c7791759ab5264c27'
+    )
+
+
 @pytest.fixture(scope='module')
 def make_client_candidate():
     def _wrapper(
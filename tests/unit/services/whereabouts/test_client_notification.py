@@ -0,0 +1,56 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from byceps.services.whereabouts.models import WhereaboutsClientID
+from byceps.services.whereabouts.whereabouts_client_notification_service import (
+    ClientNotification,
+    deserialize_notification,
+    format_server_sent_event,
+    serialize_notification,
+)
+
+from tests.helpers import generate_uuid
+
+
+CLIENT_ID_1 = WhereaboutsClientID(generate_uuid())
+CLIENT_ID_2 = WhereaboutsClientID(generate_uuid())
+
+
+def test_targeted_notification_round_trip():
+    notification = ClientNotification(
+        event='client-config-assigned',
+        data={'config_id': 'e2f6e3d4-0e0c-4e1e-9a5a-8a7c8b3f0d62'},
+        client_ids=frozenset([CLIENT_ID_1]),
+    )
+
+    actual = deserialize_notification(serialize_notification(notification))
+
+    assert actual == notification
+    assert actual.concerns(CLIENT_ID_1)
+    assert not actual.concerns(CLIENT_ID_2)
+
+
+def test_broadcast_notification_round_trip():
+    notification = ClientNotification(
+        event='whereabouts-changed',
+        data={'party_id': 'acmecon-2025'},
+        client_ids=None,
+    )
+
+    actual = deserialize_notification(serialize_notification(notification))
+
+    assert actual == notification
+    assert actual.concerns(CLIENT_ID_1)
+    assert actual.concerns(CLIENT_ID_2)
+
+
+def test_format_server_sent_event():
+    actual = format_server_sent_event(
+        'user-sound-changed', {'user_id': 'some-user-id'}
+    )
+
+    assert actual == (
+        'event: user-sound-changed\ndata: {"user_id": "some-user-id"}\n\n'
+    )
@@ -0,0 +1,105 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+import pytest
+
+from byceps.services.whereabouts.whereabouts_client_registration_throttling import (
+    InMemoryTokenBucketStore,
+    RedisTokenBucketStore,
+    take_token,
+    ThrottlingDecision,
+    TokenBucketPolicy,
+)
+
+
+POLICY = TokenBucketPolicy(capacity=2, refill_rate=0.5)
+
+
+@pytest.mark.parametrize(
+    ('tokens', 'updated_at', 'now', 'expected'),
+    [
+        (2.0, 0.0, 0.0, (1.0, ThrottlingDecision(allowed=True, retry_after=0))),
+        (1.0, 0.0, 0.0, (0.0, ThrottlingDecision(allowed=True, retry_after=0))),
+        (
+            0.0,
+            0.0,
+            0.0,
+            (0.0, ThrottlingDecision(allowed=False, retry_after=2)),
+        ),
+        (
+            0.0,
+            0.0,
+            1.0,
+            (0.5, ThrottlingDecision(allowed=False, retry_after=1)),
+        ),
+        (0.0, 0.0, 2.0, (0.0, ThrottlingDecision(allowed=True, retry_after=0))),
+        # Refilling must not exceed the capacity.
+        (
+            0.0,
+            0.0,
+            100.0,
+            (1.0, ThrottlingDecision(allowed=True, retry_after=0)),
+        ),
+    ],
+)
+def test_take_token(tokens, updated_at, now, expected):
+    assert take_token(tokens, updated_at, POLICY, now) == expected
+
+
+def test_in_memory_store_throttles_per_key():
+    store = InMemoryTokenBucketStore()
+
+    assert store.take('10.0.0.1', POLICY, 0.0).allowed
+    assert store.take('10.0.0.1', POLICY, 0.0).allowed
+    assert not store.take('10.0.0.1', POLICY, 0.0).allowed
+
+    assert store.take('10.0.0.2', POLICY, 0.0).allowed
+
+    assert store.take('10.0.0.1', POLICY, 2.0).allowed
+
+
+def test_in_memory_store_evicts_least_recently_used_bucket():
+    store = InMemoryTokenBucketStore(max_buckets=1)
+
+    assert store.take('10.0.0.1', POLICY, 0.0).allowed
+    assert store.take('10.0.0.1', POLICY, 0.0).allowed
+    assert store.take('10.0.0.2', POLICY, 0.0).allowed
+
+    # The first bucket has been evicted, so it starts out full again.
+    assert store.take('10.0.0.1', POLICY, 0.0).allowed
+
+
+def test_redis_store_registers_script_once():
+    redis_client = FakeRedisClient(results=[[1, '1'], [0, '0.5']])
+    store = RedisTokenBucketStore(redis_client, 'prefix:')
+
+    assert store.take('10.0.0.1', POLICY, 100.0) == ThrottlingDecision(
+        allowed=True, retry_after=0
+    )
+    assert store.take('10.0.0.1', POLICY, 101.0) == ThrottlingDecision(
+        allowed=False, retry_after=1
+    )
+
+    assert len(redis_client.registered_scripts) == 1
+    assert redis_client.script_calls == [
+        (['prefix:10.0.0.1'], [2, 0.5, 100.0]),
+        (['prefix:10.0.0.1'], [2, 0.5, 101.0]),
+    ]
+
+
+class FakeRedisClient:
+    def __init__(self, results):
+        self._results = list(results)
+        self.registered_scripts = []
+        self.script_calls = []
+
+    def register_script(self, script):
+        self.registered_scripts.append(script)
+
+        def call(keys, args):
+            self.script_calls.append((keys, args))
+            return self._results.pop(0)
+
+        return call
@@ -0,0 +1,63 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+import json
+from uuid import UUID
+
+import pytest
+from werkzeug.datastructures import MIMEAccept
+
+from byceps.services.whereabouts.blueprints.api.encoding import (
+    decode_data,
+    encode_data,
+    is_supported_media_type,
+    RequestDecodingError,
+    select_response_media_type,
+)
+
+
+def test_decode_json():
+    assert decode_data('application/json', b'{"key": "value"}') == {
+        'key': 'value'
+    }
+
+
+def test_decode_invalid_json():
+    with pytest.raises(RequestDecodingError):
+        decode_data('application/json', b'{"key": ')
+
+
+def test_decode_unsupported_media_type():
+    assert not is_supported_media_type('text/plain')
+
+    with pytest.raises(RequestDecodingError):
+        decode_data('text/plain', b'key=value')
+
+
+def test_encode_json_converts_uuids_and_datetimes():
+    data = {
+        'id': UUID('0195d5e3-3bb5-7bd0-9d06-9ec2c7b0ae48'),
+        'set_at': datetime(2025, 3, 22, 14, 30, 0),
+    }
+
+    actual = json.loads(encode_data('application/json', data))
+
+    assert actual == {
+        'id': '0195d5e3-3bb5-7bd0-9d06-9ec2c7b0ae48',
+        'set_at': '2025-03-22T14:30:00',
+    }
+
+
+@pytest.mark.parametrize(
+    'accept',
+    [
+        MIMEAccept(),
+        MIMEAccept([('application/json', 1)]),
+        MIMEAccept([('text/html', 1)]),
+    ],
+)
+def test_select_response_media_type_defaults_to_json(accept):
+    assert select_response_media_type(accept) == 'application/json'
@@ -0,0 +1,54 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from byceps.services.whereabouts.gateway.notifications import (
+    NotificationDispatcher,
+)
+from byceps.services.whereabouts.models import WhereaboutsClientID
+from byceps.services.whereabouts.whereabouts_client_notification_service import (
+    ClientNotification,
+)
+
+from tests.helpers import generate_uuid
+
+
+CLIENT_ID_1 = WhereaboutsClientID(generate_uuid())
+CLIENT_ID_2 = WhereaboutsClientID(generate_uuid())
+
+
+def test_dispatch_to_concerned_subscribers():
+    dispatcher = NotificationDispatcher(redis_client=None)
+    targeted_notification = ClientNotification(
+        event='client-deleted',
+        data={},
+        client_ids=frozenset([CLIENT_ID_1]),
+    )
+    broadcast_notification = ClientNotification(
+        event='whereabouts-changed',
+        data={'party_id': 'acmecon-2025'},
+        client_ids=None,
+    )
+
+    with (
+        dispatcher.subscribe(CLIENT_ID_1) as queue1,
+        dispatcher.subscribe(CLIENT_ID_2) as queue2,
+    ):
+        dispatcher._dispatch(targeted_notification)
+        dispatcher._dispatch(broadcast_notification)
+
+        assert _drain(queue1) == [targeted_notification, broadcast_notification]
+        assert _drain(queue2) == [broadcast_notification]
+
+    # Left subscriptions receive nothing.
+    dispatcher._dispatch(broadcast_notification)
+    assert queue1.empty()
+    assert queue2.empty()
+
+
+def _drain(queue) -> list[ClientNotification]:
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
@@ -0,0 +1,48 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from byceps.services.party.models import PartyID
+from byceps.services.whereabouts import whereabouts_domain_service
+from byceps.services.whereabouts.models import WhereaboutsID
+
+from tests.helpers import generate_uuid
+
+
+PARTY_ID = PartyID('lanparty-2025')
+OTHER_PARTY_ID = PartyID('lanparty-2024')
+
+
+def test_get_occupancy_deltas_for_first_status():
+    new_whereabouts = (PARTY_ID, WhereaboutsID(generate_uuid()))
+
+    actual = whereabouts_domain_service.get_occupancy_deltas(
+        None, new_whereabouts
+    )
+
+    assert actual == {new_whereabouts: 1}
+
+
+def test_get_occupancy_deltas_for_move():
+    previous_whereabouts = (OTHER_PARTY_ID, WhereaboutsID(generate_uuid()))
+    new_whereabouts = (PARTY_ID, WhereaboutsID(generate_uuid()))
+
+    actual = whereabouts_domain_service.get_occupancy_deltas(
+        previous_whereabouts, new_whereabouts
+    )
+
+    assert actual == {
+        new_whereabouts: 1,
+        previous_whereabouts: -1,
+    }
+
+
+def test_get_occupancy_deltas_for_same_whereabouts():
+    whereabouts = (PARTY_ID, WhereaboutsID(generate_uuid()))
+
+    actual = whereabouts_domain_service.get_occupancy_deltas(
+        whereabouts, whereabouts
+    )
+
+    assert actual == {}
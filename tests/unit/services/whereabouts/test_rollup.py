@@ -0,0 +1,98 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+from byceps.services.user.models.user import UserID
+from byceps.services.whereabouts import whereabouts_rollup_domain_service
+from byceps.services.whereabouts.models import (
+    WhereaboutsID,
+    WhereaboutsOccupancyMinute,
+)
+
+from tests.helpers import generate_uuid
+
+
+USER_ID1 = UserID(generate_uuid())
+USER_ID2 = UserID(generate_uuid())
+
+HALL = WhereaboutsID(generate_uuid())
+ORGA_ROOM = WhereaboutsID(generate_uuid())
+
+
+def test_count_transitions():
+    updates = [
+        (USER_ID1, HALL, datetime(2025, 5, 29, 14, 0, 10)),
+        (USER_ID2, HALL, datetime(2025, 5, 29, 14, 0, 50)),
+        # same whereabouts again: not a transition
+        (USER_ID1, HALL, datetime(2025, 5, 29, 14, 1, 5)),
+        (USER_ID1, ORGA_ROOM, datetime(2025, 5, 29, 14, 2, 30)),
+    ]
+
+    actual = whereabouts_rollup_domain_service.count_transitions(updates, {})
+
+    assert actual == {
+        (HALL, datetime(2025, 5, 29, 14, 0)): (2, 0),
+        (HALL, datetime(2025, 5, 29, 14, 2)): (0, 1),
+        (ORGA_ROOM, datetime(2025, 5, 29, 14, 2)): (1, 0),
+    }
+
+
+def test_count_transitions_with_previous_whereabouts():
+    updates = [
+        (USER_ID1, HALL, datetime(2025, 5, 29, 14, 0, 10)),
+        (USER_ID2, ORGA_ROOM, datetime(2025, 5, 29, 14, 0, 20)),
+    ]
+    previous_whereabouts_ids = {USER_ID1: ORGA_ROOM, USER_ID2: ORGA_ROOM}
+
+    actual = whereabouts_rollup_domain_service.count_transitions(
+        updates, previous_whereabouts_ids
+    )
+
+    assert actual == {
+        (HALL, datetime(2025, 5, 29, 14, 0)): (1, 0),
+        (ORGA_ROOM, datetime(2025, 5, 29, 14, 0)): (0, 1),
+    }
+
+
+def test_build_occupancy_minutes():
+    transition_counts = [
+        (datetime(2025, 5, 29, 14, 0), 2, 1),
+        (datetime(2025, 5, 29, 14, 2), 0, 4),
+    ]
+    occupancy_before_start = 3
+    start = datetime(2025, 5, 29, 14, 0)
+    end = datetime(2025, 5, 29, 14, 3)
+
+    actual = whereabouts_rollup_domain_service.build_occupancy_minutes(
+        transition_counts, occupancy_before_start, start, end
+    )
+
+    assert actual == [
+        WhereaboutsOccupancyMinute(
+            minute=datetime(2025, 5, 29, 14, 0),
+            occupancy=4,
+            arrivals=2,
+            departures=1,
+        ),
+        WhereaboutsOccupancyMinute(
+            minute=datetime(2025, 5, 29, 14, 1),
+            occupancy=4,
+            arrivals=0,
+            departures=0,
+        ),
+        WhereaboutsOccupancyMinute(
+            minute=datetime(2025, 5, 29, 14, 2),
+            occupancy=0,
+            arrivals=0,
+            departures=4,
+        ),
+        WhereaboutsOccupancyMinute(
+            minute=datetime(2025, 5, 29, 14, 3),
+            occupancy=0,
+            arrivals=0,
+            departures=0,
+        ),
+    ]
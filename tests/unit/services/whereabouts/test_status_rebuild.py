@@ -0,0 +1,89 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+from byceps.services.party.models import PartyID
+from byceps.services.user.models.user import UserID
+from byceps.services.whereabouts import whereabouts_domain_service
+from byceps.services.whereabouts.models import WhereaboutsID
+
+from tests.helpers import generate_uuid
+
+
+PARTY_ID = PartyID('lanparty-2025')
+OTHER_PARTY_ID = PartyID('lanparty-2024')
+
+WHEREABOUTS1_ID = WhereaboutsID(generate_uuid())
+WHEREABOUTS2_ID = WhereaboutsID(generate_uuid())
+OTHER_WHEREABOUTS_ID = WhereaboutsID(generate_uuid())
+
+EARLIER = datetime(2025, 5, 29, 14, 0)
+LATER = datetime(2025, 5, 29, 16, 0)
+
+
+def test_diff_statuses_unchanged():
+    user_id = UserID(generate_uuid())
+
+    actual = whereabouts_domain_service.diff_statuses(
+        PARTY_ID,
+        {user_id: (WHEREABOUTS1_ID, EARLIER)},
+        {user_id: (PARTY_ID, WHEREABOUTS1_ID, EARLIER)},
+    )
+
+    assert actual.added == []
+    assert actual.changed == []
+    assert actual.removed == []
+    assert actual.unchanged_count == 1
+
+
+def test_diff_statuses_added_changed_removed():
+    missing_user_id = UserID(generate_uuid())
+    outdated_user_id = UserID(generate_uuid())
+    stray_user_id = UserID(generate_uuid())
+
+    actual = whereabouts_domain_service.diff_statuses(
+        PARTY_ID,
+        {
+            missing_user_id: (WHEREABOUTS1_ID, EARLIER),
+            outdated_user_id: (WHEREABOUTS2_ID, LATER),
+        },
+        {
+            outdated_user_id: (PARTY_ID, WHEREABOUTS1_ID, EARLIER),
+            stray_user_id: (PARTY_ID, WHEREABOUTS1_ID, EARLIER),
+        },
+    )
+
+    assert actual.added == [(missing_user_id, WHEREABOUTS1_ID, EARLIER)]
+    assert actual.changed == [(outdated_user_id, WHEREABOUTS2_ID, LATER)]
+    assert actual.removed == [stray_user_id]
+    assert actual.unchanged_count == 0
+
+
+def test_diff_statuses_keeps_more_recent_status_at_other_party():
+    user_id = UserID(generate_uuid())
+
+    actual = whereabouts_domain_service.diff_statuses(
+        PARTY_ID,
+        {user_id: (WHEREABOUTS1_ID, EARLIER)},
+        {user_id: (OTHER_PARTY_ID, OTHER_WHEREABOUTS_ID, LATER)},
+    )
+
+    assert actual.added == []
+    assert actual.changed == []
+    assert actual.removed == []
+
+
+def test_diff_statuses_replaces_older_status_at_other_party():
+    user_id = UserID(generate_uuid())
+
+    actual = whereabouts_domain_service.diff_statuses(
+        PARTY_ID,
+        {user_id: (WHEREABOUTS1_ID, LATER)},
+        {user_id: (OTHER_PARTY_ID, OTHER_WHEREABOUTS_ID, EARLIER)},
+    )
+
+    assert actual.changed == [(user_id, WHEREABOUTS1_ID, LATER)]
+    assert actual.removed == []
@@ -0,0 +1,47 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+from byceps.services.user.models.user import UserID
+from byceps.services.whereabouts import whereabouts_domain_service
+from byceps.services.whereabouts.models import WhereaboutsID
+
+from tests.helpers import generate_uuid
+
+
+def test_index_status_rows():
+    user_id1 = UserID(generate_uuid())
+    user_id2 = UserID(generate_uuid())
+    whereabouts_id1 = WhereaboutsID(generate_uuid())
+    whereabouts_id2 = WhereaboutsID(generate_uuid())
+
+    set_at1 = datetime(2025, 5, 29, 14, 0, 0)
+    set_at2 = datetime(2025, 5, 29, 14, 5, 0)
+    set_at3 = datetime(2025, 5, 29, 14, 9, 0)
+
+    rows = [
+        (user_id1, whereabouts_id1, set_at1),
+        (user_id2, whereabouts_id2, set_at2),
+        (user_id2, whereabouts_id1, set_at3),
+    ]
+
+    actual = whereabouts_domain_service.index_status_rows(rows)
+
+    assert actual == (
+        [user_id1, user_id2],
+        [whereabouts_id1, whereabouts_id2],
+        [
+            (0, 0, set_at1),
+            (1, 1, set_at2),
+            (1, 0, set_at3),
+        ],
+    )
+
+
+def test_index_status_rows_without_rows():
+    actual = whereabouts_domain_service.index_status_rows([])
+
+    assert actual == ([], [], [])
@@ -0,0 +1,102 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime, timedelta
+from ipaddress import ip_address
+
+from byceps.services.party.models import PartyID
+from byceps.services.user.models.user import UserID
+from byceps.services.whereabouts import whereabouts_domain_service
+from byceps.services.whereabouts.models import (
+    WhereaboutsClientID,
+    WhereaboutsID,
+    WhereaboutsUpdateRecord,
+)
+
+from tests.helpers import generate_uuid
+
+
+PARTY_ID = PartyID('lanparty-2025')
+
+CLIENT_ID = WhereaboutsClientID(generate_uuid())
+
+WHEREABOUTS1_ID = WhereaboutsID(generate_uuid())
+WHEREABOUTS2_ID = WhereaboutsID(generate_uuid())
+
+T0 = datetime(2025, 5, 29, 14, 0)
+
+
+def test_aggregate_update_batch_moves_user_twice():
+    user_id = UserID(generate_uuid())
+    record1 = create_record(user_id, WHEREABOUTS2_ID, T0 + timedelta(minutes=1))
+    record2 = create_record(user_id, WHEREABOUTS1_ID, T0 + timedelta(minutes=2))
+
+    actual = whereabouts_domain_service.aggregate_update_batch(
+        [record2, record1],
+        {user_id: (PARTY_ID, WHEREABOUTS1_ID, T0)},
+    )
+
+    assert actual.statuses == {user_id: (WHEREABOUTS1_ID, record2.created_at)}
+    # The user ends up where they started.
+    assert actual.occupancy_deltas == {}
+    assert actual.stay_ends == {user_id: record1.created_at}
+    assert actual.stays == [
+        (record1, record2.created_at),
+        (record2, None),
+    ]
+    assert actual.client_activity == {CLIENT_ID: record2.created_at}
+
+
+def test_aggregate_update_batch_first_status():
+    user_id = UserID(generate_uuid())
+    record = create_record(user_id, WHEREABOUTS1_ID, T0)
+
+    actual = whereabouts_domain_service.aggregate_update_batch([record], {})
+
+    assert actual.statuses == {user_id: (WHEREABOUTS1_ID, T0)}
+    assert actual.occupancy_deltas == {(PARTY_ID, WHEREABOUTS1_ID): 1}
+    assert actual.stays == [(record, None)]
+
+
+def test_aggregate_update_batch_same_whereabouts_again():
+    user_id = UserID(generate_uuid())
+    record = create_record(user_id, WHEREABOUTS1_ID, T0 + timedelta(minutes=1))
+
+    actual = whereabouts_domain_service.aggregate_update_batch(
+        [record], {user_id: (PARTY_ID, WHEREABOUTS1_ID, T0)}
+    )
+
+    assert actual.statuses == {user_id: (WHEREABOUTS1_ID, record.created_at)}
+    assert actual.occupancy_deltas == {}
+    assert actual.stay_ends == {}
+    assert actual.stays == []
+
+
+def test_aggregate_update_batch_ignores_outdated_update():
+    user_id = UserID(generate_uuid())
+    record = create_record(user_id, WHEREABOUTS2_ID, T0 - timedelta(minutes=1))
+
+    actual = whereabouts_domain_service.aggregate_update_batch(
+        [record], {user_id: (PARTY_ID, WHEREABOUTS1_ID, T0)}
+    )
+
+    assert actual.statuses == {}
+    assert actual.occupancy_deltas == {}
+    assert actual.stays == []
+
+
+def create_record(
+    user_id: UserID, whereabouts_id: WhereaboutsID, created_at: datetime
+) -> WhereaboutsUpdateRecord:
+    return WhereaboutsUpdateRecord(
+        id=generate_uuid(),
+        party_id=PARTY_ID,
+        user_id=user_id,
+        whereabouts_id=whereabouts_id,
+        created_at=created_at,
+        client_id=CLIENT_ID,
+        source_address=ip_address('10.0.0.23'),
+        idempotency_key=None,
+    )
@@ -0,0 +1,29 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime
+
+from byceps.services.whereabouts import whereabouts_domain_service
+
+
+def test_fill_minutes_without_count():
+    counts = [
+        (datetime(2025, 5, 29, 14, 1), 3),
+        (datetime(2025, 5, 29, 14, 3), 1),
+    ]
+    start = datetime(2025, 5, 29, 14, 0, 27)
+    end = datetime(2025, 5, 29, 14, 4, 59)
+
+    actual = whereabouts_domain_service.fill_minutes_without_count(
+        counts, start, end
+    )
+
+    assert actual == [
+        (datetime(2025, 5, 29, 14, 0), 0),
+        (datetime(2025, 5, 29, 14, 1), 3),
+        (datetime(2025, 5, 29, 14, 2), 0),
+        (datetime(2025, 5, 29, 14, 3), 1),
+        (datetime(2025, 5, 29, 14, 4), 0),
+    ]
@@ -0,0 +1,149 @@
+"""
+:Copyright: 2022-2025 Jochen Kupperschmidt
+:License: Revised BSD (see `LICENSE` file for details)
+"""
+
+from datetime import datetime, timedelta
+from ipaddress import ip_address
+import threading
+import time
+
+import pytest
+
+from byceps.services.party.models import PartyID
+from byceps.services.user.models.user import UserID
+from byceps.services.whereabouts.models import (
+    WhereaboutsClientID,
+    WhereaboutsID,
+    WhereaboutsUpdateRecord,
+)
+from byceps.services.whereabouts.whereabouts_update_journal import (
+    GroupCommitWriter,
+    UpdateJournal,
+)
+
+from tests.helpers import generate_uuid
+
+
+WHEREABOUTS1_ID = WhereaboutsID(generate_uuid())
+WHEREABOUTS2_ID = WhereaboutsID(generate_uuid())
+
+T0 = datetime(2025, 5, 29, 14, 0)
+
+
+def test_journal_roundtrip(tmp_path):
+    journal = UpdateJournal(tmp_path)
+    records = [
+        create_record(
+            UserID(generate_uuid()),
+            WHEREABOUTS1_ID,
+            T0,
+            idempotency_key='a3f1c9e2-retry',
+        ),
+        create_record(
+            UserID(generate_uuid()), WHEREABOUTS2_ID, T0 + timedelta(minutes=1)
+        ),
+    ]
+
+    journal.append(records[:1])
+    journal.append(records[1:])
+
+    assert journal.get_oldest_record_created_at() == T0
+
+    journal.seal_open_segment()
+    segments = journal.get_sealed_segments()
+    assert len(segments) == 1
+    assert list(journal.read_segment(segments[0])) == records
+
+    journal.remove_segment(segments[0])
+    assert journal.get_oldest_record_created_at() is None
+
+
+def test_journal_skips_partially_written_record(tmp_path):
+    journal = UpdateJournal(tmp_path)
+    record = create_record(UserID(generate_uuid()), WHEREABOUTS1_ID, T0)
+
+    with (tmp_path / 'open.ndjson').open('wb') as f:
+        f.write(b'{"id": "0195')
+
+    journal.append([record])
+    journal.seal_open_segment()
+
+    segment = journal.get_sealed_segments()[0]
+    assert list(journal.read_segment(segment)) == [record]
+
+
+def test_journal_allows_only_one_reader(tmp_path):
+    journal = UpdateJournal(tmp_path)
+
+    with journal.reading() as is_reader:
+        assert is_reader
+
+        with UpdateJournal(tmp_path).reading() as is_other_reader:
+            assert not is_other_reader
+
+
+def test_group_commit_writer_combines_concurrent_appends():
+    journal = SlowJournal()
+    writer = GroupCommitWriter(journal)
+    records = [
+        create_record(UserID(generate_uuid()), WHEREABOUTS1_ID, T0)
+        for _ in range(20)
+    ]
+
+    threads = [
+        threading.Thread(target=writer.append, args=([record],))
+        for record in records
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(journal.records, key=lambda r: r.id) == sorted(
+        records, key=lambda r: r.id
+    )
+    assert journal.append_count < len(records)
+
+
+def test_group_commit_writer_raises_write_error():
+    writer = GroupCommitWriter(FailingJournal())
+    record = create_record(UserID(generate_uuid()), WHEREABOUTS1_ID, T0)
+
+    with pytest.raises(OSError):
+        writer.append([record])
+
+
+class SlowJournal:
+    def __init__(self) -> None:
+        self.records: list[WhereaboutsUpdateRecord] = []
+        self.append_count = 0
+
+    def append(self, records: list[WhereaboutsUpdateRecord]) -> None:
+        time.sleep(0.01)  # simulate a sync to disk
+        self.records.extend(records)
+        self.append_count += 1
+
+
+class FailingJournal:
+    def append(self, records: list[WhereaboutsUpdateRecord]) -> None:
+        raise OSError('No space left on device')
+
+
+def create_record(
+    user_id: UserID,
+    whereabouts_id: WhereaboutsID,
+    created_at: datetime,
+    *,
+    idempotency_key: str | None = None,
+) -> WhereaboutsUpdateRecord:
+    return WhereaboutsUpdateRecord(
+        id=generate_uuid(),
+        party_id=PartyID('lanparty-2025'),
+        user_id=user_id,
+        whereabouts_id=whereabouts_id,
+        created_at=created_at,
+        client_id=WhereaboutsClientID(generate_uuid()),
+        source_address=ip_address('10.0.0.23'),
+        idempotency_key=idempotency_key,
+    )